@@ -5,12 +5,19 @@ cdef class Cartesian(object):
         Rotation __rotation
         str __name
         double[:] __origin
+        double[:, :] __matrix
         list __labels
+        unsigned long __generation
+        object __observers
 
+    cdef void __changed(self) except *
+
+    cpdef add_observer(self, observer)
+    cpdef remove_observer(self, observer)
     cpdef rotate(self, Rotation rotation, double[:] rot_center=*)
     cpdef rotate_axis_angle(self, double[:] axis, double theta, double[:] rot_center=*)
     cpdef rotate_euler_angles(self, double[:] euler_angles, double[:] rot_center=*)
     cpdef double[:] to_parent_vector(self, double[:] xyz)
-    cpdef double[:, :] to_parent(self, double[:, :] xyz)
+    cpdef to_parent(self, xyz, out=*, bint inplace=*)
     cpdef double[:] to_local_vector(self, double[:] xyz)
-    cpdef double[:, :] to_local(self, double[:, :] xyz)
+    cpdef to_local(self, xyz, out=*, bint inplace=*)
@@ -1,4 +1,5 @@
 import numpy as np
+from weakref import WeakSet
 
 from cython import boundscheck, wraparound
 from cython.parallel import prange
@@ -8,7 +9,59 @@ from cpython.object cimport Py_EQ, Py_NE
 
 from BDQuaternions cimport Rotation, EulerAngles
 
-from .transforms cimport unit_vector
+from .transforms cimport real, unit_vector, prepare_output
+
+
+cdef bint _single_precision(xyz):
+    return getattr(xyz, 'dtype', None) == np.float32
+
+
+@boundscheck(False)
+@wraparound(False)
+cdef real[:, :] __to_parent(real[:, :] xyz, real[:, :] result, double[:, :] matrix, double[:] origin):
+    """
+    Affine transform xyz * matrix + origin of points array shaped Nx3 in the precision of the arrays
+    """
+    cdef:
+        int i, s = xyz.shape[0]
+        real m00 = matrix[0, 0], m01 = matrix[0, 1], m02 = matrix[0, 2]
+        real m10 = matrix[1, 0], m11 = matrix[1, 1], m12 = matrix[1, 2]
+        real m20 = matrix[2, 0], m21 = matrix[2, 1], m22 = matrix[2, 2]
+        real o0 = origin[0], o1 = origin[1], o2 = origin[2]
+        real x, y, z
+    with nogil:
+        for i in prange(s):
+            x = xyz[i, 0]
+            y = xyz[i, 1]
+            z = xyz[i, 2]
+            result[i, 0] = x * m00 + y * m10 + z * m20 + o0
+            result[i, 1] = x * m01 + y * m11 + z * m21 + o1
+            result[i, 2] = x * m02 + y * m12 + z * m22 + o2
+    return result
+
+
+@boundscheck(False)
+@wraparound(False)
+cdef real[:, :] __to_local(real[:, :] xyz, real[:, :] result, double[:, :] matrix, double[:] origin):
+    """
+    Inverse affine transform (xyz - origin) * matrix^T of points array shaped Nx3 in the precision of the arrays
+    """
+    cdef:
+        int i, s = xyz.shape[0]
+        real m00 = matrix[0, 0], m01 = matrix[0, 1], m02 = matrix[0, 2]
+        real m10 = matrix[1, 0], m11 = matrix[1, 1], m12 = matrix[1, 2]
+        real m20 = matrix[2, 0], m21 = matrix[2, 1], m22 = matrix[2, 2]
+        real o0 = origin[0], o1 = origin[1], o2 = origin[2]
+        real x, y, z
+    with nogil:
+        for i in prange(s):
+            x = xyz[i, 0] - o0
+            y = xyz[i, 1] - o1
+            z = xyz[i, 2] - o2
+            result[i, 0] = x * m00 + y * m01 + z * m02
+            result[i, 1] = x * m10 + y * m11 + z * m12
+            result[i, 2] = x * m20 + y * m21 + z * m22
+    return result
 
 
 cdef class Cartesian(object):
@@ -18,11 +71,16 @@ cdef class Cartesian(object):
 
     def __init__(self, basis=None, origin=None, name='Cartesian CS', labels=None,
                  euler_angles_convention=None):
+        # Objects notified on every change of basis or origin
+        self.__observers = WeakSet()
+        self.__generation = 0
         # The basis rotation is kept as Rotation quaternion
         self.__rotation = Rotation()
         self.euler_angles_convention = euler_angles_convention
         self.__name = str(name)
         self.labels = labels
+        # Precomputed basis matrix, rows are basis vectors in parent CS
+        self.__matrix = np.eye(3, dtype=np.double)
         # Basis in parent CS
         if basis is None:
             basis = np.eye(3, dtype=np.double)
@@ -69,6 +127,7 @@ cdef class Cartesian(object):
     @euler_angles.setter
     def euler_angles(self, euler_angles):
         self.__rotation.euler_angles = euler_angles
+        self.__changed()
 
     @property
     def basis(self):
@@ -95,6 +154,7 @@ cdef class Cartesian(object):
             if not np.allclose(np.cross(basis[0], basis[1]), basis[2]):
                 raise ValueError('only right-hand basis accepted')
             self.__rotation.rotation_matrix = basis.T
+            self.__changed()
         else:
             raise ValueError('complete 3D basis is needed')
 
@@ -111,6 +171,37 @@ cdef class Cartesian(object):
             if origin.size != 3:
                 raise ValueError('Origin must be 3 numeric coordinates')
             self.__origin = origin
+        self.__changed()
+
+    @property
+    def generation(self):
+        """
+        Counter incremented on every change of the basis or the origin.
+        Note that in-place modification of origin array is not tracked, assign a new origin instead.
+        """
+        return self.__generation
+
+    cdef void __changed(self) except *:
+        self.__matrix = np.array(self.__rotation.rotation_matrix, dtype=np.double).T.copy()
+        self.__generation += 1
+        for observer in list(self.__observers):
+            observer.coordinate_system_changed(self)
+
+    cpdef add_observer(self, observer):
+        """
+        Register an object to be notified about changes of the coordinate system.
+        Observer must implement coordinate_system_changed(coordinate_system) method.
+        Only weak reference to the observer is stored.
+        :param observer: observer object
+        """
+        self.__observers.add(observer)
+
+    cpdef remove_observer(self, observer):
+        """
+        Unregister an observer object
+        :param observer: observer object
+        """
+        self.__observers.discard(observer)
 
     def __richcmp__(x, y, int op):
         if op == Py_EQ:
@@ -155,6 +246,7 @@ cdef class Cartesian(object):
             origin_shift = rotation.rotate_vector(origin_shift)
             for i in range(3):
                 self.__origin[i] = rot_center[i] + origin_shift[i]
+        self.__changed()
 
     cpdef rotate_axis_angle(self, double[:] axis, double theta, double[:] rot_center=None):
         """
@@ -179,65 +271,64 @@ cdef class Cartesian(object):
         rotation.euler_angles = EulerAngles(euler_angles, rotation.euler_angles_convention)
         self.rotate(rotation, rot_center=rot_center)
 
+    @boundscheck(False)
+    @wraparound(False)
     cpdef double[:] to_parent_vector(self, double[:] xyz):
         """
         calculates coordinates of given points in parent (global) CS
         :param xyz: local coordinates of a 3D vector
         """
         cdef:
-            double[:] xyz_parent = self.__rotation.rotate_vector(xyz)
-        xyz_parent[0] += self.__origin[0]
-        xyz_parent[1] += self.__origin[1]
-        xyz_parent[2] += self.__origin[2]
+            double[:] xyz_parent
+            array[double] template = array('d')
+        xyz_parent = clone(template, 3, zero=False)
+        xyz_parent[0] = xyz[0] * self.__matrix[0, 0] + xyz[1] * self.__matrix[1, 0] + xyz[2] * self.__matrix[2, 0]\
+                        + self.__origin[0]
+        xyz_parent[1] = xyz[0] * self.__matrix[0, 1] + xyz[1] * self.__matrix[1, 1] + xyz[2] * self.__matrix[2, 1]\
+                        + self.__origin[1]
+        xyz_parent[2] = xyz[0] * self.__matrix[0, 2] + xyz[1] * self.__matrix[1, 2] + xyz[2] * self.__matrix[2, 2]\
+                        + self.__origin[2]
         return xyz_parent
 
-    @boundscheck(False)
-    @wraparound(False)
-    cpdef double[:, :] to_parent(self, double[:, :] xyz):
+    cpdef to_parent(self, xyz, out=None, bint inplace=False):
         """
-        calculates coordinates of given points in parent (global) CS
+        calculates coordinates of given points in parent (global) CS.
+        Single (float32) or double precision arithmetic is selected by the dtype of xyz.
         :param xyz: local coordinates array
+        :param out: optional preallocated output array shaped Nx3
+        :param inplace: if True the result is written to xyz array
         """
-        cdef:
-            double[:, :] xyz_parent = self.__rotation.rotate(xyz)
-            int i, s = xyz_parent.shape[0]
-        with nogil:
-            for i in prange(0, s):
-                xyz_parent[i, 0] += self.__origin[0]
-                xyz_parent[i, 1] += self.__origin[1]
-                xyz_parent[i, 2] += self.__origin[2]
-        return xyz_parent
+        if _single_precision(xyz):
+            return __to_parent[float](xyz, prepare_output[float](xyz, out, inplace), self.__matrix, self.__origin)
+        return __to_parent[double](xyz, prepare_output[double](xyz, out, inplace), self.__matrix, self.__origin)
 
     @boundscheck(False)
+    @wraparound(False)
     cpdef double[:] to_local_vector(self, double[:] xyz):
         """
         calculates local coordinates for points in parent CS/
         :param xyz: vector coordinates in parent (global) coordinate system.
         """
         cdef:
+            double x = xyz[0] - self.__origin[0]
+            double y = xyz[1] - self.__origin[1]
+            double z = xyz[2] - self.__origin[2]
             double[:] xyz_local
             array[double] template = array('d')
         xyz_local = clone(template, 3, zero=False)
-        xyz_local[0] = xyz[0] - self.__origin[0]
-        xyz_local[1] = xyz[1] - self.__origin[1]
-        xyz_local[2] = xyz[2] - self.__origin[2]
-        xyz_local = self.__rotation.reciprocal().rotate_vector(xyz_local)
+        xyz_local[0] = x * self.__matrix[0, 0] + y * self.__matrix[0, 1] + z * self.__matrix[0, 2]
+        xyz_local[1] = x * self.__matrix[1, 0] + y * self.__matrix[1, 1] + z * self.__matrix[1, 2]
+        xyz_local[2] = x * self.__matrix[2, 0] + y * self.__matrix[2, 1] + z * self.__matrix[2, 2]
         return xyz_local
 
-    @boundscheck(False)
-    @wraparound(False)
-    cpdef double[:, :] to_local(self, double[:, :] xyz):
+    cpdef to_local(self, xyz, out=None, bint inplace=False):
         """
-        calculates local coordinates for points in parent CS/
+        calculates local coordinates for points in parent CS.
+        Single (float32) or double precision arithmetic is selected by the dtype of xyz.
         :param xyz: coordinates in parent (global) coordinate system.
+        :param out: optional preallocated output array shaped Nx3
+        :param inplace: if True the result is written to xyz array
         """
-        cdef:
-            int i, s = xyz.shape[0]
-            double[:, :] xyz_local = np.empty((s, 3), dtype=np.double)
-        with nogil:
-            for i in prange(0, s):
-                xyz_local[i, 0] = xyz[i, 0] - self.__origin[0]
-                xyz_local[i, 1] = xyz[i, 1] - self.__origin[1]
-                xyz_local[i, 2] = xyz[i, 2] - self.__origin[2]
-        xyz_local = self.__rotation.reciprocal().rotate(xyz_local)
-        return xyz_local
+        if _single_precision(xyz):
+            return __to_local[float](xyz, prepare_output[float](xyz, out, inplace), self.__matrix, self.__origin)
+        return __to_local[double](xyz, prepare_output[double](xyz, out, inplace), self.__matrix, self.__origin)
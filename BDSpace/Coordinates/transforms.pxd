@@ -1,21 +1,76 @@
+from libc.math cimport fmod, sin, cos, atan2, sqrt
+
+
+ctypedef fused real:
+    float
+    double
+
+
+cdef extern from 'math.h' nogil:
+    float sinf(float x)
+    float cosf(float x)
+    float atan2f(float y, float x)
+    float sqrtf(float x)
+    float fmodf(float x, float y)
+
+
+# Math functions of the precision of the argument, so that float32 transforms use single precision arithmetic
+cdef inline real __sin(real x) nogil:
+    if real is float:
+        return sinf(x)
+    else:
+        return sin(x)
+
+cdef inline real __cos(real x) nogil:
+    if real is float:
+        return cosf(x)
+    else:
+        return cos(x)
+
+cdef inline real __atan2(real y, real x) nogil:
+    if real is float:
+        return atan2f(y, x)
+    else:
+        return atan2(y, x)
+
+cdef inline real __sqrt(real x) nogil:
+    if real is float:
+        return sqrtf(x)
+    else:
+        return sqrt(x)
+
+cdef inline real __fmod(real x, real y) nogil:
+    if real is float:
+        return fmodf(x, y)
+    else:
+        return fmod(x, y)
+
+
+ctypedef struct Vector3:
+    double x
+    double y
+    double z
+
 cdef double __reduce_angle(double angle, bint center=*, bint positive=*) nogil
 cpdef reduce_angle(double angle, bint keep_sign=*)
-cpdef double[:] reduce_angles(double[:] euler_angles, bint keep_sign=*)
+cpdef double[:] reduce_angles(double[:] euler_angles, bint keep_sign=*, double[:] out=*, bint inplace=*)
 cpdef double vector_norm(double[:] v)
 cpdef double[:] unit_vector(double[:] v)
 cdef double[:] __extend_vector_dimensions(double[:] v, Py_ssize_t s)
+cdef real[:, :] prepare_output(real[:, :] xyz, real[:, :] out, bint inplace)
+cdef void affine_transform(double[:, :] xyz, double[:, :] m, double[:] t, double[:, :] result) nogil
 cpdef double angles_between_vectors(double[:] v1, double[:] v2)
 cpdef double[:] cartesian_to_spherical_point(double[:] xyz)
-cpdef double[:, :] cartesian_to_spherical(double[:, :] xyz)
+cpdef real[:, :] cartesian_to_spherical(real[:, :] xyz, real[:, :] out=*, bint inplace=*)
 cpdef double[:] spherical_to_cartesian_point(double[:] r_theta_phi)
-cpdef double[:, :] spherical_to_cartesian(double[:, :] r_theta_phi)
+cpdef real[:, :] spherical_to_cartesian(real[:, :] r_theta_phi, real[:, :] out=*, bint inplace=*)
 cpdef double[:] invert_spherical_point(double[:] r_theta_phi)
-cpdef double[:, :] invert_spherical(double[:, :] r_theta_phi)
+cpdef real[:, :] invert_spherical(real[:, :] r_theta_phi, real[:, :] out=*, bint inplace=*)
 cpdef double[:] cartesian_to_cylindrical_point(double[:] xyz)
-cpdef double[:, :] cartesian_to_cylindrical(double[:, :] xyz)
+cpdef real[:, :] cartesian_to_cylindrical(real[:, :] xyz, real[:, :] out=*, bint inplace=*)
 cpdef double[:] cylindrical_to_cartesian_point(double[:] rho_phi_z)
-cpdef double[:, :] cylindrical_to_cartesian(double[:, :] rho_phi_z)
+cpdef real[:, :] cylindrical_to_cartesian(real[:, :] rho_phi_z, real[:, :] out=*, bint inplace=*)
 cpdef double[:] spherical_to_cylindrical_point(double[:] r_theta_phi)
-cpdef double[:, :] spherical_to_cylindrical(double[:, :] r_theta_phi)
+cpdef real[:, :] spherical_to_cylindrical(real[:, :] r_theta_phi, real[:, :] out=*, bint inplace=*)
 cpdef double[:] cylindrical_to_spherical_point(double[:] rho_phi_z)
-cpdef double[:, :] cylindrical_to_spherical(double[:, :] rho_phi_z)
+cpdef real[:, :] cylindrical_to_spherical(real[:, :] rho_phi_z, real[:, :] out=*, bint inplace=*)
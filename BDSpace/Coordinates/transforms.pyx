@@ -38,12 +38,20 @@ cpdef reduce_angle(double angle, bint keep_sign=False):
 
 @boundscheck(False)
 @wraparound(False)
-cpdef double[:] reduce_angles(double[:] angles, bint keep_sign=False):
+cpdef double[:] reduce_angles(double[:] angles, bint keep_sign=False, double[:] out=None, bint inplace=False):
     cdef:
         int i
         Py_ssize_t s = angles.size
-        array[double] reduced_angles, template = array('d')
-    reduced_angles = clone(template, s, zero=False)
+        double[:] reduced_angles
+        array[double] template = array('d')
+    if inplace:
+        reduced_angles = angles
+    elif out is None:
+        reduced_angles = clone(template, s, zero=False)
+    elif out.shape[0] != s:
+        raise ValueError('out array must have the same size as input array')
+    else:
+        reduced_angles = out
     with nogil:
         for i in prange(s):
             reduced_angles[i] = __reduce_angle(angles[i], center=False, positive=not keep_sign)
@@ -100,6 +108,48 @@ cdef double[:] __extend_vector_dimensions(double[:] v, Py_ssize_t s):
     return result
 
 
+cdef real[:, :] prepare_output(real[:, :] xyz, real[:, :] out, bint inplace):
+    """
+    Selects output buffer for batched transforms of points array shaped Nx3
+    :param xyz: input array of points shaped Nx3
+    :param out: preallocated output array shaped Nx3 or None
+    :param inplace: if True xyz is used as output buffer
+    :return: output buffer
+    """
+    if inplace:
+        if xyz.shape[1] != 3:
+            raise ValueError('inplace transform requires input array shaped Nx3')
+        return xyz
+    if out is None:
+        return np.empty((xyz.shape[0], 3), dtype=np.float32 if real is float else np.double)
+    if out.shape[0] != xyz.shape[0] or out.shape[1] != 3:
+        raise ValueError('out array must be shaped Nx3 with N equal to the number of input points')
+    return out
+
+
+@boundscheck(False)
+@wraparound(False)
+cdef void affine_transform(double[:, :] xyz, double[:, :] m, double[:] t, double[:, :] result) nogil:
+    """
+    Applies affine transform xyz * m + t to every point (row) of xyz in one pass.
+    The result may be the same buffer as xyz.
+    :param xyz: array of points shaped Nx3
+    :param m: 3x3 transformation matrix
+    :param t: translation vector
+    :param result: output array shaped Nx3
+    """
+    cdef:
+        int i, s = xyz.shape[0]
+        double x, y, z
+    for i in prange(s):
+        x = xyz[i, 0]
+        y = xyz[i, 1]
+        z = xyz[i, 2]
+        result[i, 0] = x * m[0, 0] + y * m[1, 0] + z * m[2, 0] + t[0]
+        result[i, 1] = x * m[0, 1] + y * m[1, 1] + z * m[2, 1] + t[1]
+        result[i, 2] = x * m[0, 2] + y * m[1, 2] + z * m[2, 2] + t[2]
+
+
 @boundscheck(False)
 @wraparound(False)
 cpdef double angles_between_vectors(double[:] v1, double[:] v2):
@@ -139,12 +189,20 @@ cpdef double[:] cartesian_to_spherical_point(double[:] xyz):
 
 @boundscheck(False)
 @wraparound(False)
-cpdef double[:, :] cartesian_to_spherical(double[:, :] xyz):
+cpdef real[:, :] cartesian_to_spherical(real[:, :] xyz, real[:, :] out=None, bint inplace=False):
     cdef:
-        unsigned int i, s = xyz.shape[0]
-        double[:, :] r_theta_phi = np.empty((s, 3), dtype=np.double)
-    for i in range(s):
-        r_theta_phi[i] = cartesian_to_spherical_point(xyz[i])
+        int i, s = xyz.shape[0], d = xyz.shape[1]
+        real[:, :] r_theta_phi = prepare_output(xyz, out, inplace)
+        real x, y, z, xy
+    with nogil:
+        for i in prange(s):
+            x = xyz[i, 0]
+            y = xyz[i, 1] if d > 1 else 0.0
+            z = xyz[i, 2] if d > 2 else 0.0
+            xy = x * x + y * y
+            r_theta_phi[i, 0] = __sqrt(xy + z * z)
+            r_theta_phi[i, 1] = __atan2(__sqrt(xy), z)
+            r_theta_phi[i, 2] = <real> __reduce_angle(__atan2(y, x), center=False, positive=True)
     return r_theta_phi
 
 
@@ -168,12 +226,24 @@ cpdef double[:] spherical_to_cartesian_point(double[:] r_theta_phi):
 
 @boundscheck(False)
 @wraparound(False)
-cpdef double[:, :] spherical_to_cartesian(double[:, :] r_theta_phi):
+cpdef real[:, :] spherical_to_cartesian(real[:, :] r_theta_phi, real[:, :] out=None, bint inplace=False):
     cdef:
-        unsigned int i, s = r_theta_phi.shape[0]
-        double[:, :] xyz = np.empty((s, 3), dtype=np.double)
-    for i in range(s):
-        xyz[i] = spherical_to_cartesian_point(r_theta_phi[i])
+        int i, s = r_theta_phi.shape[0], d = r_theta_phi.shape[1]
+        real[:, :] xyz = prepare_output(r_theta_phi, out, inplace)
+        real r, theta, phi, xy
+    with nogil:
+        for i in prange(s):
+            r = r_theta_phi[i, 0]
+            theta = r_theta_phi[i, 1] if d > 1 else 0.0
+            phi = 0.0
+            if d > 2:
+                # reduced angle is stored back to the input array as spherical_to_cartesian_point does
+                phi = <real> __reduce_angle(r_theta_phi[i, 2], center=False, positive=True)
+                r_theta_phi[i, 2] = phi
+            xy = r * __sin(theta)
+            xyz[i, 0] = xy * __cos(phi)
+            xyz[i, 1] = xy * __sin(phi)
+            xyz[i, 2] = r * __cos(theta)
     return xyz
 
 
@@ -190,12 +260,19 @@ cpdef double[:] invert_spherical_point(double[:] r_theta_phi):
 
 @boundscheck(False)
 @wraparound(False)
-cpdef double[:, :] invert_spherical(double[:, :] r_theta_phi):
+cpdef real[:, :] invert_spherical(real[:, :] r_theta_phi, real[:, :] out=None, bint inplace=False):
     cdef:
         int i, s = r_theta_phi.shape[0]
-        double[:, :] rtp = np.empty((s, 3), dtype=np.double)
-    for i in range(s):
-        rtp[i] = invert_spherical_point(r_theta_phi[i])
+        real[:, :] rtp = prepare_output(r_theta_phi, out, inplace)
+        real r, theta, phi
+    with nogil:
+        for i in prange(s):
+            r = r_theta_phi[i, 0]
+            theta = r_theta_phi[i, 1]
+            phi = r_theta_phi[i, 2]
+            rtp[i, 0] = r
+            rtp[i, 1] = <real> M_PI - theta
+            rtp[i, 2] = __fmod(phi + <real> M_PI, <real> (2 * M_PI))
     return rtp
 
 
@@ -216,12 +293,19 @@ cpdef double[:] cartesian_to_cylindrical_point(double[:] xyz):
 
 @boundscheck(False)
 @wraparound(False)
-cpdef double[:, :] cartesian_to_cylindrical(double[:, :] xyz):
+cpdef real[:, :] cartesian_to_cylindrical(real[:, :] xyz, real[:, :] out=None, bint inplace=False):
     cdef:
-        unsigned int i, s = xyz.shape[0]
-        double[:, :] rho_phi_z = np.empty((s, 3), dtype=np.double)
-    for i in range(s):
-        rho_phi_z[i] = cartesian_to_cylindrical_point(xyz[i])
+        int i, s = xyz.shape[0], d = xyz.shape[1]
+        real[:, :] rho_phi_z = prepare_output(xyz, out, inplace)
+        real x, y, z
+    with nogil:
+        for i in prange(s):
+            x = xyz[i, 0]
+            y = xyz[i, 1] if d > 1 else 0.0
+            z = xyz[i, 2] if d > 2 else 0.0
+            rho_phi_z[i, 0] = __sqrt(x * x + y * y)
+            rho_phi_z[i, 1] = __atan2(y, x)
+            rho_phi_z[i, 2] = z
     return rho_phi_z
 
 
@@ -243,12 +327,23 @@ cpdef double[:] cylindrical_to_cartesian_point(double[:] rho_phi_z):
 
 @boundscheck(False)
 @wraparound(False)
-cpdef double[:, :] cylindrical_to_cartesian(double[:, :] rho_phi_z):
+cpdef real[:, :] cylindrical_to_cartesian(real[:, :] rho_phi_z, real[:, :] out=None, bint inplace=False):
     cdef:
-        unsigned int i, s = rho_phi_z.shape[0]
-        double[:, :] xyz = np.empty((s, 3), dtype=np.double)
-    for i in range(s):
-        xyz[i] = cylindrical_to_cartesian_point(rho_phi_z[i])
+        int i, s = rho_phi_z.shape[0], d = rho_phi_z.shape[1]
+        real[:, :] xyz = prepare_output(rho_phi_z, out, inplace)
+        real rho, phi, z
+    with nogil:
+        for i in prange(s):
+            rho = rho_phi_z[i, 0]
+            phi = 0.0
+            if d > 1:
+                # reduced angle is stored back to the input array as cylindrical_to_cartesian_point does
+                phi = <real> __reduce_angle(rho_phi_z[i, 1], center=False, positive=True)
+                rho_phi_z[i, 1] = phi
+            z = rho_phi_z[i, 2] if d > 2 else 0.0
+            xyz[i, 0] = rho * __cos(phi)
+            xyz[i, 1] = rho * __sin(phi)
+            xyz[i, 2] = z
     return xyz
 
 
@@ -269,12 +364,19 @@ cpdef double[:] spherical_to_cylindrical_point(double[:] r_theta_phi):
 
 @boundscheck(False)
 @wraparound(False)
-cpdef double[:, :] spherical_to_cylindrical(double[:, :] r_theta_phi):
+cpdef real[:, :] spherical_to_cylindrical(real[:, :] r_theta_phi, real[:, :] out=None, bint inplace=False):
     cdef:
-        unsigned int i, s = r_theta_phi.shape[0]
-        double[:, :] rho_phi_z = np.empty((s, 3), dtype=np.double)
-    for i in range(s):
-        rho_phi_z[i] = spherical_to_cylindrical_point(r_theta_phi[i])
+        int i, s = r_theta_phi.shape[0], d = r_theta_phi.shape[1]
+        real[:, :] rho_phi_z = prepare_output(r_theta_phi, out, inplace)
+        real r, theta, phi
+    with nogil:
+        for i in prange(s):
+            r = r_theta_phi[i, 0]
+            theta = r_theta_phi[i, 1] if d > 1 else 0.0
+            phi = r_theta_phi[i, 2] if d > 2 else 0.0
+            rho_phi_z[i, 0] = r * __sin(theta)
+            rho_phi_z[i, 1] = phi
+            rho_phi_z[i, 2] = r * __cos(theta)
     return rho_phi_z
 
 
@@ -295,10 +397,17 @@ cpdef double[:] cylindrical_to_spherical_point(double[:] rho_phi_z):
 
 @boundscheck(False)
 @wraparound(False)
-cpdef double[:, :] cylindrical_to_spherical(double[:, :] rho_phi_z):
+cpdef real[:, :] cylindrical_to_spherical(real[:, :] rho_phi_z, real[:, :] out=None, bint inplace=False):
     cdef:
-        unsigned int i, s = rho_phi_z.shape[0]
-        r_theta_phi = np.empty((s, 3), dtype=np.double)
-    for i in range(s):
-        r_theta_phi[i] = cylindrical_to_spherical_point(rho_phi_z[i])
+        int i, s = rho_phi_z.shape[0], d = rho_phi_z.shape[1]
+        real[:, :] r_theta_phi = prepare_output(rho_phi_z, out, inplace)
+        real rho, phi, z
+    with nogil:
+        for i in prange(s):
+            rho = rho_phi_z[i, 0]
+            phi = rho_phi_z[i, 1] if d > 1 else 0.0
+            z = rho_phi_z[i, 2] if d > 2 else 0.0
+            r_theta_phi[i, 0] = __sqrt(rho * rho + z * z)
+            r_theta_phi[i, 1] = __atan2(rho, z)
+            r_theta_phi[i, 2] = phi
     return r_theta_phi
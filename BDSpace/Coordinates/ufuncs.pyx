@@ -0,0 +1,156 @@
+"""
+Coordinate transforms as NumPy generalized ufuncs with signature (3)->(3).
+The ufuncs broadcast over arbitrary leading dimensions (e.g. HxWx3 grids), accept strided arrays without copying,
+support out= argument and return ndarrays. Unlike the functions of transforms module the input is never modified.
+Single (float32) and double precision loops are provided, float32 input gives float32 output
+computed with single precision arithmetic (relative error of about 1e-7, angles are reduced in double precision).
+"""
+cimport numpy as np
+from libc.math cimport M_PI
+
+from .transforms cimport real, __reduce_angle, __sin, __cos, __atan2, __sqrt, __fmod
+
+
+np.import_array()
+np.import_ufunc()
+
+
+ctypedef void (*point_transform)(double a, double b, double c, double* result) nogil
+ctypedef void (*point_transform_float)(float a, float b, float c, float* result) nogil
+
+
+cdef void __cartesian_to_spherical(real x, real y, real z, real* result) nogil:
+    cdef:
+        real xy = x * x + y * y
+    result[0] = __sqrt(xy + z * z)
+    result[1] = __atan2(__sqrt(xy), z)
+    result[2] = <real> __reduce_angle(__atan2(y, x), center=False, positive=True)
+
+
+cdef void __spherical_to_cartesian(real r, real theta, real phi, real* result) nogil:
+    cdef:
+        real xy = r * __sin(theta)
+    phi = <real> __reduce_angle(phi, center=False, positive=True)
+    result[0] = xy * __cos(phi)
+    result[1] = xy * __sin(phi)
+    result[2] = r * __cos(theta)
+
+
+cdef void __invert_spherical(real r, real theta, real phi, real* result) nogil:
+    result[0] = r
+    result[1] = <real> M_PI - theta
+    result[2] = __fmod(phi + <real> M_PI, <real> (2 * M_PI))
+
+
+cdef void __cartesian_to_cylindrical(real x, real y, real z, real* result) nogil:
+    result[0] = __sqrt(x * x + y * y)
+    result[1] = __atan2(y, x)
+    result[2] = z
+
+
+cdef void __cylindrical_to_cartesian(real rho, real phi, real z, real* result) nogil:
+    phi = <real> __reduce_angle(phi, center=False, positive=True)
+    result[0] = rho * __cos(phi)
+    result[1] = rho * __sin(phi)
+    result[2] = z
+
+
+cdef void __spherical_to_cylindrical(real r, real theta, real phi, real* result) nogil:
+    result[0] = r * __sin(theta)
+    result[1] = phi
+    result[2] = r * __cos(theta)
+
+
+cdef void __cylindrical_to_spherical(real rho, real phi, real z, real* result) nogil:
+    result[0] = __sqrt(rho * rho + z * z)
+    result[1] = __atan2(rho, z)
+    result[2] = phi
+
+
+cdef void __double_loop(char** args, const np.npy_intp* dimensions, const np.npy_intp* steps, void* data) nogil:
+    """
+    Inner loop of (3)->(3) gufunc for double precision arrays.
+    dimensions[0] is the number of points, steps[0], steps[1] are outer strides of input and output,
+    steps[2], steps[3] are strides of the input and output core dimension.
+    """
+    cdef:
+        np.npy_intp i, n = dimensions[0]
+        char* xyz = args[0]
+        char* out = args[1]
+        double result[3]
+        point_transform transform = <point_transform>data
+    for i in range(n):
+        transform((<double*>xyz)[0], (<double*>(xyz + steps[2]))[0], (<double*>(xyz + 2 * steps[2]))[0], result)
+        (<double*>out)[0] = result[0]
+        (<double*>(out + steps[3]))[0] = result[1]
+        (<double*>(out + 2 * steps[3]))[0] = result[2]
+        xyz += steps[0]
+        out += steps[1]
+
+
+cdef void __float_loop(char** args, const np.npy_intp* dimensions, const np.npy_intp* steps, void* data) nogil:
+    """
+    Inner loop of (3)->(3) gufunc for single precision arrays, see __double_loop.
+    """
+    cdef:
+        np.npy_intp i, n = dimensions[0]
+        char* xyz = args[0]
+        char* out = args[1]
+        float result[3]
+        point_transform_float transform = <point_transform_float>data
+    for i in range(n):
+        transform((<float*>xyz)[0], (<float*>(xyz + steps[2]))[0], (<float*>(xyz + 2 * steps[2]))[0], result)
+        (<float*>out)[0] = result[0]
+        (<float*>(out + steps[3]))[0] = result[1]
+        (<float*>(out + 2 * steps[3]))[0] = result[2]
+        xyz += steps[0]
+        out += steps[1]
+
+
+# float loop goes first, so that only float32 input resolves to it
+cdef np.PyUFuncGenericFunction __loops[2]
+cdef char __types[4]
+cdef void* __data[7][2]
+
+__loops[0] = __float_loop
+__loops[1] = __double_loop
+__types[0] = np.NPY_FLOAT
+__types[1] = np.NPY_FLOAT
+__types[2] = np.NPY_DOUBLE
+__types[3] = np.NPY_DOUBLE
+
+
+cdef object __make_gufunc(int index, point_transform_float transform_float, point_transform transform,
+                          bytes name, bytes doc):
+    __data[index][0] = <void*>transform_float
+    __data[index][1] = <void*>transform
+    return np.PyUFunc_FromFuncAndDataAndSignature(__loops, __data[index], __types, 2, 1, 1, np.PyUFunc_None,
+                                                  name, doc, 0, b'(3)->(3)')
+
+
+__names = [b'cartesian_to_spherical', b'spherical_to_cartesian', b'invert_spherical',
+           b'cartesian_to_cylindrical', b'cylindrical_to_cartesian',
+           b'spherical_to_cylindrical', b'cylindrical_to_spherical']
+# names and docs must stay alive as long as the ufuncs
+__docs = [b'Converts cartesian coordinates (..., 3) to spherical coordinates (r, theta, phi).',
+          b'Converts spherical coordinates (r, theta, phi) (..., 3) to cartesian coordinates.',
+          b'Inverts direction of vectors given in spherical coordinates (r, theta, phi) (..., 3).',
+          b'Converts cartesian coordinates (..., 3) to cylindrical coordinates (rho, phi, z).',
+          b'Converts cylindrical coordinates (rho, phi, z) (..., 3) to cartesian coordinates.',
+          b'Converts spherical coordinates (r, theta, phi) (..., 3) to cylindrical coordinates (rho, phi, z).',
+          b'Converts cylindrical coordinates (rho, phi, z) (..., 3) to spherical coordinates (r, theta, phi).']
+
+cartesian_to_spherical = __make_gufunc(0, __cartesian_to_spherical[float], __cartesian_to_spherical[double],
+                                       __names[0], __docs[0])
+spherical_to_cartesian = __make_gufunc(1, __spherical_to_cartesian[float], __spherical_to_cartesian[double],
+                                       __names[1], __docs[1])
+invert_spherical = __make_gufunc(2, __invert_spherical[float], __invert_spherical[double],
+                                 __names[2], __docs[2])
+cartesian_to_cylindrical = __make_gufunc(3, __cartesian_to_cylindrical[float], __cartesian_to_cylindrical[double],
+                                         __names[3], __docs[3])
+cylindrical_to_cartesian = __make_gufunc(4, __cylindrical_to_cartesian[float], __cylindrical_to_cartesian[double],
+                                         __names[4], __docs[4])
+spherical_to_cylindrical = __make_gufunc(5, __spherical_to_cylindrical[float], __spherical_to_cylindrical[double],
+                                         __names[5], __docs[5])
+cylindrical_to_spherical = __make_gufunc(6, __cylindrical_to_spherical[float], __cylindrical_to_spherical[double],
+                                         __names[6], __docs[6])
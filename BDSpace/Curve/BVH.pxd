@@ -0,0 +1,34 @@
+from BDSpace.Coordinates.transforms cimport Vector3
+
+
+cdef class CurveBVH(object):
+    cdef:
+        list __curves
+        int __leaf_size
+        list __curve_state
+        list __curve_positions
+        double[:, :, :] __curve_basis
+        double[:, :, :] __curve_inverse
+        double[:, :] __curve_origin
+        double[:, :] __segment_a
+        double[:, :] __segment_b
+        double[:] __segment_margin
+        int[:] __segment_curve
+        int[:] __segment_index
+        int[:] __node_start
+        int[:] __node_count
+        int[:] __node_child
+        double[:, :] __node_lower
+        double[:, :] __node_upper
+
+    cdef tuple __sample_curve(self, int c)
+    cdef void __build(self) except *
+    cdef void __refit(self) nogil
+    cpdef void update(self) except *
+    cdef double __box_distance(self, int node, double x, double y, double z) nogil
+    cdef int __nearest_candidates(self, double x, double y, double z, int* segments, double* u) nogil
+    cdef double __polish(self, int c, double t, double x, double y, double z, Vector3* foot)
+    cdef double __segment_t(self, int segment, double u)
+    cpdef tuple nearest(self, double[:, :] xyz)
+    cpdef list proximity(self, double[:] xyz, double distance)
+    cpdef list intersect_ray(self, double[:] origin, double[:] direction, double radius)
@@ -0,0 +1,593 @@
+import numpy as np
+from operator import itemgetter
+
+from cython import boundscheck, wraparound
+from cython.parallel import prange
+
+from libc.math cimport sqrt, fabs
+from libc.float cimport DBL_MAX
+
+from BDSpace.Space cimport Space
+from BDSpace.Coordinates.Cartesian cimport Cartesian
+from BDSpace.Coordinates.transforms cimport Vector3
+from .Parametric cimport ParametricCurve
+
+
+# Traversal stack size, every level of the binary tree pushes at most two nodes
+DEF STACK_SIZE = 256
+# Number of chords kept as seeds of the exact nearest point search
+DEF MAX_CANDIDATES = 8
+
+cdef Vector3 _zero_vector
+_zero_vector.x = _zero_vector.y = _zero_vector.z = 0.0
+
+
+@boundscheck(False)
+@wraparound(False)
+cdef inline double _segment_distance(double x, double y, double z, double[:, :] a, double[:, :] b, int i,
+                                     double* u) nogil:
+    """
+    Distance from point (x, y, z) to segment i from a[i] to b[i], fraction of the foot point is stored to u
+    """
+    cdef:
+        double ex = b[i, 0] - a[i, 0], ey = b[i, 1] - a[i, 1], ez = b[i, 2] - a[i, 2]
+        double dx = x - a[i, 0], dy = y - a[i, 1], dz = z - a[i, 2]
+        double l2 = ex * ex + ey * ey + ez * ez, v = 0.0
+    if l2 > 0:
+        v = min(max((dx * ex + dy * ey + dz * ez) / l2, 0.0), 1.0)
+    dx -= v * ex
+    dy -= v * ey
+    dz -= v * ez
+    u[0] = v
+    return sqrt(dx * dx + dy * dy + dz * dz)
+
+
+@boundscheck(False)
+@wraparound(False)
+cdef inline double _ray_segment_distance(double[:] o, double[:] d, double[:, :] a, double[:, :] b, int i,
+                                         double* s, double* u) nogil:
+    """
+    Distance between the ray o + s * d (s >= 0, |d| = 1) and segment i from a[i] to b[i].
+    Ray parameter and segment fraction of the closest approach are stored to s and u.
+    """
+    cdef:
+        double ex = b[i, 0] - a[i, 0], ey = b[i, 1] - a[i, 1], ez = b[i, 2] - a[i, 2]
+        double wx = a[i, 0] - o[0], wy = a[i, 1] - o[1], wz = a[i, 2] - o[2]
+        double be = d[0] * ex + d[1] * ey + d[2] * ez, c = ex * ex + ey * ey + ez * ez
+        double dw = d[0] * wx + d[1] * wy + d[2] * wz, ew = ex * wx + ey * wy + ez * wz
+        double denominator = c - be * be, v = 0.0, r, dx, dy, dz
+    if denominator > 1.0e-14 * c:
+        v = min(max((dw * be - ew) / denominator, 0.0), 1.0)
+    r = v * be + dw
+    if r < 0:
+        r = 0.0
+        if c > 0:
+            v = min(max(-ew / c, 0.0), 1.0)
+    dx = wx + v * ex - r * d[0]
+    dy = wy + v * ey - r * d[1]
+    dz = wz + v * ez - r * d[2]
+    s[0] = r
+    u[0] = v
+    return sqrt(dx * dx + dy * dy + dz * dz)
+
+
+@boundscheck(False)
+@wraparound(False)
+cdef inline int _locate(double[:] t, double value, double* u) nogil:
+    """
+    Finds interval of sorted nodes t containing value, fraction of value in the interval is stored to u
+    """
+    cdef:
+        int lo = 0, hi = t.shape[0] - 1, mid
+    while hi - lo > 1:
+        mid = (lo + hi) // 2
+        if t[mid] <= value:
+            lo = mid
+        else:
+            hi = mid
+    u[0] = 0.0
+    if t[hi] > t[lo]:
+        u[0] = min(max((value - t[lo]) / (t[hi] - t[lo]), 0.0), 1.0)
+    return lo
+
+
+def _collect_curves(Space space):
+    curves = [space] if isinstance(space, ParametricCurve) else []
+    for element in space.elements.values():
+        curves += _collect_curves(element)
+    return curves
+
+
+cdef class CurveBVH(object):
+    """
+    Bounding volume hierarchy over chords of adaptively refined parametric curves in global coordinates.
+    Every chord carries a margin (twice the deviation of the curve from the chord midpoint) so the boxes
+    enclose the curves and not only their polylines. Chords found by the tree are used as seeds of the exact
+    search on the curves (see ParametricCurve.closest_points).
+    Before every query the hierarchy is updated: chords of the curves which moved are transformed
+    and the boxes are refitted bottom-up, the tree is rebuilt only when the number of chords of a curve changes.
+    """
+
+    def __init__(self, curves, int leaf_size=4):
+        if isinstance(curves, Space):
+            curves = _collect_curves(curves)
+        self.__curves = list(curves)
+        for curve in self.__curves:
+            if not isinstance(curve, ParametricCurve):
+                raise ValueError('Curves must be iterable of ParametricCurve instances')
+        if leaf_size < 1:
+            raise ValueError('leaf_size must be positive')
+        self.__leaf_size = leaf_size
+        self.__build()
+
+    @property
+    def curves(self):
+        return self.__curves
+
+    @property
+    def size(self):
+        return self.__segment_a.shape[0]
+
+    @property
+    def nodes(self):
+        return self.__node_start.shape[0]
+
+    @property
+    def segments(self):
+        """
+        Chords of the curves as a tuple of arrays (start points, end points, margins, curve indices)
+        in the order of the tree leaves
+        """
+        self.update()
+        return (np.asarray(self.__segment_a), np.asarray(self.__segment_b),
+                np.asarray(self.__segment_margin), np.asarray(self.__segment_curve))
+
+    cdef tuple __sample_curve(self, int c):
+        """
+        Calculates global coordinates and margins of the chords of curve c and caches its global basis
+        """
+        cdef:
+            ParametricCurve curve = self.__curves[c]
+            Cartesian basis = curve.__global_basis()
+        margin = np.asarray(curve.__chord_margin())
+        xyz = np.asarray(curve.__refine_xyz)
+        global_xyz = np.asarray(curve.to_global_coordinate_system(xyz))
+        np.asarray(self.__curve_basis)[c] = basis.basis
+        np.asarray(self.__curve_inverse)[c] = np.linalg.inv(np.asarray(basis.basis))
+        np.asarray(self.__curve_origin)[c] = basis.origin
+        self.__curve_state[c] = (curve.__generation, curve.__global_generation)
+        return global_xyz[:-1], global_xyz[1:], margin
+
+    cdef void __build(self) except *:
+        cdef:
+            int c, node, start, count, half, n = len(self.__curves)
+        self.__curve_state = [None] * n
+        self.__curve_basis = np.empty((n, 3, 3), dtype=np.double)
+        self.__curve_inverse = np.empty((n, 3, 3), dtype=np.double)
+        self.__curve_origin = np.empty((n, 3), dtype=np.double)
+        a, b, margin, curve_index, segment_index = [], [], [], [], []
+        for c in range(n):
+            segments = self.__sample_curve(c)
+            a.append(segments[0])
+            b.append(segments[1])
+            margin.append(segments[2])
+            curve_index.append(np.full(segments[2].shape[0], c, dtype=np.intc))
+            segment_index.append(np.arange(segments[2].shape[0], dtype=np.intc))
+        a = np.concatenate(a) if n > 0 else np.empty((0, 3), dtype=np.double)
+        b = np.concatenate(b) if n > 0 else np.empty((0, 3), dtype=np.double)
+        margin = np.concatenate(margin) if n > 0 else np.empty(0, dtype=np.double)
+        curve_index = np.concatenate(curve_index) if n > 0 else np.empty(0, dtype=np.intc)
+        segment_index = np.concatenate(segment_index) if n > 0 else np.empty(0, dtype=np.intc)
+        centers = (a + b) / 2
+        permutation = np.arange(a.shape[0])
+        starts, counts, children = [0], [a.shape[0]], [0]
+        node = 0
+        while node < len(starts):
+            start = starts[node]
+            count = counts[node]
+            if count > self.__leaf_size:
+                index = permutation[start:start + count]
+                spread = np.ptp(centers[index], axis=0)
+                order = np.argsort(centers[index, np.argmax(spread)], kind='stable')
+                permutation[start:start + count] = index[order]
+                half = count // 2
+                children[node] = len(starts)
+                starts += [start, start + half]
+                counts += [half, count - half]
+                children += [0, 0]
+            node += 1
+        self.__segment_a = np.ascontiguousarray(a[permutation])
+        self.__segment_b = np.ascontiguousarray(b[permutation])
+        self.__segment_margin = margin[permutation]
+        self.__segment_curve = curve_index[permutation]
+        self.__segment_index = segment_index[permutation]
+        # positions of the chords of every curve in the order of chords along the curve
+        order = np.lexsort((segment_index[permutation], curve_index[permutation]))
+        self.__curve_positions = np.split(order, np.cumsum(np.bincount(curve_index, minlength=n))[:-1])
+        self.__node_start = np.array(starts, dtype=np.intc)
+        self.__node_count = np.array(counts, dtype=np.intc)
+        self.__node_child = np.array(children, dtype=np.intc)
+        self.__node_lower = np.empty((len(starts), 3), dtype=np.double)
+        self.__node_upper = np.empty((len(starts), 3), dtype=np.double)
+        with nogil:
+            self.__refit()
+
+    @boundscheck(False)
+    @wraparound(False)
+    cdef void __refit(self) nogil:
+        """
+        Recalculates boxes of the nodes bottom-up, children are always stored after their parents
+        """
+        cdef:
+            int node, i, j, child
+        for node in range(self.__node_start.shape[0] - 1, -1, -1):
+            child = self.__node_child[node]
+            for j in range(3):
+                self.__node_lower[node, j] = DBL_MAX
+                self.__node_upper[node, j] = -DBL_MAX
+            if child > 0:
+                for j in range(3):
+                    self.__node_lower[node, j] = min(self.__node_lower[child, j], self.__node_lower[child + 1, j])
+                    self.__node_upper[node, j] = max(self.__node_upper[child, j], self.__node_upper[child + 1, j])
+            else:
+                for i in range(self.__node_start[node], self.__node_start[node] + self.__node_count[node]):
+                    for j in range(3):
+                        self.__node_lower[node, j] = min(self.__node_lower[node, j],
+                                                         min(self.__segment_a[i, j], self.__segment_b[i, j])
+                                                         - self.__segment_margin[i])
+                        self.__node_upper[node, j] = max(self.__node_upper[node, j],
+                                                         max(self.__segment_a[i, j], self.__segment_b[i, j])
+                                                         + self.__segment_margin[i])
+
+    cpdef void update(self) except *:
+        """
+        Updates chords of the curves which moved or changed their shape since the last update.
+        Boxes are refitted if the number of chords of every curve is the same, otherwise the tree is rebuilt.
+        """
+        cdef:
+            int c
+            bint changed = False
+            ParametricCurve curve
+        for c in range(len(self.__curves)):
+            curve = self.__curves[c]
+            curve.__global_basis()
+            if self.__curve_state[c] == (curve.__generation, curve.__global_generation):
+                continue
+            a, b, margin = self.__sample_curve(c)
+            positions = self.__curve_positions[c]
+            if margin.shape[0] != positions.shape[0]:
+                self.__build()
+                return
+            np.asarray(self.__segment_a)[positions] = a
+            np.asarray(self.__segment_b)[positions] = b
+            np.asarray(self.__segment_margin)[positions] = margin
+            changed = True
+        if changed:
+            with nogil:
+                self.__refit()
+
+    def rebuild(self):
+        """
+        Rebuilds the tree from scratch, e.g. to restore its quality after large movements of the curves
+        """
+        self.__build()
+
+    @boundscheck(False)
+    @wraparound(False)
+    cdef double __box_distance(self, int node, double x, double y, double z) nogil:
+        cdef:
+            double dx = 0.0, dy = 0.0, dz = 0.0
+        if x < self.__node_lower[node, 0]:
+            dx = self.__node_lower[node, 0] - x
+        elif x > self.__node_upper[node, 0]:
+            dx = x - self.__node_upper[node, 0]
+        if y < self.__node_lower[node, 1]:
+            dy = self.__node_lower[node, 1] - y
+        elif y > self.__node_upper[node, 1]:
+            dy = y - self.__node_upper[node, 1]
+        if z < self.__node_lower[node, 2]:
+            dz = self.__node_lower[node, 2] - z
+        elif z > self.__node_upper[node, 2]:
+            dz = z - self.__node_upper[node, 2]
+        return sqrt(dx * dx + dy * dy + dz * dz)
+
+    @boundscheck(False)
+    @wraparound(False)
+    cdef int __nearest_candidates(self, double x, double y, double z, int* segments, double* u) nogil:
+        """
+        Branch and bound search of the chords which may hold the curve point closest to (x, y, z).
+        Distance to a curve is bounded by the chord distance plus-minus the chord margin, chords with
+        lower bound below the smallest upper bound are stored to segments and u (fraction of the foot point
+        on the chord) sorted by the lower bound. Returns the number of stored chords (at most MAX_CANDIDATES).
+        """
+        cdef:
+            int stack[STACK_SIZE]
+            int top = 0, node, child, near, i, j, n = 0
+            double lower[MAX_CANDIDATES]
+            double best = DBL_MAX, d, v, bound
+        if self.__segment_a.shape[0] == 0:
+            return 0
+        stack[0] = 0
+        while top >= 0:
+            node = stack[top]
+            top -= 1
+            if self.__box_distance(node, x, y, z) > best:
+                continue
+            child = self.__node_child[node]
+            if child > 0:
+                near = child
+                if self.__box_distance(child, x, y, z) > self.__box_distance(child + 1, x, y, z):
+                    near = child + 1
+                top += 1
+                stack[top] = 2 * child + 1 - near
+                top += 1
+                stack[top] = near
+                continue
+            for i in range(self.__node_start[node], self.__node_start[node] + self.__node_count[node]):
+                d = _segment_distance(x, y, z, self.__segment_a, self.__segment_b, i, &v)
+                if d + self.__segment_margin[i] < best:
+                    best = d + self.__segment_margin[i]
+                bound = d - self.__segment_margin[i]
+                if bound > best or (n == MAX_CANDIDATES and bound >= lower[n - 1]):
+                    continue
+                if n < MAX_CANDIDATES:
+                    n += 1
+                j = n - 1
+                while j > 0 and lower[j - 1] > bound:
+                    lower[j] = lower[j - 1]
+                    segments[j] = segments[j - 1]
+                    u[j] = u[j - 1]
+                    j -= 1
+                lower[j] = bound
+                segments[j] = i
+                u[j] = v
+        while n > 1 and lower[n - 1] > best:
+            n -= 1
+        return n
+
+    cdef double __polish(self, int c, double t, double x, double y, double z, Vector3* foot):
+        """
+        Finds the point of curve c closest to the global point (x, y, z) in the vicinity of the curve parameter t.
+        Returns the curve parameter and stores the global coordinates of the point to foot.
+        """
+        cdef:
+            int j, segment
+            double u
+            double[3] local
+            ParametricCurve curve = self.__curves[c]
+            Vector3 point
+        for j in range(3):
+            local[j] = (x - self.__curve_origin[c, 0]) * self.__curve_inverse[c, 0, j] \
+                + (y - self.__curve_origin[c, 1]) * self.__curve_inverse[c, 1, j] \
+                + (z - self.__curve_origin[c, 2]) * self.__curve_inverse[c, 2, j]
+        segment = _locate(curve.__refine_t, t, &u)
+        t = curve.__closest_point_near(local[0], local[1], local[2], segment, u, &point)
+        foot.x = point.x * self.__curve_basis[c, 0, 0] + point.y * self.__curve_basis[c, 1, 0] \
+            + point.z * self.__curve_basis[c, 2, 0] + self.__curve_origin[c, 0]
+        foot.y = point.x * self.__curve_basis[c, 0, 1] + point.y * self.__curve_basis[c, 1, 1] \
+            + point.z * self.__curve_basis[c, 2, 1] + self.__curve_origin[c, 1]
+        foot.z = point.x * self.__curve_basis[c, 0, 2] + point.y * self.__curve_basis[c, 1, 2] \
+            + point.z * self.__curve_basis[c, 2, 2] + self.__curve_origin[c, 2]
+        return t
+
+    cdef double __segment_t(self, int segment, double u):
+        """
+        Curve parameter of the point at fraction u of the chord
+        """
+        cdef:
+            ParametricCurve curve = self.__curves[self.__segment_curve[segment]]
+            int j = self.__segment_index[segment]
+        return curve.__refine_t[j] + u * (curve.__refine_t[j + 1] - curve.__refine_t[j])
+
+    @boundscheck(False)
+    @wraparound(False)
+    cpdef tuple nearest(self, double[:, :] xyz):
+        """
+        Finds the nearest curve and the closest point on it for an array of points
+        :param xyz: array of N points in global coordinates with shape (N, 3)
+        :return: tuple of arrays of curve indices in curves list (-1 if there are no curves),
+            curve parameter, closest points in global coordinates and distances
+        """
+        cdef:
+            int i, k, m, s = xyz.shape[0]
+            int[:, ::1] candidates = np.full((s, MAX_CANDIDATES), -1, dtype=np.intc)
+            double[:, ::1] fractions = np.zeros((s, MAX_CANDIDATES), dtype=np.double)
+            int[:] segments
+            double[:] u, t
+            double[:, :] local, feet
+            ParametricCurve curve
+            Vector3 foot
+        self.update()
+        with nogil:
+            for i in prange(s):
+                self.__nearest_candidates(xyz[i, 0], xyz[i, 1], xyz[i, 2], &candidates[i, 0], &fractions[i, 0])
+        candidates_t = np.zeros((s, MAX_CANDIDATES), dtype=np.double)
+        candidates_feet = np.zeros((s, MAX_CANDIDATES, 3), dtype=np.double)
+        candidates_distance = np.full((s, MAX_CANDIDATES), np.inf)
+        valid = np.asarray(candidates) >= 0
+        curve_index = np.full((s, MAX_CANDIDATES), -1, dtype=np.intc)
+        curve_index[valid] = np.asarray(self.__segment_curve)[np.asarray(candidates)[valid]]
+        points = np.asarray(xyz)
+        # curves are polished one by one to call their nogil kernels in parallel
+        for c in np.unique(curve_index[valid]):
+            rows, columns = np.nonzero(curve_index == c)
+            m = rows.shape[0]
+            curve = self.__curves[c]
+            local = np.dot(points[rows] - self.__curve_origin[c], self.__curve_inverse[c])
+            segments = np.asarray(self.__segment_index)[np.asarray(candidates)[rows, columns]]
+            u = np.asarray(fractions)[rows, columns]
+            t = np.empty(m, dtype=np.double)
+            feet = np.empty((m, 3), dtype=np.double)
+            with nogil:
+                for k in prange(m):
+                    # assignment makes foot private to the thread
+                    foot = _zero_vector
+                    t[k] = curve.__closest_point_near(local[k, 0], local[k, 1], local[k, 2],
+                                                      segments[k], u[k], &foot)
+                    feet[k, 0] = foot.x
+                    feet[k, 1] = foot.y
+                    feet[k, 2] = foot.z
+            global_feet = np.dot(feet, self.__curve_basis[c]) + self.__curve_origin[c]
+            candidates_t[rows, columns] = t
+            candidates_feet[rows, columns] = global_feet
+            candidates_distance[rows, columns] = np.linalg.norm(global_feet - points[rows], axis=1)
+        best = np.argmin(candidates_distance, axis=1)
+        rows = np.arange(s)
+        return (curve_index[rows, best], candidates_t[rows, best], candidates_feet[rows, best],
+                candidates_distance[rows, best])
+
+    @boundscheck(False)
+    @wraparound(False)
+    cpdef list proximity(self, double[:] xyz, double distance):
+        """
+        Finds the curves passing within given distance of the point
+        :param xyz: point in global coordinates
+        :param distance: distance from the point
+        :return: list of curves in the order of curves list
+        """
+        cdef:
+            int stack[STACK_SIZE]
+            int top = 0, node, child, i, c
+            double d, v
+            Vector3 foot
+        self.update()
+        found = set()
+        candidates = {}
+        if self.__segment_a.shape[0] > 0:
+            stack[0] = 0
+            while top >= 0:
+                node = stack[top]
+                top -= 1
+                if self.__box_distance(node, xyz[0], xyz[1], xyz[2]) > distance:
+                    continue
+                child = self.__node_child[node]
+                if child > 0:
+                    top += 1
+                    stack[top] = child
+                    top += 1
+                    stack[top] = child + 1
+                    continue
+                for i in range(self.__node_start[node], self.__node_start[node] + self.__node_count[node]):
+                    c = self.__segment_curve[i]
+                    if c in found:
+                        continue
+                    d = _segment_distance(xyz[0], xyz[1], xyz[2], self.__segment_a, self.__segment_b, i, &v)
+                    if d + self.__segment_margin[i] <= distance:
+                        found.add(c)
+                    elif d - self.__segment_margin[i] <= distance:
+                        candidates.setdefault(c, []).append((i, v))
+        for c in candidates:
+            if c in found:
+                continue
+            for i, v in candidates[c]:
+                self.__polish(c, self.__segment_t(i, v), xyz[0], xyz[1], xyz[2], &foot)
+                if (foot.x - xyz[0]) ** 2 + (foot.y - xyz[1]) ** 2 + (foot.z - xyz[2]) ** 2 <= distance * distance:
+                    found.add(c)
+                    break
+        return [self.__curves[c] for c in sorted(found)]
+
+    @boundscheck(False)
+    @wraparound(False)
+    cpdef list intersect_ray(self, double[:] origin, double[:] direction, double radius):
+        """
+        Finds the curves crossing the tube of given radius around the ray
+        :param origin: origin of the ray in global coordinates
+        :param direction: direction of the ray
+        :param radius: radius of the tube around the ray
+        :return: list of tuples (ray parameter, curve, curve parameter, distance) of the closest approaches
+            sorted by the ray parameter (distance from the ray origin)
+        """
+        cdef:
+            int stack[STACK_SIZE]
+            int top = 0, node, child, i, j
+            double s, s_max, t, d, v, lo, hi
+            bint interior
+            double[:] unit = np.array(direction, dtype=np.double)
+            ParametricCurve curve
+            Vector3 foot, local_origin, local_direction
+        norm = np.linalg.norm(unit)
+        if norm == 0:
+            raise ValueError('Ray direction must be a non-zero vector')
+        unit = np.asarray(unit) / norm
+        self.update()
+        candidates = []
+        # set by _ray_segment_distance for every tested chord
+        s = 0.0
+        v = 0.0
+        if self.__segment_a.shape[0] > 0:
+            stack[0] = 0
+            while top >= 0:
+                node = stack[top]
+                top -= 1
+                # slab test of the box inflated by the radius
+                s = 0.0
+                s_max = DBL_MAX
+                for j in range(3):
+                    lo = self.__node_lower[node, j] - radius
+                    hi = self.__node_upper[node, j] + radius
+                    if fabs(unit[j]) < 1.0e-300:
+                        if origin[j] < lo or origin[j] > hi:
+                            s_max = -1.0
+                        continue
+                    lo = (lo - origin[j]) / unit[j]
+                    hi = (hi - origin[j]) / unit[j]
+                    s = max(s, min(lo, hi))
+                    s_max = min(s_max, max(lo, hi))
+                if s > s_max:
+                    continue
+                child = self.__node_child[node]
+                if child > 0:
+                    top += 1
+                    stack[top] = child
+                    top += 1
+                    stack[top] = child + 1
+                    continue
+                for i in range(self.__node_start[node], self.__node_start[node] + self.__node_count[node]):
+                    d = _ray_segment_distance(origin, unit, self.__segment_a, self.__segment_b, i, &s, &v)
+                    if d - self.__segment_margin[i] <= radius:
+                        candidates.append((i, v, s))
+        hits = {}
+        for i, v, s in candidates:
+            c = self.__segment_curve[i]
+            curve = self.__curves[c]
+            local_origin.x = local_origin.y = local_origin.z = 0.0
+            local_direction.x = local_direction.y = local_direction.z = 0.0
+            for j in range(3):
+                local_origin.x += (origin[j] - self.__curve_origin[c, j]) * self.__curve_inverse[c, j, 0]
+                local_origin.y += (origin[j] - self.__curve_origin[c, j]) * self.__curve_inverse[c, j, 1]
+                local_origin.z += (origin[j] - self.__curve_origin[c, j]) * self.__curve_inverse[c, j, 2]
+                local_direction.x += unit[j] * self.__curve_inverse[c, j, 0]
+                local_direction.y += unit[j] * self.__curve_inverse[c, j, 1]
+                local_direction.z += unit[j] * self.__curve_inverse[c, j, 2]
+            t = curve.__closest_to_line_near(local_origin, local_direction, self.__segment_index[i], v,
+                                             &foot, &interior)
+            if not interior:
+                # the approach belongs to the neighbouring chords
+                continue
+            s = (foot.x - local_origin.x) * local_direction.x + (foot.y - local_origin.y) * local_direction.y \
+                + (foot.z - local_origin.z) * local_direction.z
+            if s < 0:
+                # the closest approach to the ray is the closest approach to its origin
+                t = self.__polish(c, t, origin[0], origin[1], origin[2], &foot)
+                s = 0.0
+                d = sqrt((foot.x - origin[0]) ** 2 + (foot.y - origin[1]) ** 2 + (foot.z - origin[2]) ** 2)
+            else:
+                d = sqrt((foot.x - local_origin.x - s * local_direction.x) ** 2
+                         + (foot.y - local_origin.y - s * local_direction.y) ** 2
+                         + (foot.z - local_origin.z - s * local_direction.z) ** 2)
+            if d <= radius:
+                hits.setdefault(c, []).append((t, s, d))
+        result = []
+        for c in hits:
+            # seeds converged to the same approach are merged
+            curve_hits = sorted(hits[c])
+            scale = 1.0e-8 * (fabs(self.__curves[c].stop - self.__curves[c].start) + 1.0)
+            best = curve_hits[0]
+            for hit in curve_hits[1:]:
+                if hit[0] - best[0] > scale:
+                    result.append((best[1], self.__curves[c], best[0], best[2]))
+                    best = hit
+                elif hit[2] < best[2]:
+                    best = hit
+            result.append((best[1], self.__curves[c], best[0], best[2]))
+        return sorted(result, key=itemgetter(0))
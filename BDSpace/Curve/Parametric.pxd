@@ -1,6 +1,8 @@
+from BDMesh.Mesh1D cimport Mesh1D
 from BDMesh.Mesh1DUniform cimport Mesh1DUniform
 from BDMesh.TreeMesh1DUniform cimport TreeMesh1DUniform
 from BDSpace.Space cimport Space
+from BDSpace.Coordinates.transforms cimport Vector3
 
 
 cdef class ParametricCurve(Space):
@@ -9,6 +11,23 @@ cdef class ParametricCurve(Space):
         double __stop
         double __dt
         double __precision
+        unsigned long __generation
+        bint __arc_valid
+        unsigned long __arc_generation
+        unsigned int __arc_iterations
+        double[:] __arc_t
+        double[:] __arc_s
+        double[:] __arc_v
+        bint __refine_valid
+        unsigned long __refine_generation
+        unsigned int __refine_iterations
+        double[:] __refine_t
+        double[:] __refine_v
+        double[:] __refine_dl
+        double[:] __refine_error
+        double[:, :] __refine_xyz
+        list __refine_levels
+    cdef void __changed(self) except *
     cdef double __x_point(self, double t) nogil
     cdef double __y_point(self, double t) nogil
     cdef double __z_point(self, double t) nogil
@@ -19,6 +38,12 @@ cdef class ParametricCurve(Space):
     cpdef double[:] y(self, double[:] t)
     cpdef double[:] z(self, double[:] t)
     cpdef double[:, :] generate_points(self, double[:] t)
+    cdef Vector3 __point(self, double t) nogil
+    cdef Vector3 __tangent_point(self, double t, bint left=*, bint right=*) nogil
+    cdef void __point_and_tangent(self, double t, Vector3* point, Vector3* tangent,
+                                  bint left=*, bint right=*) nogil
+    cpdef tuple point_and_tangent(self, double[:] t)
+    cdef void __points_and_tangents(self, double[:] t, double[:, :] xyz, double[:, :] xyz_t) nogil
     cdef double __tangent_x_point(self, double t, bint left=*, bint right=*) nogil
     cdef double __tangent_y_point(self, double t, bint left=*, bint right=*) nogil
     cdef double __tangent_z_point(self, double t, bint left=*, bint right=*) nogil
@@ -33,9 +58,23 @@ cdef class ParametricCurve(Space):
     cdef double __length_poly_array(self, double[:] t)
     cdef double __length_tangent_mesh(self, Mesh1DUniform mesh)
     cpdef double length(self, unsigned int max_iterations=*)
+    cdef void __update_arc_table(self, int max_iterations=*) except *
+    cdef double __t_at_length(self, double s) nogil
+    cpdef double t_at_length(self, double s) except? -1
+    cpdef double[:] t_at_lengths(self, double[:] s)
+    cpdef double[:, :] points_at_lengths(self, double[:] s)
+    cdef void __refine(self, int max_iterations=*) except *
+    cdef double[:] __chord_margin(self)
+    cpdef Mesh1D adaptive_mesh(self, unsigned int max_iterations=*)
     cpdef TreeMesh1DUniform mesh_tree(self, unsigned int max_iterations=*)
     cpdef double distance_to_point_square(self, double t, double[:] xyz)
     cpdef double distance_to_point(self, double t, double[:] xyz)
+    cdef double __closest_point(self, double x, double y, double z, Vector3* foot) nogil
+    cdef double __closest_point_near(self, double x, double y, double z, int segment, double u,
+                                     Vector3* foot) nogil
+    cdef double __closest_to_line_near(self, Vector3 origin, Vector3 direction, int segment, double u,
+                                       Vector3* foot, bint* interior) nogil
+    cpdef tuple closest_points(self, double[:, :] xyz)
 
 
 cdef class Line(ParametricCurve):
@@ -5,13 +5,22 @@ from cython.parallel import prange
 
 from cpython.array cimport array, clone
 from libc.math cimport sin, cos, sqrt, M_PI, fabs
+from libc.float cimport DBL_EPSILON, DBL_MAX
 from BDMesh.Mesh1D cimport Mesh1D
 from BDMesh.Mesh1DUniform cimport Mesh1DUniform
 from BDMesh.TreeMesh1DUniform cimport TreeMesh1DUniform
 
 from BDSpace.Space cimport Space
 from BDSpace.Coordinates.Cartesian cimport Cartesian
-from ._helpers cimport trapz_1d, refinement_points
+from BDSpace.Coordinates.transforms cimport Vector3
+from ._helpers cimport trapz_1d
+
+
+# Maximal number of safeguarded Newton iterations of closest point search
+DEF NEWTON_ITERATIONS = 50
+
+cdef Vector3 _zero_vector
+_zero_vector.x = _zero_vector.y = _zero_vector.z = 0.0
 
 
 cdef class ParametricCurve(Space):
@@ -23,6 +32,25 @@ cdef class ParametricCurve(Space):
         self.__stop = stop
         self.__dt = 1.0e-10
         self.__precision = 1.0e-6
+        self.__generation = 0
+        self.__arc_valid = False
+        self.__arc_iterations = 100
+        self.__refine_valid = False
+        self.__refine_iterations = 100
+
+    cdef void __changed(self) except *:
+        """
+        Must be called every time the curve shape or its sampling parameters change
+        """
+        self.__generation += 1
+        self.geometry_changed()
+
+    @property
+    def generation(self):
+        """
+        Counter of curve shape and sampling parameters changes, used to invalidate data sampled from the curve
+        """
+        return self.__generation
 
     cdef double __x_point(self, double t) nogil:
         return 0.0
@@ -85,6 +113,7 @@ cdef class ParametricCurve(Space):
     @start.setter
     def start(self, double start):
         self.__start = start
+        self.__changed()
 
     @property
     def stop(self):
@@ -93,6 +122,7 @@ cdef class ParametricCurve(Space):
     @stop.setter
     def stop(self, double stop):
         self.__stop = stop
+        self.__changed()
 
     @property
     def dt(self):
@@ -101,6 +131,7 @@ cdef class ParametricCurve(Space):
     @dt.setter
     def dt(self, double dt):
         self.__dt = dt
+        self.__changed()
 
     @property
     def precision(self):
@@ -109,6 +140,7 @@ cdef class ParametricCurve(Space):
     @precision.setter
     def precision(self, double precision):
         self.__precision = precision
+        self.__changed()
 
     @boundscheck(False)
     @wraparound(False)
@@ -116,13 +148,81 @@ cdef class ParametricCurve(Space):
         cdef:
             int i, s = t.shape[0]
             double[:, :] xyz = np.empty((s, 3), dtype=np.double)
+            Vector3 point
         with nogil:
             for i in prange(s):
-                xyz[i, 0] = self.__x_point(t[i])
-                xyz[i, 1] = self.__y_point(t[i])
-                xyz[i, 2] = self.__z_point(t[i])
+                point = self.__point(t[i])
+                xyz[i, 0] = point.x
+                xyz[i, 1] = point.y
+                xyz[i, 2] = point.z
         return xyz
 
+    cdef Vector3 __point(self, double t) nogil:
+        """
+        Calculates all three coordinates of the curve point in one call.
+        Curves with closed-form coordinates should override it together with __tangent_point
+        and __point_and_tangent to share common subexpressions.
+        """
+        cdef:
+            Vector3 point
+        point.x = self.__x_point(t)
+        point.y = self.__y_point(t)
+        point.z = self.__z_point(t)
+        return point
+
+    cdef Vector3 __tangent_point(self, double t, bint left=True, bint right=True) nogil:
+        """
+        Calculates all three components of the curve tangent in one call
+        """
+        cdef:
+            Vector3 tangent
+        tangent.x = self.__tangent_x_point(t, left, right)
+        tangent.y = self.__tangent_y_point(t, left, right)
+        tangent.z = self.__tangent_z_point(t, left, right)
+        return tangent
+
+    cdef void __point_and_tangent(self, double t, Vector3* point, Vector3* tangent,
+                                  bint left=True, bint right=True) nogil:
+        """
+        Calculates curve point and tangent at parameter t in one call
+        """
+        point[0] = self.__point(t)
+        tangent[0] = self.__tangent_point(t, left, right)
+
+    @boundscheck(False)
+    @wraparound(False)
+    cpdef tuple point_and_tangent(self, double[:] t):
+        """
+        Calculates curve points and tangents in a single pass. One-sided differences are used at the ends
+        of t array as in tangent method.
+        :param t: array of N curve parameter values
+        :return: tuple of points and tangents arrays both shaped (N, 3)
+        """
+        cdef:
+            int i, s = t.shape[0]
+            double[:, :] xyz = np.empty((s, 3), dtype=np.double)
+            double[:, :] xyz_t = np.empty((s, 3), dtype=np.double)
+        with nogil:
+            self.__points_and_tangents(t, xyz, xyz_t)
+        return xyz, xyz_t
+
+    @boundscheck(False)
+    @wraparound(False)
+    cdef void __points_and_tangents(self, double[:] t, double[:, :] xyz, double[:, :] xyz_t) nogil:
+        cdef:
+            int i, s = t.shape[0]
+            Vector3 point, tangent
+        for i in prange(s):
+            # assignment makes point and tangent private to the thread
+            point = tangent = _zero_vector
+            self.__point_and_tangent(t[i], &point, &tangent, i > 0, i < s - 1)
+            xyz[i, 0] = point.x
+            xyz[i, 1] = point.y
+            xyz[i, 2] = point.z
+            xyz_t[i, 0] = tangent.x
+            xyz_t[i, 1] = tangent.y
+            xyz_t[i, 2] = tangent.z
+
     cdef double __tangent_x_point(self, double t, bint left=True, bint right=True) nogil:
         cdef:
             double step2 = self.__dt / 2
@@ -208,19 +308,15 @@ cdef class ParametricCurve(Space):
     @wraparound(False)
     cpdef double[:, :] tangent(self, double[:] t):
         cdef:
-            int i, s = t.shape[0] - 1
-            double[:, :] result = np.empty((s + 1, 3), dtype=np.double)
-        result[0, 0] = self.__tangent_x_point(t[0], left=False, right=True)
-        result[0, 1] = self.__tangent_y_point(t[0], left=False, right=True)
-        result[0, 2] = self.__tangent_z_point(t[0], left=False, right=True)
-        result[s, 0] = self.__tangent_x_point(t[s], left=True, right=False)
-        result[s, 1] = self.__tangent_y_point(t[s], left=True, right=False)
-        result[s, 2] = self.__tangent_z_point(t[s], left=True, right=False)
+            int i, s = t.shape[0]
+            double[:, :] result = np.empty((s, 3), dtype=np.double)
+            Vector3 tangent
         with nogil:
-            for i in prange(1, s):
-                result[i, 0] = self.__tangent_x_point(t[i])
-                result[i, 1] = self.__tangent_y_point(t[i])
-                result[i, 2] = self.__tangent_z_point(t[i])
+            for i in prange(s):
+                tangent = self.__tangent_point(t[i], i > 0, i < s - 1)
+                result[i, 0] = tangent.x
+                result[i, 1] = tangent.y
+                result[i, 2] = tangent.z
         return result
 
     @boundscheck(False)
@@ -257,8 +353,8 @@ cdef class ParametricCurve(Space):
         cdef:
             int i, num_points = mesh.num
             double[:] t = mesh.physical_nodes
-            double[:, :] xyz = self.generate_points(t)
-            double[:, :] xyz_t = self.tangent(t)
+            double[:, :] xyz = np.empty((num_points, 3), dtype=np.double)
+            double[:, :] xyz_t = np.empty((num_points, 3), dtype=np.double)
             double result_t, result_p, result_t_acc = 0.0, result_p_acc = 0.0, dx, dy, dz, dl1, dl2
             array[double] solution, error, template = array('d')
         solution = clone(template, num_points, zero=False)
@@ -266,6 +362,7 @@ cdef class ParametricCurve(Space):
         solution[0] = 0.0
         error[0] = 0.0
         with nogil:
+            self.__points_and_tangents(t, xyz, xyz_t)
             for i in prange(num_points - 1):
                 dx = xyz[i + 1, 0] - xyz[i, 0]
                 dy = xyz[i + 1, 1] - xyz[i, 1]
@@ -286,64 +383,472 @@ cdef class ParametricCurve(Space):
     @boundscheck(False)
     @wraparound(False)
     cpdef double length(self, unsigned int max_iterations=100):
+        """
+        Length of the curve from the cached arc-length table
+        :param max_iterations: maximal number of mesh refinement iterations used to build the table
+        :return: curve length
+        """
+        self.__update_arc_table(max_iterations)
+        return self.__arc_s[self.__arc_s.shape[0] - 1]
+
+    @boundscheck(False)
+    @wraparound(False)
+    cdef void __update_arc_table(self, int max_iterations=-1) except *:
+        """
+        Builds cumulative arc-length table s(t) over the adaptively refined curve nodes by trapezoidal integration
+        of the tangent length. The table is rebuilt only when the curve parameters or the requested number
+        of refinement iterations change. Negative max_iterations reuses the last requested number (100 initially).
+        """
+        if max_iterations < 0:
+            max_iterations = self.__arc_iterations
+        if self.__arc_valid and self.__arc_generation == self.__generation \
+                and self.__arc_iterations == <unsigned int> max_iterations:
+            return
+        self.__refine(max_iterations)
+        self.__arc_t = self.__refine_t
+        self.__arc_v = self.__refine_v
+        self.__arc_s = np.cumsum(self.__refine_dl)
+        self.__arc_generation = self.__generation
+        self.__arc_iterations = <unsigned int> max_iterations
+        self.__arc_valid = True
+
+    @property
+    def arc_length_table(self):
+        """
+        Cached arc-length table as a tuple of arrays (t, s) of curve parameter and arc length from the curve start
+        """
+        self.__update_arc_table()
+        return np.asarray(self.__arc_t), np.asarray(self.__arc_s)
+
+    @boundscheck(False)
+    @wraparound(False)
+    cdef double __t_at_length(self, double s) nogil:
+        """
+        Inverts arc-length table with binary search. Within the table interval tangent length is
+        linear in t (as assumed by trapezoidal integration), which gives quadratic equation for t.
+        """
+        cdef:
+            int lo = 0, hi = self.__arc_s.shape[0] - 1, mid
+            double h, a, ds
+        if hi == 0:
+            return self.__arc_t[0]
+        while hi - lo > 1:
+            mid = (lo + hi) // 2
+            if self.__arc_s[mid] <= s:
+                lo = mid
+            else:
+                hi = mid
+        h = self.__arc_t[hi] - self.__arc_t[lo]
+        ds = s - self.__arc_s[lo]
+        if ds <= 0:
+            return self.__arc_t[lo]
+        a = (self.__arc_v[hi] - self.__arc_v[lo]) / (2 * h)
+        return self.__arc_t[lo] + 2 * ds / (self.__arc_v[lo] + sqrt(max(self.__arc_v[lo] * self.__arc_v[lo]
+                                                                            + 4 * a * ds, 0.0)))
+
+    cpdef double t_at_length(self, double s) except? -1:
+        """
+        Finds curve parameter t at which arc length measured from the curve start equals s
+        :param s: arc length
+        :return: curve parameter value
+        """
+        self.__update_arc_table()
+        if s < 0 or s > self.__arc_s[self.__arc_s.shape[0] - 1]:
+            raise ValueError('Arc length must be in range [0, length]')
+        return self.__t_at_length(s)
+
+    @boundscheck(False)
+    @wraparound(False)
+    cpdef double[:] t_at_lengths(self, double[:] s):
+        """
+        Finds curve parameter values at arc lengths s
+        :param s: array of arc lengths
+        :return: array of curve parameter values
+        """
+        cdef:
+            int i, n = s.shape[0]
+            array[double] result, template = array('d')
+        self.__update_arc_table()
+        if n > 0 and (np.min(s) < 0 or np.max(s) > self.__arc_s[self.__arc_s.shape[0] - 1]):
+            raise ValueError('Arc length must be in range [0, length]')
+        result = clone(template, n, zero=False)
+        with nogil:
+            for i in prange(n):
+                result[i] = self.__t_at_length(s[i])
+        return result
+
+    @boundscheck(False)
+    @wraparound(False)
+    cpdef double[:, :] points_at_lengths(self, double[:] s):
+        """
+        Calculates curve points at given arc lengths from the curve start, e.g. for equal arc-length spacing
+        :param s: array of arc lengths
+        :return: array of points shaped (N, 3)
+        """
         cdef:
-            TreeMesh1DUniform meshes_tree = self.mesh_tree(max_iterations)
-            Mesh1D flat_mesh = meshes_tree.flatten()
-            int i, s = flat_mesh.num
-            double[:] dl = flat_mesh.solution
-            double length_tangent = 0
-        for i in range(s):
-            length_tangent += dl[i]
-        return length_tangent
+            int i, n = s.shape[0]
+            double[:] t = self.t_at_lengths(s)
+            double[:, :] xyz = np.empty((n, 3), dtype=np.double)
+            Vector3 point
+        with nogil:
+            for i in prange(n):
+                point = self.__point(t[i])
+                xyz[i, 0] = point.x
+                xyz[i, 1] = point.y
+                xyz[i, 2] = point.z
+        return xyz
 
     @boundscheck(False)
     @wraparound(False)
+    cdef void __refine(self, int max_iterations=-1) except *:
+        """
+        Adaptive refinement of the curve parameter range on flat arrays. Starting from the uniform grid
+        of three nodes every interval whose trapezoidal tangent length differs from its chord length
+        by more than precision is split in half. Only the failed intervals are checked on the next iteration
+        and every split costs a single point and tangent evaluation at the interval midpoint.
+        Sorted nodes with tangent lengths, trapezoidal lengths and residuals of the intervals ending at the nodes
+        and the failed intervals of every level are cached until the curve changes.
+        Negative max_iterations reuses the last requested number of iterations (100 initially).
+        """
+        cdef:
+            int i, k
+            unsigned int iteration = 0
+            double h = (self.__stop - self.__start) / 2.0, dx, dy, dz
+            double[:] t, v, dl, error, ta, tb, va, vb, tm, vm
+            double[:, :] xyz, xyz_t, pa, pb, pm
+            Vector3 point, tangent
+        if max_iterations < 0:
+            max_iterations = self.__refine_iterations
+        if self.__refine_valid and self.__refine_generation == self.__generation \
+                and self.__refine_iterations == <unsigned int> max_iterations:
+            return
+        t = np.array([self.__start, self.__start + h, self.__stop], dtype=np.double)
+        xyz = np.empty((3, 3), dtype=np.double)
+        xyz_t = np.empty((3, 3), dtype=np.double)
+        with nogil:
+            self.__points_and_tangents(t, xyz, xyz_t)
+        v = np.sqrt(np.sum(np.asarray(xyz_t) ** 2, axis=1))
+        nodes_t, nodes_v, nodes_xyz, levels = [t], [v], [xyz], []
+        ta, tb, va, vb, pa, pb = t[:2], t[1:], v[:2], v[1:], xyz[:2], xyz[1:]
+        while True:
+            k = ta.shape[0]
+            error = np.empty(k, dtype=np.double)
+            with nogil:
+                for i in prange(k):
+                    dx = pb[i, 0] - pa[i, 0]
+                    dy = pb[i, 1] - pa[i, 1]
+                    dz = pb[i, 2] - pa[i, 2]
+                    error[i] = fabs(h * (va[i] + vb[i]) / 2 - sqrt(dx * dx + dy * dy + dz * dz))
+            failed = np.asarray(error) > self.__precision
+            if iteration >= <unsigned int> max_iterations or not failed.any():
+                break
+            iteration += 1
+            ta, tb = np.asarray(ta)[failed], np.asarray(tb)[failed]
+            va, vb = np.asarray(va)[failed], np.asarray(vb)[failed]
+            pa, pb = np.asarray(pa)[failed], np.asarray(pb)[failed]
+            levels.append((np.asarray(ta), np.asarray(tb)))
+            k = ta.shape[0]
+            tm = np.empty(k, dtype=np.double)
+            vm = np.empty(k, dtype=np.double)
+            pm = np.empty((k, 3), dtype=np.double)
+            with nogil:
+                for i in prange(k):
+                    tm[i] = (ta[i] + tb[i]) / 2
+                    # assignment makes point and tangent private to the thread
+                    point = tangent = _zero_vector
+                    self.__point_and_tangent(tm[i], &point, &tangent)
+                    pm[i, 0] = point.x
+                    pm[i, 1] = point.y
+                    pm[i, 2] = point.z
+                    vm[i] = sqrt(tangent.x * tangent.x + tangent.y * tangent.y + tangent.z * tangent.z)
+            nodes_t.append(tm)
+            nodes_v.append(vm)
+            nodes_xyz.append(pm)
+            ta, tb = np.concatenate((ta, tm)), np.concatenate((tm, tb))
+            va, vb = np.concatenate((va, vm)), np.concatenate((vm, vb))
+            pa, pb = np.concatenate((pa, pm)), np.concatenate((pm, pb))
+            h /= 2
+        order = np.argsort(np.concatenate(nodes_t), kind='stable')
+        t = np.concatenate(nodes_t)[order]
+        v = np.concatenate(nodes_v)[order]
+        xyz = np.concatenate(nodes_xyz)[order]
+        k = t.shape[0]
+        dl = np.empty(k, dtype=np.double)
+        error = np.empty(k, dtype=np.double)
+        dl[0] = 0.0
+        error[0] = 0.0
+        with nogil:
+            for i in prange(k - 1):
+                dx = xyz[i + 1, 0] - xyz[i, 0]
+                dy = xyz[i + 1, 1] - xyz[i, 1]
+                dz = xyz[i + 1, 2] - xyz[i, 2]
+                dl[i + 1] = (t[i + 1] - t[i]) * (v[i] + v[i + 1]) / 2
+                error[i + 1] = fabs(dl[i + 1] - sqrt(dx * dx + dy * dy + dz * dz))
+        self.__refine_t = t
+        self.__refine_v = v
+        self.__refine_xyz = xyz
+        self.__refine_dl = dl
+        self.__refine_error = error
+        self.__refine_levels = levels
+        self.__refine_generation = self.__generation
+        self.__refine_iterations = <unsigned int> max_iterations
+        self.__refine_valid = True
+
+    cdef double[:] __chord_margin(self):
+        """
+        Margins of the chords between the adaptive refinement nodes, twice the deviation of the curve
+        midpoint of the interval from its chord.
+        """
+        self.__refine()
+        t = np.asarray(self.__refine_t)
+        xyz = np.asarray(self.__refine_xyz)
+        middle = np.asarray(self.generate_points((t[:-1] + t[1:]) / 2))
+        chord = xyz[1:] - xyz[:-1]
+        shift = middle - xyz[:-1]
+        l2 = np.sum(chord ** 2, axis=1)
+        u = np.clip(np.sum(shift * chord, axis=1) / np.where(l2 > 0, l2, 1.0), 0.0, 1.0)
+        return 2 * np.sqrt(np.sum((shift - u[:, np.newaxis] * chord) ** 2, axis=1))
+
+    def _local_bounding_box(self):
+        """
+        Bounding box of the curve in its local coordinate system sampled at the adaptive refinement nodes
+        and padded by the largest chord margin.
+        :return: array of lower and upper corners of the box with shape (2, 3)
+        """
+        margin = np.asarray(self.__chord_margin())
+        xyz = np.asarray(self.__refine_xyz)
+        pad = margin.max() if margin.size > 0 else 0.0
+        return np.array([xyz.min(axis=0) - pad, xyz.max(axis=0) + pad])
+
+    def _distance(self, xyz):
+        """
+        Calculates distance from points to the curve
+        :param xyz: array of N points in the global coordinate system with shape (N, 3)
+        :return: array of N distances
+        """
+        xyz = np.ascontiguousarray(xyz, dtype=np.double).reshape(-1, 3)
+        return np.asarray(self.closest_points(self.to_local_coordinate_system(xyz))[2])
+
+    cpdef Mesh1D adaptive_mesh(self, unsigned int max_iterations=100):
+        """
+        Flat adaptively refined mesh of the curve parameter. Solution holds trapezoidal lengths of the curve
+        between neighbouring nodes (zero at the first node) and residual holds their deviation from the chords.
+        :param max_iterations: maximal number of refinement iterations
+        :return: Mesh1D with sorted nodes of all refinement levels
+        """
+        cdef:
+            Mesh1D mesh
+        self.__refine(max_iterations)
+        mesh = Mesh1D(self.__start, self.__stop, boundary_condition_1=0.0, boundary_condition_2=0.0)
+        if self.__stop != self.__start:
+            mesh.local_nodes = (np.asarray(self.__refine_t) - self.__start) / (self.__stop - self.__start)
+            mesh.solution = np.array(self.__refine_dl)
+            mesh.residual = np.array(self.__refine_error)
+        return mesh
+
     cpdef TreeMesh1DUniform mesh_tree(self, unsigned int max_iterations=100):
+        """
+        Builds tree of uniform meshes from the adaptive refinement, every run of adjacent failed intervals
+        of a level becomes a mesh of the next level with half the step.
+        :param max_iterations: maximal number of refinement iterations
+        :return: TreeMesh1DUniform
+        """
         cdef:
-            Mesh1DUniform root_mesh, mesh, refinement_mesh
+            Mesh1DUniform root_mesh, mesh
             TreeMesh1DUniform meshes_tree
-            unsigned int num_points = 3, iteration = 0, level, i, to_refine
-            double[:] t
-            double length_tangent = 0.0
-            long[:, :] refinements
+            double step = (self.__stop - self.__start) / 2.0
+            int j
+        self.__refine(max_iterations)
         root_mesh = Mesh1DUniform(self.__start, self.__stop,
                                   boundary_condition_1=0.0,
                                   boundary_condition_2=0.0,
-                                  physical_step=(self.__stop - self.__start) / 2.0)
+                                  physical_step=step)
         meshes_tree = TreeMesh1DUniform(root_mesh, refinement_coefficient=2, aligned=True)
-        while iteration < max_iterations:
-            iteration += 1
-            level = max(meshes_tree.levels)
-            to_refine = 0
+        for ta, tb in self.__refine_levels:
+            step /= 2
+            order = np.argsort(ta)
+            ta, tb = ta[order], tb[order]
+            breaks = np.flatnonzero(ta[1:] != tb[:-1]) + 1
+            starts = np.concatenate(([0], breaks))
+            stops = np.concatenate((breaks, [ta.shape[0]])) - 1
+            for j in range(starts.shape[0]):
+                meshes_tree.add_mesh(Mesh1DUniform(ta[starts[j]], tb[stops[j]],
+                                                   boundary_condition_1=0.0,
+                                                   boundary_condition_2=0.0,
+                                                   physical_step=step))
+        meshes_tree.remove_coarse_duplicates()
+        for level in meshes_tree.levels:
             for mesh in meshes_tree.__tree[level]:
-                length_tangent = self.__length_tangent_mesh(mesh)
-                refinements = refinement_points(mesh, self.__precision)
-                for i in range(refinements.shape[0]):
-                    to_refine += 1
-                    refinement_mesh = Mesh1DUniform(
-                        mesh.__physical_boundary_1 + mesh.j() * mesh.__local_nodes[refinements[i][0]],
-                        mesh.__physical_boundary_1 + mesh.j() * mesh.__local_nodes[refinements[i][1]],
-                        boundary_condition_1=0.0,
-                        boundary_condition_2=0.0,
-                        physical_step=mesh.physical_step/meshes_tree.refinement_coefficient)
-                    meshes_tree.add_mesh(refinement_mesh)
-                meshes_tree.remove_coarse_duplicates()
-            if to_refine == 0:
-                break
+                self.__length_tangent_mesh(mesh)
         return meshes_tree
 
     @boundscheck(False)
     cpdef double distance_to_point_square(self, double t, double[:] xyz):
         cdef:
+            Vector3 point = self.__point(t)
             double x, y, z
-        x = self.x_point(t) - xyz[0]
-        y = self.y_point(t) - xyz[1]
-        z = self.z_point(t) - xyz[2]
+        x = point.x - xyz[0]
+        y = point.y - xyz[1]
+        z = point.z - xyz[2]
         return x*x + y*y + z*z
 
     cpdef double distance_to_point(self, double t, double[:] xyz):
         return sqrt(self.distance_to_point_square(t, xyz))
 
+    @boundscheck(False)
+    @wraparound(False)
+    cdef double __closest_point(self, double x, double y, double z, Vector3* foot) nogil:
+        """
+        Finds parameter of the curve point closest to (x, y, z) given in the curve coordinates.
+        The seed is the projection on the nearest chord of the refined curve polyline (see __refine).
+        The closest point is stored to foot.
+        """
+        cdef:
+            int j, best = 0, n = self.__refine_t.shape[0]
+            double dx, dy, dz, ex, ey, ez, u, l2, d2, best_d2 = DBL_MAX, best_u = 0.0
+        for j in range(n - 1):
+            ex = self.__refine_xyz[j + 1, 0] - self.__refine_xyz[j, 0]
+            ey = self.__refine_xyz[j + 1, 1] - self.__refine_xyz[j, 1]
+            ez = self.__refine_xyz[j + 1, 2] - self.__refine_xyz[j, 2]
+            dx = x - self.__refine_xyz[j, 0]
+            dy = y - self.__refine_xyz[j, 1]
+            dz = z - self.__refine_xyz[j, 2]
+            l2 = ex * ex + ey * ey + ez * ez
+            u = 0.0
+            if l2 > 0:
+                u = min(max((dx * ex + dy * ey + dz * ez) / l2, 0.0), 1.0)
+            dx -= u * ex
+            dy -= u * ey
+            dz -= u * ez
+            d2 = dx * dx + dy * dy + dz * dz
+            if d2 < best_d2:
+                best_d2 = d2
+                best = j
+                best_u = u
+        return self.__closest_point_near(x, y, z, best, best_u, foot)
+
+    @boundscheck(False)
+    @wraparound(False)
+    cdef double __closest_point_near(self, double x, double y, double z, int segment, double u,
+                                     Vector3* foot) nogil:
+        """
+        Finds parameter of the curve point closest to (x, y, z) given in the curve coordinates starting from
+        the point at fraction u of the chord number segment of the refined curve polyline (see __refine).
+        The seed is polished by Newton iterations on (P(t) - xyz) * P'(t) = 0 safeguarded by bisection
+        within the chords adjacent to the seed. The closest point is stored to foot.
+        """
+        cdef:
+            int k, n = self.__refine_t.shape[0]
+            double dx, dy, dz, t, t_new, lo, hi, h, g, dg
+            Vector3 point, tangent, tangent_1, tangent_2
+        lo = self.__refine_t[max(segment - 1, 0)]
+        hi = self.__refine_t[min(segment + 2, n - 1)]
+        t = self.__refine_t[segment] + u * (self.__refine_t[segment + 1] - self.__refine_t[segment])
+        h = (hi - lo) * 1.0e-4
+        for k in range(NEWTON_ITERATIONS):
+            self.__point_and_tangent(t, &point, &tangent)
+            dx = point.x - x
+            dy = point.y - y
+            dz = point.z - z
+            g = dx * tangent.x + dy * tangent.y + dz * tangent.z
+            if g > 0:
+                hi = t
+            else:
+                lo = t
+            tangent_1 = self.__tangent_point(t + h)
+            tangent_2 = self.__tangent_point(t - h)
+            dg = tangent.x * tangent.x + tangent.y * tangent.y + tangent.z * tangent.z \
+                + (dx * (tangent_1.x - tangent_2.x) + dy * (tangent_1.y - tangent_2.y)
+                   + dz * (tangent_1.z - tangent_2.z)) / (2 * h)
+            t_new = (lo + hi) / 2
+            if dg > 0 and lo < t - g / dg < hi:
+                t_new = t - g / dg
+            if fabs(t_new - t) <= 4 * DBL_EPSILON * (fabs(t) + h):
+                t = t_new
+                break
+            t = t_new
+        foot[0] = self.__point(t)
+        return t
+
+    @boundscheck(False)
+    @wraparound(False)
+    cdef double __closest_to_line_near(self, Vector3 origin, Vector3 direction, int segment, double u,
+                                       Vector3* foot, bint* interior) nogil:
+        """
+        Finds parameter of the curve point closest to the line origin + s * direction (|direction| = 1)
+        given in the curve coordinates starting from the point at fraction u of the chord number segment
+        of the refined curve polyline. Newton iterations on the derivative of the squared distance to the line
+        are safeguarded by bisection within the chords adjacent to the seed. The closest point is stored to foot,
+        interior is set to False if the search stopped at the border of the chords which is not the curve end.
+        """
+        cdef:
+            int k, n = self.__refine_t.shape[0]
+            double t, t_new, lo, hi, lo_0, hi_0, h, g, dg, wd, td, ad, wx, wy, wz, ax, ay, az
+            Vector3 point, tangent, tangent_1, tangent_2
+        lo = lo_0 = self.__refine_t[max(segment - 1, 0)]
+        hi = hi_0 = self.__refine_t[min(segment + 2, n - 1)]
+        t = self.__refine_t[segment] + u * (self.__refine_t[segment + 1] - self.__refine_t[segment])
+        h = (hi - lo) * 1.0e-4
+        for k in range(NEWTON_ITERATIONS):
+            self.__point_and_tangent(t, &point, &tangent)
+            wx = point.x - origin.x
+            wy = point.y - origin.y
+            wz = point.z - origin.z
+            wd = wx * direction.x + wy * direction.y + wz * direction.z
+            td = tangent.x * direction.x + tangent.y * direction.y + tangent.z * direction.z
+            g = wx * tangent.x + wy * tangent.y + wz * tangent.z - wd * td
+            if g > 0:
+                hi = t
+            else:
+                lo = t
+            tangent_1 = self.__tangent_point(t + h)
+            tangent_2 = self.__tangent_point(t - h)
+            ax = (tangent_1.x - tangent_2.x) / (2 * h)
+            ay = (tangent_1.y - tangent_2.y) / (2 * h)
+            az = (tangent_1.z - tangent_2.z) / (2 * h)
+            ad = ax * direction.x + ay * direction.y + az * direction.z
+            dg = tangent.x * tangent.x + tangent.y * tangent.y + tangent.z * tangent.z - td * td \
+                + wx * ax + wy * ay + wz * az - wd * ad
+            t_new = (lo + hi) / 2
+            if dg > 0 and lo < t - g / dg < hi:
+                t_new = t - g / dg
+            if fabs(t_new - t) <= 4 * DBL_EPSILON * (fabs(t) + h):
+                t = t_new
+                break
+            t = t_new
+        interior[0] = (t - lo_0 > h or lo_0 == self.__refine_t[0]) and (hi_0 - t > h or hi_0 == self.__refine_t[n - 1])
+        foot[0] = self.__point(t)
+        return t
+
+    @boundscheck(False)
+    @wraparound(False)
+    cpdef tuple closest_points(self, double[:, :] xyz):
+        """
+        Finds the closest curve points for an array of points
+        :param xyz: array of N points in the curve coordinate system with shape (N, 3)
+        :return: tuple of arrays of curve parameter (N,), closest curve points (N, 3) and distances (N,)
+        """
+        cdef:
+            int i, s = xyz.shape[0]
+            Vector3 foot
+            array[double] t, distance, template = array('d')
+            double[:, :] feet = np.empty((s, 3), dtype=np.double)
+        self.__refine()
+        t = clone(template, s, zero=False)
+        distance = clone(template, s, zero=False)
+        with nogil:
+            for i in prange(s):
+                # assignment makes foot private to the thread
+                foot = _zero_vector
+                t[i] = self.__closest_point(xyz[i, 0], xyz[i, 1], xyz[i, 2], &foot)
+                feet[i, 0] = foot.x
+                feet[i, 1] = foot.y
+                feet[i, 2] = foot.z
+                distance[i] = sqrt((foot.x - xyz[i, 0]) * (foot.x - xyz[i, 0])
+                                   + (foot.y - xyz[i, 1]) * (foot.y - xyz[i, 1])
+                                   + (foot.z - xyz[i, 2]) * (foot.z - xyz[i, 2]))
+        return t, feet, distance
+
 
 cdef class Line(ParametricCurve):
 
@@ -365,6 +870,7 @@ cdef class Line(ParametricCurve):
     @a.setter
     def a(self, double a):
         self.__a = a
+        self.__changed()
 
     @property
     def b(self):
@@ -373,6 +879,7 @@ cdef class Line(ParametricCurve):
     @b.setter
     def b(self, double b):
         self.__b = b
+        self.__changed()
 
     @property
     def c(self):
@@ -381,6 +888,7 @@ cdef class Line(ParametricCurve):
     @c.setter
     def c(self, double c):
         self.__c = c
+        self.__changed()
 
     @boundscheck(False)
     cdef double __x_point(self, double t) nogil:
@@ -403,6 +911,28 @@ cdef class Line(ParametricCurve):
     cdef double __tangent_z_point(self, double t, bint left=True, bint right=True) nogil:
         return self.__c
 
+    @boundscheck(False)
+    cdef Vector3 __point(self, double t) nogil:
+        cdef:
+            Vector3 point
+        point.x = self.__origin[0] + self.__a * t
+        point.y = self.__origin[1] + self.__b * t
+        point.z = self.__origin[2] + self.__c * t
+        return point
+
+    cdef Vector3 __tangent_point(self, double t, bint left=True, bint right=True) nogil:
+        cdef:
+            Vector3 tangent
+        tangent.x = self.__a
+        tangent.y = self.__b
+        tangent.z = self.__c
+        return tangent
+
+    cdef void __point_and_tangent(self, double t, Vector3* point, Vector3* tangent,
+                                  bint left=True, bint right=True) nogil:
+        point[0] = self.__point(t)
+        tangent[0] = self.__tangent_point(t)
+
 
 cdef class Arc(ParametricCurve):
 
@@ -425,6 +955,7 @@ cdef class Arc(ParametricCurve):
     @a.setter
     def a(self, double a):
         self.__a = a
+        self.__changed()
 
     @property
     def b(self):
@@ -433,6 +964,7 @@ cdef class Arc(ParametricCurve):
     @b.setter
     def b(self, double b):
         self.__b = b
+        self.__changed()
 
     @property
     def direction(self):
@@ -441,6 +973,7 @@ cdef class Arc(ParametricCurve):
     @direction.setter
     def direction(self, short direction):
         self.__direction = direction
+        self.__changed()
 
     @property
     def right(self):
@@ -454,6 +987,7 @@ cdef class Arc(ParametricCurve):
             self.__direction = 1
         else:
             self.__direction = -1
+        self.__changed()
 
     @property
     def left(self):
@@ -467,6 +1001,7 @@ cdef class Arc(ParametricCurve):
             self.__direction = -1
         else:
             self.__direction = 1
+        self.__changed()
 
     cdef double __x_point(self, double t) nogil:
         return self.__a * cos(t)
@@ -486,6 +1021,33 @@ cdef class Arc(ParametricCurve):
     cdef double __tangent_z_point(self, double t, bint left=True, bint right=True) nogil:
         return 0.0
 
+    cdef Vector3 __point(self, double t) nogil:
+        cdef:
+            Vector3 point
+        point.x = self.__a * cos(t)
+        point.y = self.__direction * self.__b * sin(t)
+        point.z = 0.0
+        return point
+
+    cdef Vector3 __tangent_point(self, double t, bint left=True, bint right=True) nogil:
+        cdef:
+            Vector3 tangent
+        tangent.x = -self.__a * sin(t)
+        tangent.y = self.__direction * self.__b * cos(t)
+        tangent.z = 0.0
+        return tangent
+
+    cdef void __point_and_tangent(self, double t, Vector3* point, Vector3* tangent,
+                                  bint left=True, bint right=True) nogil:
+        cdef:
+            double sin_t = sin(t), cos_t = cos(t)
+        point.x = self.__a * cos_t
+        point.y = self.__direction * self.__b * sin_t
+        point.z = 0.0
+        tangent.x = -self.__a * sin_t
+        tangent.y = self.__direction * self.__b * cos_t
+        tangent.z = 0.0
+
     cpdef double eccentricity(self):
         return sqrt((self.__a * self.__a - self.__b * self.__b) / (self.__a * self.__a))
 
@@ -514,6 +1076,7 @@ cdef class Helix(ParametricCurve):
     @radius.setter
     def radius(self, double radius):
         self.__radius = radius
+        self.__changed()
 
     @property
     def pitch(self):
@@ -522,6 +1085,7 @@ cdef class Helix(ParametricCurve):
     @pitch.setter
     def pitch(self, double pitch):
         self.__pitch = pitch
+        self.__changed()
 
     @property
     def direction(self):
@@ -530,6 +1094,7 @@ cdef class Helix(ParametricCurve):
     @direction.setter
     def direction(self, short direction):
         self.__direction = direction
+        self.__changed()
 
     @property
     def right(self):
@@ -543,6 +1108,7 @@ cdef class Helix(ParametricCurve):
             self.__direction = 1
         else:
             self.__direction = -1
+        self.__changed()
 
     @property
     def left(self):
@@ -556,6 +1122,7 @@ cdef class Helix(ParametricCurve):
             self.__direction = -1
         else:
             self.__direction = 1
+        self.__changed()
 
     cdef double __x_point(self, double t) nogil:
         return self.__radius - self.__radius * cos(t)
@@ -574,3 +1141,30 @@ cdef class Helix(ParametricCurve):
 
     cdef double __tangent_z_point(self, double t, bint left=True, bint right=True) nogil:
         return self.__pitch / (2 * M_PI)
+
+    cdef Vector3 __point(self, double t) nogil:
+        cdef:
+            Vector3 point
+        point.x = self.__radius - self.__radius * cos(t)
+        point.y = self.__direction * self.__radius * sin(t)
+        point.z = self.__pitch / (2 * M_PI) * t
+        return point
+
+    cdef Vector3 __tangent_point(self, double t, bint left=True, bint right=True) nogil:
+        cdef:
+            Vector3 tangent
+        tangent.x = self.__radius * sin(t)
+        tangent.y = self.__direction * self.__radius * cos(t)
+        tangent.z = self.__pitch / (2 * M_PI)
+        return tangent
+
+    cdef void __point_and_tangent(self, double t, Vector3* point, Vector3* tangent,
+                                  bint left=True, bint right=True) nogil:
+        cdef:
+            double sin_t = sin(t), cos_t = cos(t)
+        point.x = self.__radius - self.__radius * cos_t
+        point.y = self.__direction * self.__radius * sin_t
+        point.z = self.__pitch / (2 * M_PI) * t
+        tangent.x = self.__radius * sin_t
+        tangent.y = self.__direction * self.__radius * cos_t
+        tangent.z = self.__pitch / (2 * M_PI)
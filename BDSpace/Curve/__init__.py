@@ -1,3 +1,4 @@
 from .Parametric import ParametricCurve, Line, Arc, Helix
+from .BVH import CurveBVH
 
-__all__ = ['ParametricCurve', 'Line', 'Arc', 'Helix']
+__all__ = ['ParametricCurve', 'Line', 'Arc', 'Helix', 'CurveBVH']
@@ -1,15 +1,24 @@
 from .Field cimport Field
+from BDSpace.Coordinates.transforms cimport Vector3
 from BDSpace.Curve.Parametric cimport ParametricCurve
+from ._octree cimport Octree
 from BDMesh.Mesh1D cimport Mesh1D
-from BDMesh.TreeMesh1DUniform cimport TreeMesh1DUniform
 
 cdef class CurveField(Field):
     cdef:
         ParametricCurve __curve
-        TreeMesh1DUniform __tree_mesh
         Mesh1D __flat_mesh
         double __a
+        bint __samples_valid
+        unsigned long __samples_curve_generation
+        unsigned long __samples_version
+        double[:, :] __kernel_points
+        double[:] __kernel_density
+        double[:] __kernel_weights
+        double[:, :] __kernel_m
+        double[:] __kernel_t
 
+    cdef void __update_samples(self)
     cdef double __linear_density_point(self, double t) nogil
     cpdef double linear_density_point(self, double t)
     cpdef double[:] linear_density(self, double[:] t)
@@ -18,3 +27,17 @@ cdef class CurveField(Field):
 cdef class HyperbolicPotentialCurveConservativeField(CurveField):
     cdef:
         double __r
+        double __theta
+        bint __use_tree
+        Octree __tree
+        unsigned long __tree_version
+        double __tree_r
+        unsigned long __segments_version
+        bint __segments
+        double[:, :] __segment_start
+        double[:, :] __segment_end
+        double[:] __segment_density
+        double[:] __segment_length
+
+    cdef double __segments_potential(self, double x, double y, double z) nogil
+    cdef Vector3 __segments_field(self, double x, double y, double z) nogil
@@ -4,22 +4,93 @@ from cython import boundscheck, wraparound
 from cython.parallel import prange
 
 from cpython.array cimport array, clone
-from libc.math cimport sqrt
+from libc.math cimport sqrt, log
 
 from .Field cimport Field
+from BDSpace.Coordinates.transforms cimport Vector3
 from BDSpace.Curve.Parametric cimport ParametricCurve
+from BDMesh.Mesh1D cimport Mesh1D
+from ._octree cimport Octree
+
+
+cdef bint _density_override(CurveField field):
+    """
+    Checks whether linear density is redefined by a Python subclass, such densities are never cached
+    """
+    for cls in type(field).__mro__:
+        if not cls.__flags__ & (1 << 9):  # Py_TPFLAGS_HEAPTYPE, Python class
+            break
+        if 'linear_density' in cls.__dict__ or 'linear_density_point' in cls.__dict__:
+            return True
+    return False
 
 
 cdef class CurveField(Field):
 
     def __init__(self, str name, str field_type, ParametricCurve curve):
         super(CurveField, self).__init__(name, field_type)
+        self.__samples_valid = False
+        self.__samples_version = 0
         self.__curve = curve
-        self.__tree_mesh = self.__curve.mesh_tree()
-        self.__flat_mesh = self.__tree_mesh.flatten()
+        self.__flat_mesh = self.__curve.adaptive_mesh()
+        self.__samples_curve_generation = self.__curve.__generation
         self.__curve.add_element(self)
         self.__a = 0.0
 
+    cdef void __update_samples(self):
+        """
+        Samples the curve with its adaptive mesh and caches curve points, linear densities and dl * nl weights
+        as contiguous arrays. The mesh is rebuilt if the curve shape changed since the last sampling.
+        Cached samples are reused until the curve, its shape, the mesh or linear density change.
+        """
+        cdef:
+            double[:] t
+        if self.__curve.__generation != self.__samples_curve_generation:
+            self.__flat_mesh = self.__curve.adaptive_mesh()
+            self.__samples_curve_generation = self.__curve.__generation
+            self.__samples_valid = False
+        if self.__samples_valid and not _density_override(self):
+            return
+        t = self.__flat_mesh.physical_nodes
+        self.__kernel_points = np.ascontiguousarray(self.__curve.generate_points(t))
+        self.__kernel_density = np.ascontiguousarray(self.linear_density(t))
+        self.__kernel_weights = np.asarray(self.__kernel_density) * np.asarray(self.__flat_mesh.solution)
+        self.__samples_version += 1
+        self.__samples_valid = True
+
+    cdef void __prepare_kernel(self):
+        """
+        Updates cached curve samples and transform of field local coordinates to curve local coordinates
+        for nogil kernels
+        """
+        self.__update_samples()
+        self.__kernel_m, self.__kernel_t = self.__relative_transform(self.__curve)
+
+    def invalidate_cache(self):
+        """
+        Drops cached curve samples. Needed only if the linear density of a subclass changes
+        without assignment of a, curve or flat_mesh properties.
+        """
+        self.__samples_valid = False
+
+    @property
+    def flat_mesh(self):
+        return self.__flat_mesh
+
+    @flat_mesh.setter
+    def flat_mesh(self, Mesh1D mesh):
+        self.__flat_mesh = mesh
+        self.__samples_valid = False
+
+    @property
+    def samples(self):
+        """
+        Cached curve samples as a tuple of arrays (t, points, linear density, dl * nl weights)
+        """
+        self.__update_samples()
+        return (np.asarray(self.__flat_mesh.physical_nodes), np.asarray(self.__kernel_points),
+                np.asarray(self.__kernel_density), np.asarray(self.__kernel_weights))
+
     @property
     def curve(self):
         return self.__curve
@@ -28,8 +99,9 @@ cdef class CurveField(Field):
     def curve(self, ParametricCurve curve):
         self.__curve.remove_element(self)
         self.__curve = curve
-        self.__tree_mesh = self.__curve.mesh_tree()
-        self.__flat_mesh = self.__tree_mesh.flatten()
+        self.__flat_mesh = self.__curve.adaptive_mesh()
+        self.__samples_curve_generation = self.__curve.__generation
+        self.__samples_valid = False
         self.__curve.add_element(self)
 
     @property
@@ -39,6 +111,7 @@ cdef class CurveField(Field):
     @a.setter
     def a(self, double a):
         self.__a = a
+        self.__samples_valid = False
 
     cdef double __linear_density_point(self, double t) nogil:
         return self.__a
@@ -60,9 +133,28 @@ cdef class CurveField(Field):
 
 
 cdef class HyperbolicPotentialCurveConservativeField(CurveField):
+    """
+    Field of the curve charged with linear density a, evaluated as a sum of hyperbolic potentials
+    of the curve mesh nodes with core radius r.
+    With opening angle theta > 0 the mesh nodes are clustered into an octree and far clusters
+    are approximated by their multipole moments up to quadrupole (see BDSpace.Field._octree),
+    so that the cost per point is O(log M) for M mesh nodes. Smaller theta gives better accuracy,
+    theta = 0 (default) is the exact direct sum over all mesh nodes.
+    In segments mode consecutive mesh nodes are joined by straight segments charged uniformly with
+    the linear density taken at the middle of the segment, and the closed-form potential
+    a * ln((ra + rb + L) / (ra + rb - L)) and field of every segment are summed. It is exact for straight
+    curves and converges much faster than the nodal sum with mesh refinement for curved ones.
+    Core radius r regularizes the field at distances below r from the segment middle.
+    Segments mode takes precedence over the tree evaluation.
+    """
 
-    def __init__(self, str name, str field_type, ParametricCurve curve, double r):
+    def __init__(self, str name, str field_type, ParametricCurve curve, double r, double theta=0.0,
+                 bint segments=False):
         self.__r = r
+        self.__tree = None
+        self.__use_tree = False
+        self.__segments = segments
+        self.theta = theta
         super(HyperbolicPotentialCurveConservativeField, self).__init__(name, field_type, curve)
 
     @property
@@ -73,59 +165,193 @@ cdef class HyperbolicPotentialCurveConservativeField(CurveField):
     def r(self, double r):
         self.__r = r
 
+    @property
+    def theta(self):
+        return self.__theta
+
+    @theta.setter
+    def theta(self, double theta):
+        if theta < 0 or theta >= 1:
+            raise ValueError('Opening angle theta must be in range [0, 1)')
+        self.__theta = theta
+
+    @property
+    def segments(self):
+        return self.__segments
+
+    @segments.setter
+    def segments(self, bint segments):
+        self.__segments = segments
+
+    cdef void __prepare_kernel(self):
+        """
+        Prepares curve samples and builds segments or the octree of curve mesh nodes if needed.
+        Segments and the tree are rebuilt only when the curve samples or the core radius change.
+        """
+        CurveField.__prepare_kernel(self)
+        if self.__segments:
+            self.__use_tree = False
+            if self.__segments_version != self.__samples_version:
+                t = np.asarray(self.__flat_mesh.physical_nodes)
+                points = np.asarray(self.__kernel_points)
+                self.__segment_start = points[:-1]
+                self.__segment_end = points[1:]
+                self.__segment_length = np.sqrt(np.sum((points[1:] - points[:-1]) ** 2, axis=1))
+                self.__segment_density = self.linear_density((t[1:] + t[:-1]) / 2)
+                self.__segments_version = self.__samples_version
+            return
+        self.__use_tree = self.__theta > 0
+        if not self.__use_tree:
+            return
+        if self.__tree is None or self.__tree_version != self.__samples_version or self.__tree_r != self.__r:
+            radii = np.full(self.__kernel_weights.shape[0], self.__r, dtype=np.double)
+            self.__tree = Octree(self.__kernel_points, self.__kernel_weights, radii)
+            self.__tree_version = self.__samples_version
+            self.__tree_r = self.__r
+
+    cdef bint __kernel_available(self):
+        return True
+
+    @boundscheck(False)
+    @wraparound(False)
+    cdef double __scalar_field_kernel(self, double x, double y, double z) nogil:
+        cdef:
+            int j, ms = self.__kernel_weights.shape[0]
+            double d, dx, dy, dz, result = 0.0
+            double cx, cy, cz
+        cx = x * self.__kernel_m[0, 0] + y * self.__kernel_m[1, 0] + z * self.__kernel_m[2, 0] + self.__kernel_t[0]
+        cy = x * self.__kernel_m[0, 1] + y * self.__kernel_m[1, 1] + z * self.__kernel_m[2, 1] + self.__kernel_t[1]
+        cz = x * self.__kernel_m[0, 2] + y * self.__kernel_m[1, 2] + z * self.__kernel_m[2, 2] + self.__kernel_t[2]
+        if self.__segments:
+            return self.__segments_potential(cx, cy, cz)
+        if self.__use_tree:
+            return self.__tree.potential(cx, cy, cz, self.__theta, NULL)
+        for j in range(ms):
+            dx = cx - self.__kernel_points[j, 0]
+            dy = cy - self.__kernel_points[j, 1]
+            dz = cz - self.__kernel_points[j, 2]
+            d = sqrt(dx * dx + dy * dy + dz * dz)
+            if d < self.__r:
+                d = self.__r
+            result += self.__kernel_weights[j] / d
+        return result
+
+    @boundscheck(False)
+    @wraparound(False)
+    cdef Vector3 __vector_field_kernel(self, double x, double y, double z) nogil:
+        cdef:
+            int j, ms = self.__kernel_weights.shape[0]
+            double d, d2, d2_min = self.__r * self.__r
+            double dx, dy, dz
+            double cx, cy, cz
+            Vector3 v
+        cx = x * self.__kernel_m[0, 0] + y * self.__kernel_m[1, 0] + z * self.__kernel_m[2, 0] + self.__kernel_t[0]
+        cy = x * self.__kernel_m[0, 1] + y * self.__kernel_m[1, 1] + z * self.__kernel_m[2, 1] + self.__kernel_t[1]
+        cz = x * self.__kernel_m[0, 2] + y * self.__kernel_m[1, 2] + z * self.__kernel_m[2, 2] + self.__kernel_t[2]
+        if self.__segments:
+            return self.__segments_field(cx, cy, cz)
+        if self.__use_tree:
+            return self.__tree.field(cx, cy, cz, self.__theta, NULL)
+        v.x = 0.0
+        v.y = 0.0
+        v.z = 0.0
+        for j in range(ms):
+            dx = cx - self.__kernel_points[j, 0]
+            dy = cy - self.__kernel_points[j, 1]
+            dz = cz - self.__kernel_points[j, 2]
+            d2 = dx * dx + dy * dy + dz * dz
+            if d2 >= d2_min:
+                d = sqrt(d2)
+                v.x += self.__kernel_weights[j] * dx / d2 / d
+                v.y += self.__kernel_weights[j] * dy / d2 / d
+                v.z += self.__kernel_weights[j] * dz / d2 / d
+        return v
+
+    @boundscheck(False)
+    @wraparound(False)
+    cdef double __segments_potential(self, double x, double y, double z) nogil:
+        """
+        Sums closed-form potentials of uniformly charged segments at point (x, y, z) in curve coordinates
+        """
+        cdef:
+            int j, ns = self.__segment_length.shape[0]
+            double ra, rb, s, s_min, l, dx, dy, dz, result = 0.0
+        for j in range(ns):
+            l = self.__segment_length[j]
+            if l == 0:
+                continue
+            dx = x - self.__segment_start[j, 0]
+            dy = y - self.__segment_start[j, 1]
+            dz = z - self.__segment_start[j, 2]
+            ra = sqrt(dx * dx + dy * dy + dz * dz)
+            dx = x - self.__segment_end[j, 0]
+            dy = y - self.__segment_end[j, 1]
+            dz = z - self.__segment_end[j, 2]
+            rb = sqrt(dx * dx + dy * dy + dz * dz)
+            s = ra + rb
+            s_min = sqrt(l * l + 4 * self.__r * self.__r)
+            if s < s_min:
+                s = s_min
+            result += self.__segment_density[j] * log((s + l) / (s - l))
+        return result
+
+    @boundscheck(False)
+    @wraparound(False)
+    cdef Vector3 __segments_field(self, double x, double y, double z) nogil:
+        """
+        Sums closed-form fields of uniformly charged segments at point (x, y, z) in curve coordinates
+        """
+        cdef:
+            int j, ns = self.__segment_length.shape[0]
+            double ra, rb, s, l, k, ax, ay, az, bx, by, bz
+            Vector3 v
+        v.x = 0.0
+        v.y = 0.0
+        v.z = 0.0
+        for j in range(ns):
+            l = self.__segment_length[j]
+            ax = x - self.__segment_start[j, 0]
+            ay = y - self.__segment_start[j, 1]
+            az = z - self.__segment_start[j, 2]
+            ra = sqrt(ax * ax + ay * ay + az * az)
+            bx = x - self.__segment_end[j, 0]
+            by = y - self.__segment_end[j, 1]
+            bz = z - self.__segment_end[j, 2]
+            rb = sqrt(bx * bx + by * by + bz * bz)
+            s = ra + rb
+            if l == 0 or s * s < l * l + 4 * self.__r * self.__r:
+                continue
+            k = 2 * self.__segment_density[j] * l / (s * s - l * l)
+            v.x += k * (ax / ra + bx / rb)
+            v.y += k * (ay / ra + by / rb)
+            v.z += k * (az / ra + bz / rb)
+        return v
+
     @boundscheck(False)
     @wraparound(False)
     cpdef double[:] scalar_field(self, double[:, :] xyz):
         cdef:
-            double[:, :] global_xyz = self.to_global_coordinate_system(xyz)
-            double[:, :] curve_xyz = self.__curve.to_local_coordinate_system(global_xyz)
-            double[:] t = self.__flat_mesh.physical_nodes
-            double[:, :] curve_points = self.__curve.generate_points(t)
-            double[:] nl = self.linear_density(t)
-            double[:] dl = self.__flat_mesh.solution
-            int i, j, s = xyz.shape[0], ms = self.__flat_mesh.num
-            double d, x, y, z
+            int i, s = xyz.shape[0]
             array[double] values, template = array('d')
+        self.__prepare_kernel()
         values = clone(template, s, zero=False)
         with nogil:
             for i in prange(s):
-                values[i] = 0.0
-                for j in prange(ms):
-                    x = curve_xyz[i, 0] - curve_points[j, 0]
-                    y = curve_xyz[i, 1] - curve_points[j, 1]
-                    z = curve_xyz[i, 2] - curve_points[j, 2]
-                    d = sqrt(x * x + y * y + z * z)
-                    if d < self.__r:
-                        d = self.__r
-                    values[i] += nl[j] * dl[j] / d
+                values[i] = self.__scalar_field_kernel(xyz[i, 0], xyz[i, 1], xyz[i, 2])
         return values
 
     @boundscheck(False)
     @wraparound(False)
     cpdef double[:, :] vector_field(self, double[:, :] xyz):
         cdef:
-            double[:, :] curve_xyz = self.__coordinate_system.to_parent(xyz)
-            double[:] t = self.__flat_mesh.physical_nodes
-            double[:, :] curve_points = self.__curve.generate_points(t)
-            double[:] nl = self.linear_density(t)
-            double[:] dl = self.__flat_mesh.solution
-            int i, j, s = xyz.shape[0], ms = self.__flat_mesh.num
-            double d, d2, d2_min = self.__r * self.__r
-            double x, y, z
+            int i, s = xyz.shape[0]
+            Vector3 v
             double[:, :] values = np.empty((s, 3), dtype=np.double)
+        self.__prepare_kernel()
         with nogil:
             for i in prange(s):
-                values[i, 0] = 0.0
-                values[i, 1] = 0.0
-                values[i, 2] = 0.0
-                for j in prange(ms):
-                    x = curve_xyz[i, 0] - curve_points[j, 0]
-                    y = curve_xyz[i, 1] - curve_points[j, 1]
-                    z = curve_xyz[i, 2] - curve_points[j, 2]
-                    d2 = x * x + y * y + z * z
-                    if d2 >= d2_min:
-                        d = sqrt(d2)
-                        values[i, 0] += nl[j] * dl[j] * x / d2 / d
-                        values[i, 1] += nl[j] * dl[j] * y / d2 / d
-                        values[i, 2] += nl[j] * dl[j] * z / d2 / d
+                v = self.__vector_field_kernel(xyz[i, 0], xyz[i, 1], xyz[i, 2])
+                values[i, 0] = v.x
+                values[i, 1] = v.y
+                values[i, 2] = v.z
         return values
@@ -1,4 +1,8 @@
 from BDSpace.Space cimport Space
+from BDSpace.Coordinates.transforms cimport Vector3
+
+cdef bint uses_kernel(Field field)
+
 
 cdef class Field(Space):
     cdef:
@@ -6,6 +10,10 @@ cdef class Field(Space):
 
     cdef double[:] __points_scalar(self, double[:, :] xyz, double value)  # nogil
     cdef double[:, :] __points_vector(self, double[:, :] xyz, double[:] value)  # nogil
+    cdef bint __kernel_available(self)
+    cdef void __prepare_kernel(self)
+    cdef double __scalar_field_kernel(self, double x, double y, double z) nogil
+    cdef Vector3 __vector_field_kernel(self, double x, double y, double z) nogil
     cpdef double scalar_field_point(self, double[:] xyz)
     cpdef double[:] scalar_field(self, double[:, :] xyz)
     cpdef double scalar_field_polar_point(self, double[:] rtp)
@@ -6,9 +6,93 @@ from cython.parallel import prange
 from cpython.array cimport array, clone
 
 from BDSpace.Space cimport Space
+from BDSpace.Coordinates.transforms cimport Vector3
 from BDSpace.Coordinates.transforms cimport spherical_to_cartesian_point, spherical_to_cartesian
 
 
+ctypedef fused real:
+    float
+    double
+
+
+# Python-level methods which define the field values. If a Python subclass overrides any of them
+# the compiled nogil kernels of the base extension class are not used.
+_evaluation_methods = ('scalar_field', 'vector_field', 'scalar_field_point', 'vector_field_point')
+
+
+cdef bint _python_override(Field field):
+    for cls in type(field).__mro__:
+        if not cls.__flags__ & (1 << 9):  # Py_TPFLAGS_HEAPTYPE, Python class
+            break
+        for method in _evaluation_methods:
+            if method in cls.__dict__:
+                return True
+    return False
+
+
+cdef bint uses_kernel(Field field):
+    """
+    Checks whether field values are fully defined by its compiled nogil kernels
+    """
+    return field.__kernel_available() and not _python_override(field)
+
+
+@boundscheck(False)
+@wraparound(False)
+cdef void __scalar_field_points(Field field, real[:, :] xyz, real[:] values):
+    cdef:
+        Py_ssize_t i, s = xyz.shape[0]
+    with nogil:
+        for i in prange(s):
+            values[i] = <real> field.__scalar_field_kernel(xyz[i, 0], xyz[i, 1], xyz[i, 2])
+
+
+@boundscheck(False)
+@wraparound(False)
+cdef void __vector_field_points(Field field, real[:, :] xyz, real[:, :] values):
+    cdef:
+        Py_ssize_t i, s = xyz.shape[0]
+        Vector3 v
+    with nogil:
+        for i in prange(s):
+            v = field.__vector_field_kernel(xyz[i, 0], xyz[i, 1], xyz[i, 2])
+            values[i, 0] = <real> v.x
+            values[i, 1] = <real> v.y
+            values[i, 2] = <real> v.z
+
+
+def _point_blocks(points, int chunk_size):
+    """
+    Splits array-like of points or iterable of points blocks into blocks of at most chunk_size points
+    """
+    cdef Py_ssize_t start
+    if hasattr(points, 'shape') and hasattr(points, 'dtype'):
+        blocks = (points, )
+    else:
+        blocks = points
+    for block in blocks:
+        block = np.asarray(block) if not hasattr(block, 'shape') else block
+        if len(block.shape) != 2 or block.shape[1] != 3:
+            raise ValueError('points must be shaped (N, 3)')
+        for start in range(0, block.shape[0], chunk_size):
+            yield np.asarray(block[start:start + chunk_size])
+
+
+def _evaluation_buffers(xyz, out, bint vector):
+    xyz = np.asarray(xyz)
+    if xyz.shape[-1] != 3:
+        raise ValueError('xyz must be an array of points shaped (..., 3)')
+    dtype = np.float32 if xyz.dtype == np.float32 else np.double
+    points = np.ascontiguousarray(xyz, dtype=dtype).reshape((-1, 3))
+    shape = xyz.shape if vector else xyz.shape[:-1]
+    if out is None:
+        out = np.empty(shape, dtype=dtype)
+    elif out.shape != shape or out.dtype != dtype or not out.flags.c_contiguous:
+        raise ValueError('out must be C-contiguous %s array shaped %s' % (np.dtype(dtype).name, str(shape)))
+    values = out.reshape((-1, 3)) if vector else out.reshape(-1)
+    return points, values, out
+
+
 cdef class Field(Space):
 
     def __init__(self, str name, str field_type):
@@ -38,6 +122,139 @@ cdef class Field(Space):
     cpdef bint remove_element(self, Space element):
         return False
 
+    cdef bint __kernel_available(self):
+        """
+        Fields with nogil kernels consistent with their scalar_field and vector_field methods return True.
+        Compiled subclasses overriding the field methods without the kernels are evaluated by the methods.
+        """
+        return False
+
+    cdef void __prepare_kernel(self):
+        """
+        Called with GIL before nogil kernels evaluation to update data used by the kernels
+        """
+        pass
+
+    cdef double __scalar_field_kernel(self, double x, double y, double z) nogil:
+        return 0.0
+
+    cdef Vector3 __vector_field_kernel(self, double x, double y, double z) nogil:
+        cdef:
+            Vector3 v
+        v.x = 0.0
+        v.y = 0.0
+        v.z = 0.0
+        return v
+
+    def evaluate_scalar(self, xyz, out=None):
+        """
+        Calculates scalar field value at points xyz with precision selected by xyz dtype.
+        For float32 input the points are read and the values are stored in single precision,
+        while the arithmetic of the field kernels is done in double precision, so the result differs
+        from the double precision one only by the float32 rounding of the input coordinates and of the output
+        (relative error of about 1e-7 away from singularities of the field).
+        :param xyz: array of points shaped (..., 3)
+        :param out: optional preallocated C-contiguous output array shaped (...) of the same dtype
+        :return: scalar values array
+        """
+        points, values, out = _evaluation_buffers(xyz, out, False)
+        if uses_kernel(self):
+            self.__prepare_kernel()
+            if points.dtype == np.float32:
+                __scalar_field_points[float](self, points, values)
+            else:
+                __scalar_field_points[double](self, points, values)
+        else:
+            values[:] = self.scalar_field(np.asarray(points, dtype=np.double))
+        return out
+
+    def evaluate_vector(self, xyz, out=None):
+        """
+        Calculates vector field value at points xyz with precision selected by xyz dtype.
+        Precision notes of evaluate_scalar method apply.
+        :param xyz: array of points shaped (..., 3)
+        :param out: optional preallocated C-contiguous output array shaped (..., 3) of the same dtype
+        :return: vector field values array
+        """
+        points, values, out = _evaluation_buffers(xyz, out, True)
+        if uses_kernel(self):
+            self.__prepare_kernel()
+            if points.dtype == np.float32:
+                __vector_field_points[float](self, points, values)
+            else:
+                __vector_field_points[double](self, points, values)
+        else:
+            values[:] = self.vector_field(np.asarray(points, dtype=np.double))
+        return out
+
+    def evaluate_chunks(self, points, int chunk_size=8192, out=None, bint vector=False):
+        """
+        Calculates scalar or vector field values for huge point sets block by block.
+        Points are read into reused buffers of chunk_size points and the values are written to out,
+        so peak memory stays O(chunk_size) regardless of the total number of points.
+        :param points: array-like (N, 3) supporting slicing (e.g. np.memmap) or iterable of (n, 3) blocks
+        :param chunk_size: number of points processed per block
+        :param out: output array shaped (N,) for scalar or (N, 3) for vector field (e.g. np.memmap),
+        allocated if None for array-like points, required for iterable of blocks
+        :param vector: evaluate vector field instead of scalar field
+        :return: out array
+        """
+        if chunk_size < 1:
+            raise ValueError('chunk_size must be positive')
+        is_array = hasattr(points, 'shape') and hasattr(points, 'dtype')
+        if out is None:
+            if not is_array:
+                raise ValueError('out array must be provided for iterable of blocks')
+            dtype = np.float32 if points.dtype == np.float32 else np.double
+            out = np.empty((points.shape[0], 3), dtype=dtype) if vector else np.empty(points.shape[0], dtype=dtype)
+        elif is_array and out.shape[0] != points.shape[0]:
+            raise ValueError('out must have the same length as points')
+        cdef Py_ssize_t n, position = 0, length = out.shape[0]
+        dtype = None
+        values_buffer = None
+        for block in _point_blocks(points, chunk_size):
+            if dtype is None:
+                dtype = np.float32 if block.dtype == np.float32 else np.double
+                points_buffer = np.empty((chunk_size, 3), dtype=dtype)
+            n = block.shape[0]
+            if position + n > length:
+                raise ValueError('out is shorter than the number of points')
+            np.copyto(points_buffer[:n], block, casting='unsafe')
+            # values are evaluated directly into out unless its slice can not serve as the output buffer
+            values = out[position:position + n]
+            direct = isinstance(values, np.ndarray) and values.dtype == dtype and values.flags.c_contiguous
+            if not direct:
+                if values_buffer is None:
+                    values_buffer = np.empty((chunk_size, 3), dtype=dtype) if vector \
+                        else np.empty(chunk_size, dtype=dtype)
+                values = values_buffer[:n]
+            if vector:
+                self.evaluate_vector(points_buffer[:n], out=values)
+            else:
+                self.evaluate_scalar(points_buffer[:n], out=values)
+            if not direct:
+                out[position:position + n] = values
+            position += n
+        if position != length:
+            raise ValueError('out is longer than the number of points')
+        return out
+
+    def iterate_chunks(self, points, int chunk_size=8192, bint vector=False):
+        """
+        Generator of scalar or vector field values for a stream of points. Yields values array
+        for each block of at most chunk_size points.
+        :param points: array-like (N, 3) supporting slicing (e.g. np.memmap) or iterable of (n, 3) blocks
+        :param chunk_size: number of points processed per block
+        :param vector: evaluate vector field instead of scalar field
+        """
+        if chunk_size < 1:
+            raise ValueError('chunk_size must be positive')
+        for block in _point_blocks(points, chunk_size):
+            if vector:
+                yield self.evaluate_vector(block)
+            else:
+                yield self.evaluate_scalar(block)
+
     @boundscheck(False)
     @wraparound(False)
     cdef double[:] __points_scalar(self, double[:, :] xyz, double value):
@@ -154,6 +371,12 @@ cdef class ConstantScalarConservativeField(Field):
     def potential(self, double potential):
         self.__potential = potential
 
+    cdef bint __kernel_available(self):
+        return True
+
+    cdef double __scalar_field_kernel(self, double x, double y, double z) nogil:
+        return self.__potential
+
     cpdef double scalar_field_point(self, double[:] xyz):
         return self.__potential
 
@@ -175,6 +398,24 @@ cdef class ConstantVectorConservativeField(Field):
     def potential(self, double[:] potential):
         self.__potential = potential
 
+    cdef bint __kernel_available(self):
+        return True
+
+    @boundscheck(False)
+    @wraparound(False)
+    cdef double __scalar_field_kernel(self, double x, double y, double z) nogil:
+        return x * self.__potential[0] + y * self.__potential[1] + z * self.__potential[2]
+
+    @boundscheck(False)
+    @wraparound(False)
+    cdef Vector3 __vector_field_kernel(self, double x, double y, double z) nogil:
+        cdef:
+            Vector3 v
+        v.x = self.__potential[0]
+        v.y = self.__potential[1]
+        v.z = self.__potential[2]
+        return v
+
     cpdef double scalar_field_point(self, double[:] xyz):
         return xyz[0] * self.__potential[0] + xyz[1] * self.__potential[1] + xyz[2] * self.__potential[2]
 
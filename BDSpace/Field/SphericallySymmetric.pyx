@@ -7,6 +7,7 @@ from libc.math cimport fabs, fmod, sqrt, M_PI
 from cpython.array cimport array, clone
 
 from .Field cimport Field
+from BDSpace.Coordinates.transforms cimport Vector3
 from BDSpace.Coordinates.transforms cimport cartesian_to_spherical_point, cartesian_to_spherical
 from BDSpace.Coordinates.transforms cimport spherical_to_cartesian_point, spherical_to_cartesian
 
@@ -66,6 +67,27 @@ cdef class SphericallySymmetric(Field):
                 result[i] = self.vector_field_r_law(r[i])
         return result
 
+    cdef bint __kernel_available(self):
+        return True
+
+    cdef double __scalar_field_kernel(self, double x, double y, double z) nogil:
+        return self.scalar_field_r_law(sqrt(x * x + y * y + z * z))
+
+    cdef Vector3 __vector_field_kernel(self, double x, double y, double z) nogil:
+        cdef:
+            Vector3 v
+            double r = sqrt(x * x + y * y + z * z)
+            double mag = self.vector_field_r_law(r)
+        if r > 0:
+            v.x = mag * x / r
+            v.y = mag * y / r
+            v.z = mag * z / r
+        else:
+            v.x = 0.0
+            v.y = 0.0
+            v.z = mag
+        return v
+
     @boundscheck(False)
     @wraparound(False)
     cpdef double scalar_field_point(self, double[:] xyz):
@@ -1,5 +1,17 @@
+from libc.stdint cimport intptr_t
+
 from .Field cimport Field
 
 cdef class SuperposedField(Field):
     cdef:
         list __fields
+        list __plan_fields
+        list __plan_generations
+        list __plan_kernel
+        list __plan_fallback
+        unsigned long __plan_generation
+        double[:, :, :] __plan_m
+        double[:, :] __plan_t
+        intptr_t[:] __plan_objects
+
+    cdef void __update_plan(self)
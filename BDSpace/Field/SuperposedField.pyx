@@ -1,21 +1,30 @@
+import numpy as np
+
 from cython import boundscheck, wraparound
 from cython.parallel import prange
 
 from cpython.array cimport array, clone
+from cpython.ref cimport PyObject
+from libc.stdint cimport intptr_t
 
 from BDSpace.Coordinates.transforms cimport cartesian_to_spherical_point, cartesian_to_spherical
 from BDSpace.Coordinates.transforms cimport spherical_to_cartesian_point, spherical_to_cartesian
-from .Field cimport Field
+from BDSpace.Coordinates.transforms cimport Vector3
+from .Field cimport Field, uses_kernel
 
 
 cdef class SuperposedField(Field):
 
     def __init__(self, str name, list fields):
         self.__fields = []
+        self.__plan_fields = None
         self.type = None
         self.fields = fields
         super(SuperposedField, self).__init__(name, self.type)
 
+    cdef bint __kernel_available(self):
+        return False
+
     @property
     def fields(self):
         return self.__fields
@@ -31,6 +40,54 @@ cdef class SuperposedField(Field):
             if self.type != field.type:
                 raise ValueError('All fields must be iterable of Field class instances')
             self.__fields.append(field)
+        self.__plan_fields = None
+
+    cdef void __update_plan(self):
+        """
+        Updates superposition plan. Fields with nogil kernels get precomputed transforms (m, t)
+        from the local coordinates of superposed field to the local coordinates of the field,
+        so that xyz_field = xyz * m + t. Other fields are evaluated with their scalar_field and vector_field methods.
+        Kernel fields are also stored as borrowed pointers (kept alive by the plan list) to be called without GIL.
+        The plan is rebuilt only when the list of fields changes or any of the fields
+        (or the superposed field itself) moves.
+        """
+        cdef:
+            int k, n_fields = len(self.__fields)
+            bint valid
+            Field field
+            list generations = [field.global_generation for field in self.__fields]
+            unsigned long generation = self.global_generation
+        valid = self.__plan_fields is not None and generation == self.__plan_generation \
+            and len(self.__plan_fields) == n_fields and generations == self.__plan_generations
+        if valid:
+            for k in range(n_fields):
+                if self.__plan_fields[k] is not self.__fields[k]:
+                    valid = False
+                    break
+        if valid:
+            return
+        self.__plan_fields = list(self.__fields)
+        self.__plan_generations = generations
+        self.__plan_generation = generation
+        self.__plan_kernel = []
+        self.__plan_fallback = []
+        global_basis = self.basis_in_global_coordinate_system()
+        basis = np.asarray(global_basis.basis)
+        origin = np.asarray(global_basis.origin)
+        plan_m = []
+        plan_t = []
+        for field in self.__fields:
+            if uses_kernel(field):
+                field_basis = field.basis_in_global_coordinate_system()
+                field_rotation = np.asarray(field_basis.basis).T
+                plan_m.append(np.dot(basis, field_rotation))
+                plan_t.append(np.dot(origin - np.asarray(field_basis.origin), field_rotation))
+                self.__plan_kernel.append(field)
+            else:
+                self.__plan_fallback.append(field)
+        self.__plan_m = np.array(plan_m, dtype=np.double).reshape((-1, 3, 3))
+        self.__plan_t = np.array(plan_t, dtype=np.double).reshape((-1, 3))
+        self.__plan_objects = np.array([<intptr_t> <PyObject*> field for field in self.__plan_kernel], dtype=np.intp)
 
     @boundscheck(False)
     @wraparound(False)
@@ -59,15 +116,33 @@ cdef class SuperposedField(Field):
         :return: scalar values array
         """
         cdef:
-            int i, j, s = xyz.shape[0], n_fields = len(self.__fields)
-            double[:, :] global_xyz = self.to_global_coordinate_system(xyz)
-            double[:] total_field = self.__points_scalar(global_xyz, 0.0)
+            int i, j, k, s = xyz.shape[0], n_kernel
+            double x, y, z
+            double[:, :] global_xyz
+            double[:] total_field = self.__points_scalar(xyz, 0.0)
             double[:] field_contribution
-        for j in range(n_fields):
-            field_contribution = self.__fields[j].scalar_field(self.__fields[j].to_local_coordinate_system(global_xyz))
-            with nogil:
-                for i in prange(s):
-                    total_field[i] += field_contribution[i]
+            Field field
+        self.__update_plan()
+        n_kernel = len(self.__plan_kernel)
+        for field in self.__plan_kernel:
+            field.__prepare_kernel()
+        with nogil:
+            for i in prange(s):
+                for k in range(n_kernel):
+                    x = xyz[i, 0] * self.__plan_m[k, 0, 0] + xyz[i, 1] * self.__plan_m[k, 1, 0] \
+                        + xyz[i, 2] * self.__plan_m[k, 2, 0] + self.__plan_t[k, 0]
+                    y = xyz[i, 0] * self.__plan_m[k, 0, 1] + xyz[i, 1] * self.__plan_m[k, 1, 1] \
+                        + xyz[i, 2] * self.__plan_m[k, 2, 1] + self.__plan_t[k, 1]
+                    z = xyz[i, 0] * self.__plan_m[k, 0, 2] + xyz[i, 1] * self.__plan_m[k, 1, 2] \
+                        + xyz[i, 2] * self.__plan_m[k, 2, 2] + self.__plan_t[k, 2]
+                    total_field[i] += (<Field> <PyObject*> self.__plan_objects[k]).__scalar_field_kernel(x, y, z)
+        if self.__plan_fallback:
+            global_xyz = self.to_global_coordinate_system(xyz)
+            for field in self.__plan_fallback:
+                field_contribution = field.scalar_field(field.to_local_coordinate_system(global_xyz))
+                with nogil:
+                    for i in prange(s):
+                        total_field[i] += field_contribution[i]
         return total_field
 
     @boundscheck(False)
@@ -103,7 +178,7 @@ cdef class SuperposedField(Field):
             double[:] total_field = self.__points_scalar(global_xyz, 0.0)
             double[:] field_contribution
         for j in range(n_fields):
-            local_rtp = cartesian_to_spherical(self.__fields[j].to_local_coordinate_system(global_xyz))
+            local_rtp = cartesian_to_spherical[double](self.__fields[j].to_local_coordinate_system(global_xyz))
             field_contribution = self.__fields[j].scalar_field_polar(local_rtp)
             with nogil:
                 for i in prange(s):
@@ -142,17 +217,39 @@ cdef class SuperposedField(Field):
         :return: vector field values array
         """
         cdef:
-            int i, j, k, s = xyz.shape[0], n_fields = len(self.__fields)
+            int i, j, k, s = xyz.shape[0], n_kernel
+            double x, y, z
+            Vector3 v
             array[double] template = array('d')
             double[:, :] field_contribution
             double[:, :] total_field = self.__points_vector(xyz, clone(template, 3, zero=True))
-            double[:, :] global_xyz = self.to_global_coordinate_system(xyz)
-        for k in range(n_fields):
-            field_contribution = self.__fields[k].vector_field(self.__fields[k].to_local_coordinate_system(global_xyz))
-            with nogil:
-                for i in prange(s):
-                    for j in prange(3):
-                        total_field[i][j] += field_contribution[i][j]
+            double[:, :] global_xyz
+            Field field
+        self.__update_plan()
+        n_kernel = len(self.__plan_kernel)
+        for field in self.__plan_kernel:
+            field.__prepare_kernel()
+        with nogil:
+            for i in prange(s):
+                for k in range(n_kernel):
+                    x = xyz[i, 0] * self.__plan_m[k, 0, 0] + xyz[i, 1] * self.__plan_m[k, 1, 0] \
+                        + xyz[i, 2] * self.__plan_m[k, 2, 0] + self.__plan_t[k, 0]
+                    y = xyz[i, 0] * self.__plan_m[k, 0, 1] + xyz[i, 1] * self.__plan_m[k, 1, 1] \
+                        + xyz[i, 2] * self.__plan_m[k, 2, 1] + self.__plan_t[k, 1]
+                    z = xyz[i, 0] * self.__plan_m[k, 0, 2] + xyz[i, 1] * self.__plan_m[k, 1, 2] \
+                        + xyz[i, 2] * self.__plan_m[k, 2, 2] + self.__plan_t[k, 2]
+                    v = (<Field> <PyObject*> self.__plan_objects[k]).__vector_field_kernel(x, y, z)
+                    total_field[i, 0] += v.x
+                    total_field[i, 1] += v.y
+                    total_field[i, 2] += v.z
+        if self.__plan_fallback:
+            global_xyz = self.to_global_coordinate_system(xyz)
+            for field in self.__plan_fallback:
+                field_contribution = field.vector_field(field.to_local_coordinate_system(global_xyz))
+                with nogil:
+                    for i in prange(s):
+                        for j in range(3):
+                            total_field[i, j] += field_contribution[i, j]
         return total_field
 
     @boundscheck(False)
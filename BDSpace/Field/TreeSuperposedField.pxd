@@ -0,0 +1,16 @@
+from .SuperposedField cimport SuperposedField
+from ._octree cimport Octree
+
+
+cdef class TreeSuperposedField(SuperposedField):
+    cdef:
+        double __theta
+        int __leaf_size
+        Octree __tree
+        list __tree_fields
+        unsigned long __tree_generation
+        double[:, :] __tree_state
+
+    cdef void __update_tree(self)
+    cpdef double[:] scalar_field_error(self, double[:, :] xyz)
+    cpdef double[:] vector_field_error(self, double[:, :] xyz)
@@ -0,0 +1,213 @@
+import numpy as np
+
+from cython import boundscheck, wraparound
+from cython.parallel import prange
+
+from cpython.array cimport array, clone
+
+from BDSpace.Coordinates.transforms cimport Vector3
+from .SuperposedField cimport SuperposedField
+from .SphericallySymmetric cimport HyperbolicPotentialSphericalConservativeField
+from ._octree cimport Octree
+
+
+cdef class TreeSuperposedField(SuperposedField):
+    """
+    Superposition of hyperbolic potential spherically symmetric fields (point sources) evaluated with
+    Barnes-Hut tree code in O(log N) operations per point instead of O(N).
+    Sources are grouped into an octree, a group of size b at distance d is approximated by its monopole,
+    dipole and quadrupole moments when b < theta * d. Opening angle theta = 0 gives the exact direct sum.
+    Unlike SuperposedField the vector field is returned in the local coordinate system of the superposition
+    (for sources with unrotated coordinate systems both are the same).
+    """
+
+    def __init__(self, str name, list fields, double theta=0.5, int leaf_size=16):
+        self.__tree = None
+        self.theta = theta
+        self.leaf_size = leaf_size
+        super(TreeSuperposedField, self).__init__(name, fields)
+
+    @property
+    def fields(self):
+        return self.__fields
+
+    @fields.setter
+    def fields(self, list fields):
+        for field in fields:
+            if not isinstance(field, HyperbolicPotentialSphericalConservativeField):
+                raise ValueError('Fields must be iterable of HyperbolicPotentialSphericalConservativeField instances')
+        SuperposedField.fields.__set__(self, fields)
+        self.__tree = None
+
+    @property
+    def theta(self):
+        return self.__theta
+
+    @theta.setter
+    def theta(self, double theta):
+        if theta < 0 or theta >= 1:
+            raise ValueError('Opening angle theta must be in range [0, 1)')
+        self.__theta = theta
+
+    @property
+    def leaf_size(self):
+        return self.__leaf_size
+
+    @leaf_size.setter
+    def leaf_size(self, int leaf_size):
+        if leaf_size < 1:
+            raise ValueError('leaf_size must be positive')
+        self.__leaf_size = leaf_size
+        self.__tree = None
+
+    @property
+    def tree(self):
+        self.__update_tree()
+        return self.__tree
+
+    @boundscheck(False)
+    @wraparound(False)
+    cdef void __update_tree(self):
+        """
+        Rebuilds the tree if the list of fields changed or any of the sources (or the superposition) moved,
+        or changed its charge or radius.
+        """
+        cdef:
+            int k, n = len(self.__fields)
+            bint valid
+            unsigned long generation = self.global_generation
+            HyperbolicPotentialSphericalConservativeField field
+            double[:, :] state = np.empty((n, 3), dtype=np.double)
+        valid = self.__tree is not None and generation == self.__tree_generation and n == len(self.__tree_fields)
+        for k in range(n):
+            field = self.__fields[k]
+            field.__global_basis()
+            state[k, 0] = field.__global_generation
+            state[k, 1] = field.__a
+            state[k, 2] = field.__r
+            if valid:
+                valid = field is self.__tree_fields[k] and state[k, 0] == self.__tree_state[k, 0] \
+                        and state[k, 1] == self.__tree_state[k, 1] and state[k, 2] == self.__tree_state[k, 2]
+        if valid:
+            return
+        global_xyz = np.empty((n, 3), dtype=np.double)
+        for k in range(n):
+            field = self.__fields[k]
+            global_xyz[k] = field.__global_basis().origin
+        self.__tree = Octree(self.to_local_coordinate_system(global_xyz),
+                             np.array(state[:, 1]), np.array(state[:, 2]), self.__leaf_size)
+        self.__tree_fields = list(self.__fields)
+        self.__tree_state = state
+        self.__tree_generation = generation
+
+    cdef bint __kernel_available(self):
+        return True
+
+    cdef void __prepare_kernel(self):
+        self.__update_tree()
+
+    cdef double __scalar_field_kernel(self, double x, double y, double z) nogil:
+        return self.__tree.potential(x, y, z, self.__theta, NULL)
+
+    cdef Vector3 __vector_field_kernel(self, double x, double y, double z) nogil:
+        return self.__tree.field(x, y, z, self.__theta, NULL)
+
+    cpdef double scalar_field_point(self, double[:] xyz):
+        """
+        Calculates scalar field value at point xyz
+        :param xyz: array of cartesian coordinates of the point
+        :return: scalar field value
+        """
+        self.__update_tree()
+        return self.__tree.potential(xyz[0], xyz[1], xyz[2], self.__theta, NULL)
+
+    @boundscheck(False)
+    @wraparound(False)
+    cpdef double[:] scalar_field(self, double[:, :] xyz):
+        """
+        Calculates scalar field value at points xyz
+        :param xyz: array of N points with shape (N, 3)
+        :return: scalar values array
+        """
+        cdef:
+            int i, s = xyz.shape[0]
+            array[double] result, template = array('d')
+        self.__update_tree()
+        result = clone(template, s, zero=False)
+        with nogil:
+            for i in prange(s):
+                result[i] = self.__tree.potential(xyz[i, 0], xyz[i, 1], xyz[i, 2], self.__theta, NULL)
+        return result
+
+    @boundscheck(False)
+    @wraparound(False)
+    cpdef double[:] scalar_field_error(self, double[:, :] xyz):
+        """
+        Calculates upper bound of the tree approximation error of scalar field at points xyz
+        :param xyz: array of N points with shape (N, 3)
+        :return: array of errors
+        """
+        cdef:
+            int i, s = xyz.shape[0]
+            array[double] result, template = array('d')
+        self.__update_tree()
+        result = clone(template, s, zero=True)
+        with nogil:
+            for i in prange(s):
+                self.__tree.potential(xyz[i, 0], xyz[i, 1], xyz[i, 2], self.__theta, &result.data.as_doubles[i])
+        return result
+
+    cpdef double[:] vector_field_point(self, double[:] xyz):
+        """
+        Calculates vector field value at point xyz
+        :param xyz: array of cartesian coordinates of the point
+        :return: vector field value
+        """
+        cdef:
+            Vector3 v
+            array[double] result = clone(array('d'), 3, zero=False)
+        self.__update_tree()
+        v = self.__tree.field(xyz[0], xyz[1], xyz[2], self.__theta, NULL)
+        result[0] = v.x
+        result[1] = v.y
+        result[2] = v.z
+        return result
+
+    @boundscheck(False)
+    @wraparound(False)
+    cpdef double[:, :] vector_field(self, double[:, :] xyz):
+        """
+        Calculates vector field value at points xyz
+        :param xyz: array of N points with shape (N, 3)
+        :return: vector field values array
+        """
+        cdef:
+            int i, s = xyz.shape[0]
+            Vector3 v
+            double[:, :] result = np.empty((s, 3), dtype=np.double)
+        self.__update_tree()
+        with nogil:
+            for i in prange(s):
+                v = self.__tree.field(xyz[i, 0], xyz[i, 1], xyz[i, 2], self.__theta, NULL)
+                result[i, 0] = v.x
+                result[i, 1] = v.y
+                result[i, 2] = v.z
+        return result
+
+    @boundscheck(False)
+    @wraparound(False)
+    cpdef double[:] vector_field_error(self, double[:, :] xyz):
+        """
+        Calculates estimate of the tree approximation error of vector field magnitude at points xyz
+        :param xyz: array of N points with shape (N, 3)
+        :return: array of errors
+        """
+        cdef:
+            int i, s = xyz.shape[0]
+            array[double] result, template = array('d')
+        self.__update_tree()
+        result = clone(template, s, zero=True)
+        with nogil:
+            for i in prange(s):
+                self.__tree.field(xyz[i, 0], xyz[i, 1], xyz[i, 2], self.__theta, &result.data.as_doubles[i])
+        return result
@@ -1,9 +1,10 @@
 from .Field import Field, ConstantScalarConservativeField, ConstantVectorConservativeField
 from .SphericallySymmetric import SphericallySymmetric, HyperbolicPotentialSphericalConservativeField
 from .SuperposedField import SuperposedField
+from .TreeSuperposedField import TreeSuperposedField
 from .CurveField import CurveField, HyperbolicPotentialCurveConservativeField
 
 __all__ = ['Field', 'ConstantScalarConservativeField', 'ConstantVectorConservativeField',
            'SphericallySymmetric', 'HyperbolicPotentialSphericalConservativeField',
-           'SuperposedField',
+           'SuperposedField', 'TreeSuperposedField',
            'CurveField', 'HyperbolicPotentialCurveConservativeField']
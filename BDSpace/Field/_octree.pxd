@@ -0,0 +1,24 @@
+from BDSpace.Coordinates.transforms cimport Vector3
+
+
+cdef class Octree(object):
+    cdef:
+        double[:, :] __points
+        double[:] __charges
+        double[:] __radii
+        int[:] __node_start
+        int[:] __node_count
+        int[:] __node_child_start
+        int[:] __node_child_count
+        double[:, :] __node_center
+        double[:, :] __node_dipole
+        double[:, :] __node_quadrupole
+        double[:] __node_charge
+        double[:] __node_abs_charge
+        double[:] __node_size
+        double[:] __node_core
+
+    cdef void __compute_moments(self)
+    cdef inline double __quadrupole_form(self, int node, double x, double y, double z) nogil
+    cdef double potential(self, double x, double y, double z, double theta, double* error) nogil
+    cdef Vector3 field(self, double x, double y, double z, double theta, double* error) nogil
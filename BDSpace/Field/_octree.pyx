@@ -0,0 +1,253 @@
+import numpy as np
+
+from cython import boundscheck, wraparound
+
+from libc.math cimport sqrt
+
+from BDSpace.Coordinates.transforms cimport Vector3
+
+
+# Maximal depth of the tree, deeper nodes are left as leaves (e.g. for coincident sources)
+DEF MAX_DEPTH = 48
+# Traversal stack size, every level pushes at most 8 children
+DEF STACK_SIZE = 8 * MAX_DEPTH + 1
+
+
+cdef class Octree(object):
+    """
+    Octree of point sources with charges q and core radii R for Barnes-Hut evaluation of
+    superposition of hyperbolic potentials q / max(d, R) and fields q * d_vec / d^3 (zero inside the core).
+    Every node keeps monopole, dipole and quadrupole moments around the center of absolute charge,
+    the size (maximal distance of node sources from the center) and the maximal core radius.
+    A node of size b at distance d from the target point is approximated by its moments when b < theta * d
+    and the target point is outside cores of all node sources, otherwise its children (or sources of a leaf)
+    are visited. Truncation error of the potential of an approximated node is bounded by
+    A * (b / d)^3 / (d - b), where A is the node absolute charge,
+    the field error is estimated as A * (b / d)^3 / (d - b)^2.
+    """
+
+    def __init__(self, double[:, :] points, double[:] charges, double[:] radii, int leaf_size=16):
+        cdef:
+            int n = points.shape[0]
+            int node, start, count, depth, child
+        if charges.shape[0] != n or radii.shape[0] != n:
+            raise ValueError('points, charges and radii must have the same length')
+        if leaf_size < 1:
+            raise ValueError('leaf_size must be positive')
+        xyz = np.array(points, dtype=np.double).reshape((n, 3))
+        q = np.array(charges, dtype=np.double)
+        r = np.array(radii, dtype=np.double)
+        permutation = np.arange(n)
+        starts, counts, child_starts, child_counts, boxes = [0], [n], [0], [0], []
+        if n > 0:
+            lower = xyz.min(axis=0)
+            upper = xyz.max(axis=0)
+            boxes.append(((lower + upper) / 2, max(np.max(upper - lower) / 2, 1e-300), 0))
+        else:
+            boxes.append((np.zeros(3), 0.0, 0))
+        node = 0
+        while node < len(starts):
+            start = starts[node]
+            count = counts[node]
+            center, half, depth = boxes[node]
+            child_starts[node] = len(starts)
+            if count > leaf_size and depth < MAX_DEPTH:
+                index = permutation[start:start + count]
+                octant = np.dot(xyz[index] > center, [1, 2, 4])
+                order = np.argsort(octant, kind='stable')
+                permutation[start:start + count] = index[order]
+                octants = np.bincount(octant, minlength=8)
+                offset = start
+                for child in range(8):
+                    if octants[child] > 0:
+                        shift = np.array([child & 1, (child >> 1) & 1, (child >> 2) & 1]) - 0.5
+                        starts.append(offset)
+                        counts.append(octants[child])
+                        child_starts.append(0)
+                        child_counts.append(0)
+                        boxes.append((center + shift * half, half / 2, depth + 1))
+                        offset += octants[child]
+                child_counts[node] = len(starts) - child_starts[node]
+            node += 1
+        self.__points = xyz[permutation]
+        self.__charges = q[permutation]
+        self.__radii = r[permutation]
+        self.__node_start = np.array(starts, dtype=np.intc)
+        self.__node_count = np.array(counts, dtype=np.intc)
+        self.__node_child_start = np.array(child_starts, dtype=np.intc)
+        self.__node_child_count = np.array(child_counts, dtype=np.intc)
+        self.__compute_moments()
+
+    cdef void __compute_moments(self):
+        cdef:
+            int node, n_nodes = self.__node_start.shape[0]
+        xyz = np.asarray(self.__points)
+        q = np.asarray(self.__charges)
+        r = np.asarray(self.__radii)
+        center = np.zeros((n_nodes, 3), dtype=np.double)
+        dipole = np.zeros((n_nodes, 3), dtype=np.double)
+        quadrupole = np.zeros((n_nodes, 6), dtype=np.double)
+        charge = np.zeros(n_nodes, dtype=np.double)
+        abs_charge = np.zeros(n_nodes, dtype=np.double)
+        size = np.zeros(n_nodes, dtype=np.double)
+        core = np.zeros(n_nodes, dtype=np.double)
+        for node in range(n_nodes):
+            start = self.__node_start[node]
+            stop = start + self.__node_count[node]
+            if stop == start:
+                continue
+            node_xyz = xyz[start:stop]
+            node_q = q[start:stop]
+            weights = np.abs(node_q)
+            abs_charge[node] = np.sum(weights)
+            if abs_charge[node] > 0:
+                center[node] = np.dot(weights, node_xyz) / abs_charge[node]
+            else:
+                center[node] = np.mean(node_xyz, axis=0)
+            charge[node] = np.sum(node_q)
+            shift = node_xyz - center[node]
+            dipole[node] = np.dot(node_q, shift)
+            # traceless quadrupole sum(q * (3 * y * y^T - y^2 * I)) stored as xx, yy, zz, xy, xz, yz
+            tensor = 3 * np.dot(shift.T * node_q, shift) - np.eye(3) * np.dot(node_q, np.sum(shift ** 2, axis=1))
+            quadrupole[node] = tensor[(0, 1, 2, 0, 0, 1), (0, 1, 2, 1, 2, 2)]
+            size[node] = np.sqrt(np.max(np.sum(shift ** 2, axis=1)))
+            core[node] = np.max(r[start:stop])
+        self.__node_center = center
+        self.__node_dipole = dipole
+        self.__node_quadrupole = quadrupole
+        self.__node_charge = charge
+        self.__node_abs_charge = abs_charge
+        self.__node_size = size
+        self.__node_core = core
+
+    @property
+    def size(self):
+        return self.__points.shape[0]
+
+    @property
+    def nodes(self):
+        return self.__node_start.shape[0]
+
+    @boundscheck(False)
+    @wraparound(False)
+    cdef inline double __quadrupole_form(self, int node, double x, double y, double z) nogil:
+        """
+        Calculates r * Q * r for the quadrupole tensor Q of the node
+        """
+        return self.__node_quadrupole[node, 0] * x * x + self.__node_quadrupole[node, 1] * y * y \
+            + self.__node_quadrupole[node, 2] * z * z + 2 * (self.__node_quadrupole[node, 3] * x * y
+                                                              + self.__node_quadrupole[node, 4] * x * z
+                                                              + self.__node_quadrupole[node, 5] * y * z)
+
+    @boundscheck(False)
+    @wraparound(False)
+    cdef double potential(self, double x, double y, double z, double theta, double* error) nogil:
+        """
+        Calculates potential at point (x, y, z) in the coordinates of the tree.
+        Upper bound of the truncation error is added to error if it is not NULL.
+        """
+        cdef:
+            int stack[STACK_SIZE]
+            int top = 0, node, j, stop
+            double dx, dy, dz, d, d2, b, result = 0.0
+        if self.__points.shape[0] == 0:
+            return 0.0
+        stack[0] = 0
+        while top >= 0:
+            node = stack[top]
+            top -= 1
+            dx = x - self.__node_center[node, 0]
+            dy = y - self.__node_center[node, 1]
+            dz = z - self.__node_center[node, 2]
+            d2 = dx * dx + dy * dy + dz * dz
+            d = sqrt(d2)
+            b = self.__node_size[node]
+            if b < theta * d and d - b >= self.__node_core[node]:
+                result += self.__node_charge[node] / d
+                result += (self.__node_dipole[node, 0] * dx + self.__node_dipole[node, 1] * dy
+                           + self.__node_dipole[node, 2] * dz) / (d2 * d)
+                result += self.__quadrupole_form(node, dx, dy, dz) / (2 * d2 * d2 * d)
+                if error != NULL:
+                    error[0] += self.__node_abs_charge[node] * (b / d) * (b / d) * (b / d) / (d - b)
+            elif self.__node_child_count[node] > 0:
+                for j in range(self.__node_child_count[node]):
+                    top += 1
+                    stack[top] = self.__node_child_start[node] + j
+            else:
+                stop = self.__node_start[node] + self.__node_count[node]
+                for j in range(self.__node_start[node], stop):
+                    dx = x - self.__points[j, 0]
+                    dy = y - self.__points[j, 1]
+                    dz = z - self.__points[j, 2]
+                    d = sqrt(dx * dx + dy * dy + dz * dz)
+                    if d < self.__radii[j]:
+                        d = self.__radii[j]
+                    result += self.__charges[j] / d
+        return result
+
+    @boundscheck(False)
+    @wraparound(False)
+    cdef Vector3 field(self, double x, double y, double z, double theta, double* error) nogil:
+        """
+        Calculates field at point (x, y, z) in the coordinates of the tree.
+        Estimate of the truncation error of the field magnitude is added to error if it is not NULL.
+        """
+        cdef:
+            int stack[STACK_SIZE]
+            int top = 0, node, j, stop
+            double dx, dy, dz, d2, d, d3, d5, b, pr, qx, qy, qz
+            Vector3 v
+        v.x = 0.0
+        v.y = 0.0
+        v.z = 0.0
+        if self.__points.shape[0] == 0:
+            return v
+        stack[0] = 0
+        while top >= 0:
+            node = stack[top]
+            top -= 1
+            dx = x - self.__node_center[node, 0]
+            dy = y - self.__node_center[node, 1]
+            dz = z - self.__node_center[node, 2]
+            d2 = dx * dx + dy * dy + dz * dz
+            d = sqrt(d2)
+            b = self.__node_size[node]
+            if b < theta * d and d - b >= self.__node_core[node]:
+                d3 = d2 * d
+                d5 = d3 * d2
+                # monopole and dipole
+                pr = 3 * (self.__node_dipole[node, 0] * dx + self.__node_dipole[node, 1] * dy
+                          + self.__node_dipole[node, 2] * dz) / d5
+                v.x += self.__node_charge[node] * dx / d3 + pr * dx - self.__node_dipole[node, 0] / d3
+                v.y += self.__node_charge[node] * dy / d3 + pr * dy - self.__node_dipole[node, 1] / d3
+                v.z += self.__node_charge[node] * dz / d3 + pr * dz - self.__node_dipole[node, 2] / d3
+                # quadrupole
+                qx = self.__node_quadrupole[node, 0] * dx + self.__node_quadrupole[node, 3] * dy \
+                    + self.__node_quadrupole[node, 4] * dz
+                qy = self.__node_quadrupole[node, 3] * dx + self.__node_quadrupole[node, 1] * dy \
+                    + self.__node_quadrupole[node, 5] * dz
+                qz = self.__node_quadrupole[node, 4] * dx + self.__node_quadrupole[node, 5] * dy \
+                    + self.__node_quadrupole[node, 2] * dz
+                pr = 2.5 * (qx * dx + qy * dy + qz * dz) / (d5 * d2)
+                v.x += pr * dx - qx / d5
+                v.y += pr * dy - qy / d5
+                v.z += pr * dz - qz / d5
+                if error != NULL:
+                    error[0] += self.__node_abs_charge[node] * (b / d) * (b / d) * (b / d) / ((d - b) * (d - b))
+            elif self.__node_child_count[node] > 0:
+                for j in range(self.__node_child_count[node]):
+                    top += 1
+                    stack[top] = self.__node_child_start[node] + j
+            else:
+                stop = self.__node_start[node] + self.__node_count[node]
+                for j in range(self.__node_start[node], stop):
+                    dx = x - self.__points[j, 0]
+                    dy = y - self.__points[j, 1]
+                    dz = z - self.__points[j, 2]
+                    d2 = dx * dx + dy * dy + dz * dz
+                    if d2 >= self.__radii[j] * self.__radii[j] and d2 > 0:
+                        d3 = d2 * sqrt(d2)
+                        v.x += self.__charges[j] * dx / d3
+                        v.y += self.__charges[j] * dy / d3
+                        v.z += self.__charges[j] * dz / d3
+        return v
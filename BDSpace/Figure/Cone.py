@@ -2,6 +2,9 @@ import numpy as np
 
 from BDSpace.Coordinates.transforms import reduce_angle
 from BDSpace.Figure import Figure
+from BDSpace.Figure._geometry import conical_wedge_contains, conical_wedge_signed_distance
+from BDSpace.Figure._geometry import conical_wedge_intersect_rays, sector_bounding_box
+from BDSpace.Figure._sampling import quadratic_inverse, quadratic_integral, cylindrical_points, full_turn
 
 
 class ConicalWedge(Figure):
@@ -115,6 +118,82 @@ class ConicalWedge(Figure):
             surface_area -= _coaxial_cone_side_cut_area(z_cut, self.theta, self.phi, self.z_offset)
         return surface_area
 
+    def _contains(self, xyz):
+        return conical_wedge_contains(xyz, np.tan(self.theta), self.phi, min(self.z), max(self.z),
+                                      self.z_offset, self.r_min)
+
+    def _signed_distance(self, xyz):
+        return conical_wedge_signed_distance(xyz, np.tan(self.theta), self.phi, min(self.z), max(self.z),
+                                             self.z_offset, self.r_min)
+
+    def _intersect_rays(self, origins, directions):
+        return conical_wedge_intersect_rays(origins, directions, np.tan(self.theta), self.phi,
+                                            min(self.z), max(self.z), self.z_offset, self.r_min)
+
+    def _local_bounding_box(self):
+        rho_max = self.r_min + max(abs(min(self.z)), abs(max(self.z))) * np.tan(self.theta)
+        return sector_bounding_box(rho_max, self.phi, min(self.z), max(self.z))
+
+    def _profile(self):
+        """
+        Outer and inner radius of the wedge as functions of z and breakpoints of the functions
+        """
+        tan_theta, z_offset, r_min = np.tan(self.theta), self.z_offset, self.r_min
+        z_min, z_max = min(self.z), max(self.z)
+
+        def rho_outer(z):
+            return r_min + np.abs(z) * tan_theta
+
+        def rho_inner(z):
+            return np.maximum(rho_outer(z) - z_offset * tan_theta, 0.0)
+
+        z_cut = z_offset - r_min / tan_theta if tan_theta > 0 else -np.inf
+        edges = np.clip([z_min, -z_cut, 0.0, z_cut, z_max], z_min, z_max)
+        return rho_outer, rho_inner, edges
+
+    def _sample_volume(self, u):
+        rho_outer, rho_inner, edges = self._profile()
+        z = quadratic_inverse(lambda x: rho_outer(x) ** 2 - rho_inner(x) ** 2, edges, u[:, 0])
+        rho = np.sqrt(rho_inner(z) ** 2 + u[:, 1] * (rho_outer(z) ** 2 - rho_inner(z) ** 2))
+        return cylindrical_points(rho, u[:, 2] * self.phi, z)
+
+    def _surface_faces(self):
+        rho_outer, rho_inner, edges = self._profile()
+        phi = self.phi
+        slope = np.sqrt(1 + np.tan(self.theta) ** 2)
+
+        def lateral(rho):
+            return phi * slope * quadratic_integral(rho, edges), \
+                lambda u: _lateral_points(rho, edges, u, phi)
+
+        def base(z):
+            return phi / 2 * (rho_outer(z) ** 2 - rho_inner(z) ** 2), \
+                lambda u: cylindrical_points(np.sqrt(rho_inner(z) ** 2 + u[:, 0] * (rho_outer(z) ** 2
+                                                                                   - rho_inner(z) ** 2)),
+                                             u[:, 1] * phi, z)
+
+        def width(z):
+            return rho_outer(z) - rho_inner(z)
+
+        def side(angle):
+            return quadratic_integral(width, edges), \
+                lambda u: _side_points(rho_inner, width, edges, u, angle)
+
+        faces = [lateral(rho_outer), lateral(rho_inner), base(edges[0]), base(edges[-1])]
+        if not full_turn(phi):
+            faces += [side(0.0), side(phi)]
+        return faces
+
+
+def _lateral_points(rho, edges, u, phi):
+    z = quadratic_inverse(rho, edges, u[:, 0])
+    return cylindrical_points(rho(z), u[:, 1] * phi, z)
+
+
+def _side_points(rho_inner, width, edges, u, angle):
+    z = quadratic_inverse(width, edges, u[:, 0])
+    return cylindrical_points(rho_inner(z) + u[:, 1] * width(z), angle, z)
+
 
 def _cone_volume(h, theta, phi):
     if h > 0:
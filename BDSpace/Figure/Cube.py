@@ -1,6 +1,8 @@
 import numpy as np
 
 from BDSpace.Figure import Figure
+from BDSpace.Figure._geometry import parallelepiped_contains, parallelepiped_signed_distance
+from BDSpace.Figure._geometry import parallelepiped_intersect_rays
 
 
 class Parallelepiped(Figure):
@@ -41,6 +43,31 @@ class Parallelepiped(Figure):
         p3 = np.cross(self.vectors[1], self.vectors[2])
         return 2 * (np.sqrt(np.dot(p1, p1)) + np.sqrt(np.dot(p2, p2)) + np.sqrt(np.dot(p3, p3)))
 
+    def _contains(self, xyz):
+        return parallelepiped_contains(xyz, np.linalg.inv(self.vectors))
+
+    def _signed_distance(self, xyz):
+        return parallelepiped_signed_distance(xyz, self.vectors, np.linalg.inv(self.vectors))
+
+    def _intersect_rays(self, origins, directions):
+        return parallelepiped_intersect_rays(origins, directions, np.linalg.inv(self.vectors))
+
+    def _local_bounding_box(self):
+        corners = np.dot(np.array([[i, j, k] for i in (0, 1) for j in (0, 1) for k in (0, 1)]), self.vectors)
+        return np.array([corners.min(axis=0), corners.max(axis=0)])
+
+    def _sample_volume(self, u):
+        return np.dot(u, self.vectors)
+
+    def _surface_faces(self):
+        faces = []
+        for k in range(3):
+            i, j = [axis for axis in range(3) if axis != k]
+            area = np.linalg.norm(np.cross(self.vectors[i], self.vectors[j]))
+            for offset in (np.zeros(3), self.vectors[k]):
+                faces.append((area, lambda u, offset=offset, v=self.vectors[[i, j]]: offset + np.dot(u, v)))
+        return faces
+
 
 class ParallelepipedTriclinic(Parallelepiped):
 
@@ -2,6 +2,9 @@ import numpy as np
 
 from BDSpace.Coordinates.transforms import reduce_angle
 from BDSpace.Figure import Figure
+from BDSpace.Figure._geometry import cylindrical_wedge_contains, cylindrical_wedge_signed_distance
+from BDSpace.Figure._geometry import cylindrical_wedge_intersect_rays, sector_bounding_box
+from BDSpace.Figure._sampling import cylindrical_points, full_turn
 
 
 class CylindricalWedge(Figure):
@@ -73,6 +76,48 @@ class CylindricalWedge(Figure):
             s_cut = 2 * h * (self.r_outer - self.r_inner)
         return s_outer + s_inner + s_bases + s_cut
 
+    def _contains(self, xyz):
+        return cylindrical_wedge_contains(xyz, self.r_inner, self.r_outer, self.phi, min(self.z), max(self.z))
+
+    def _signed_distance(self, xyz):
+        return cylindrical_wedge_signed_distance(xyz, self.r_inner, self.r_outer, self.phi,
+                                                 min(self.z), max(self.z))
+
+    def _intersect_rays(self, origins, directions):
+        return cylindrical_wedge_intersect_rays(origins, directions, self.r_inner, self.r_outer, self.phi,
+                                                min(self.z), max(self.z))
+
+    def _local_bounding_box(self):
+        return sector_bounding_box(self.r_outer, self.phi, min(self.z), max(self.z))
+
+    def _sample_volume(self, u):
+        z_min, z_max = min(self.z), max(self.z)
+        rho = np.sqrt(self.r_inner ** 2 + u[:, 0] * (self.r_outer ** 2 - self.r_inner ** 2))
+        return cylindrical_points(rho, u[:, 1] * self.phi, z_min + u[:, 2] * (z_max - z_min))
+
+    def _surface_faces(self):
+        r_inner, r_outer, phi = self.r_inner, self.r_outer, self.phi
+        z_min, z_max = min(self.z), max(self.z)
+
+        def cylinder(rho):
+            return rho * phi * (z_max - z_min), \
+                lambda u: cylindrical_points(rho, u[:, 0] * phi, z_min + u[:, 1] * (z_max - z_min))
+
+        def base(z):
+            return phi / 2 * abs(r_outer ** 2 - r_inner ** 2), \
+                lambda u: cylindrical_points(np.sqrt(r_inner ** 2 + u[:, 0] * (r_outer ** 2 - r_inner ** 2)),
+                                             u[:, 1] * phi, z)
+
+        def side(angle):
+            return abs(r_outer - r_inner) * (z_max - z_min), \
+                lambda u: cylindrical_points(r_inner + u[:, 0] * (r_outer - r_inner), angle,
+                                             z_min + u[:, 1] * (z_max - z_min))
+
+        faces = [cylinder(r_outer), cylinder(r_inner), base(z_min), base(z_max)]
+        if not full_turn(phi):
+            faces += [side(0.0), side(phi)]
+        return faces
+
 
 class Cylinder(CylindricalWedge):
     def __init__(self, name='Cylinder', coordinate_system=None,
@@ -2,6 +2,11 @@ import numpy as np
 
 from BDSpace.Coordinates.transforms import reduce_angle
 from BDSpace.Figure import Figure
+from BDSpace.Figure._geometry import spherical_wedge_contains, spherical_segment_wedge_contains
+from BDSpace.Figure._geometry import spherical_wedge_signed_distance, spherical_segment_wedge_signed_distance
+from BDSpace.Figure._geometry import spherical_wedge_intersect_rays, spherical_segment_wedge_intersect_rays
+from BDSpace.Figure._geometry import sector_bounding_box
+from BDSpace.Figure._sampling import inverse_cdf, quadratic_inverse, spherical_points, cylindrical_points, full_turn
 
 
 class SphericalShape(Figure):
@@ -99,6 +104,55 @@ class SphericalWedge(SphericalShape):
             s_sides += (self.phi / 2) * (self.r_outer**2 - self.r_inner**2) * np.sin(self.theta[1])
             return s_inner + s_outer + s_sides
 
+    def _contains(self, xyz):
+        return spherical_wedge_contains(xyz, self.r_inner, self.r_outer, self.phi, self.theta[0], self.theta[1])
+
+    def _signed_distance(self, xyz):
+        return spherical_wedge_signed_distance(xyz, self.r_inner, self.r_outer, self.phi,
+                                               self.theta[0], self.theta[1])
+
+    def _intersect_rays(self, origins, directions):
+        return spherical_wedge_intersect_rays(origins, directions, self.r_inner, self.r_outer, self.phi,
+                                              self.theta[0], self.theta[1])
+
+    def _local_bounding_box(self):
+        if self.theta[0] <= np.pi / 2 <= self.theta[1]:
+            rho_max = self.r_outer
+        else:
+            rho_max = self.r_outer * max(np.sin(self.theta[0]), np.sin(self.theta[1]))
+        z_max = max(self.r_inner * np.cos(self.theta[0]), self.r_outer * np.cos(self.theta[0]))
+        z_min = min(self.r_inner * np.cos(self.theta[1]), self.r_outer * np.cos(self.theta[1]))
+        return sector_bounding_box(rho_max, self.phi, z_min, z_max)
+
+    def _sample_volume(self, u):
+        cos_0, cos_1 = np.cos(self.theta[0]), np.cos(self.theta[1])
+        r = np.cbrt(self.r_inner ** 3 + u[:, 0] * (self.r_outer ** 3 - self.r_inner ** 3))
+        return spherical_points(r, np.arccos(cos_0 - u[:, 1] * (cos_0 - cos_1)), u[:, 2] * self.phi)
+
+    def _surface_faces(self):
+        r_inner, r_outer, phi = self.r_inner, self.r_outer, self.phi
+        theta_min, theta_max = self.theta
+        cos_0, cos_1 = np.cos(theta_min), np.cos(theta_max)
+
+        def sphere(r):
+            return r ** 2 * phi * (cos_0 - cos_1), \
+                lambda u: spherical_points(r, np.arccos(cos_0 - u[:, 0] * (cos_0 - cos_1)), u[:, 1] * phi)
+
+        def cone(theta):
+            return phi / 2 * np.sin(theta) * (r_outer ** 2 - r_inner ** 2), \
+                lambda u: spherical_points(np.sqrt(r_inner ** 2 + u[:, 0] * (r_outer ** 2 - r_inner ** 2)),
+                                           theta, u[:, 1] * phi)
+
+        def side(angle):
+            return (theta_max - theta_min) / 2 * (r_outer ** 2 - r_inner ** 2), \
+                lambda u: spherical_points(np.sqrt(r_inner ** 2 + u[:, 0] * (r_outer ** 2 - r_inner ** 2)),
+                                           theta_min + u[:, 1] * (theta_max - theta_min), angle)
+
+        faces = [sphere(r_outer), sphere(r_inner), cone(theta_min), cone(theta_max)]
+        if not full_turn(phi):
+            faces += [side(0.0), side(phi)]
+        return faces
+
 
 class SphericalCone(SphericalWedge):
 
@@ -218,6 +272,74 @@ class SphericalSegmentWedge(SphericalShape):
         else:
             return s_outer + s_inner + s_cut + s_base
 
+    def _contains(self, xyz):
+        return spherical_segment_wedge_contains(xyz, self.r_inner, self.r_outer, self.phi, self.h1, self.h2)
+
+    def _signed_distance(self, xyz):
+        return spherical_segment_wedge_signed_distance(xyz, self.r_inner, self.r_outer, self.phi, self.h1, self.h2)
+
+    def _intersect_rays(self, origins, directions):
+        return spherical_segment_wedge_intersect_rays(origins, directions, self.r_inner, self.r_outer, self.phi,
+                                                      self.h1, self.h2)
+
+    def _local_bounding_box(self):
+        if self.h1 <= 0 <= self.h2:
+            rho_max = self.r_outer
+        else:
+            rho_max = np.sqrt(max(self.r_outer**2 - min(self.h1**2, self.h2**2), 0.0))
+        return sector_bounding_box(rho_max, self.phi, self.h1, self.h2)
+
+    def _profile(self):
+        """
+        Outer and inner radius of the wedge cross-section as functions of z and breakpoints of the functions
+        """
+        r_inner, r_outer = self.r_inner, self.r_outer
+
+        def rho_outer(z):
+            return np.sqrt(np.maximum(r_outer ** 2 - z ** 2, 0.0))
+
+        def rho_inner(z):
+            return np.sqrt(np.maximum(r_inner ** 2 - z ** 2, 0.0))
+
+        edges = np.clip([self.h1, -r_inner, r_inner, self.h2], self.h1, self.h2)
+        return rho_outer, rho_inner, edges
+
+    def _sample_volume(self, u):
+        rho_outer, rho_inner, edges = self._profile()
+        z = quadratic_inverse(lambda x: rho_outer(x) ** 2 - rho_inner(x) ** 2, edges, u[:, 0])
+        rho = np.sqrt(rho_inner(z) ** 2 + u[:, 1] * (rho_outer(z) ** 2 - rho_inner(z) ** 2))
+        return cylindrical_points(rho, u[:, 2] * self.phi, z)
+
+    def _surface_faces(self):
+        rho_outer, rho_inner, edges = self._profile()
+        r_inner, r_outer, phi, h1, h2 = self.r_inner, self.r_outer, self.phi, self.h1, self.h2
+
+        def zone(r):
+            z_min, z_max = np.clip([h1, h2], -r, r)
+            return phi * r * (z_max - z_min), \
+                lambda u: _zone_points(r, z_min, z_max, u, phi)
+
+        def base(z):
+            return phi / 2 * (rho_outer(z) ** 2 - rho_inner(z) ** 2), \
+                lambda u: cylindrical_points(np.sqrt(rho_inner(z) ** 2 + u[:, 0] * (rho_outer(z) ** 2
+                                                                                   - rho_inner(z) ** 2)),
+                                             u[:, 1] * phi, z)
+
+        def width(z):
+            return rho_outer(z) - rho_inner(z)
+
+        def cross_section(z):
+            return _half_chord_integral(r_outer, h1, z) - _half_chord_integral(r_inner, h1, z)
+
+        def side(angle):
+            return cross_section(h2), \
+                lambda u: _side_points(rho_inner, width, cross_section, h1, h2, u, angle)
+
+        faces = [zone(r_outer), zone(r_inner), base(h1), base(h2)]
+        if not full_turn(phi):
+            faces += [side(0.0), side(phi)]
+        return faces
+
 
 class SphericalSegment(SphericalSegmentWedge):
 
@@ -231,3 +353,28 @@ class SphericalCap(SphericalSegment):
     def __init__(self, name='Spherical section', coordinate_system=None, r_inner=0, r_outer=1.0, h1=0):
         super(SphericalCap, self).__init__(name, coordinate_system=coordinate_system,
                                            r_inner=r_inner, r_outer=r_outer, h1=h1, h2=r_outer)
+
+
+def _zone_points(r, z_min, z_max, u, phi):
+    # by Archimedes hat-box theorem z is uniformly distributed on the spherical zone
+    z = z_min + u[:, 0] * (z_max - z_min)
+    return cylindrical_points(np.sqrt(np.maximum(r ** 2 - z ** 2, 0.0)), u[:, 1] * phi, z)
+
+
+def _side_points(rho_inner, width, cross_section, h1, h2, u, angle):
+    z = inverse_cdf(cross_section, u[:, 0] * cross_section(h2), h1, h2, pdf=width)
+    return cylindrical_points(rho_inner(z) + u[:, 1] * width(z), angle, z)
+
+
+def _half_chord_integral(r, z_min, z):
+    """
+    Integral of the circle half chord sqrt(r^2 - x^2) from z_min to z, the half chord is zero outside the circle
+    """
+    if r <= 0:
+        return np.zeros_like(z, dtype=np.float64)
+
+    def antiderivative(x):
+        x = np.clip(x, -r, r)
+        return (x * np.sqrt(r ** 2 - x ** 2) + r ** 2 * np.arcsin(x / r)) / 2
+
+    return antiderivative(z) - antiderivative(z_min)
@@ -2,6 +2,9 @@ import numpy as np
 
 from BDSpace.Coordinates.transforms import reduce_angle
 from BDSpace.Figure import Figure
+from BDSpace.Figure._geometry import toric_wedge_contains, toric_wedge_signed_distance
+from BDSpace.Figure._geometry import toric_wedge_intersect_rays, sector_bounding_box
+from BDSpace.Figure._sampling import inverse_cdf, quadratic_inverse, cylindrical_points, full_turn
 
 
 class ToricWedge(Figure):
@@ -25,7 +28,7 @@ class ToricWedge(Figure):
 
     @r_torus.setter
     def r_torus(self, r_torus):
-        self.r_torus = abs(np.float64(r_torus))
+        self.__r_torus = abs(np.float64(r_torus))
 
     @property
     def r_tube(self):
@@ -44,7 +47,7 @@ class ToricWedge(Figure):
 
     @theta.setter
     def theta(self, theta):
-        reduced_theta = reduce_angle(theta, keep_sign=True)
+        reduced_theta = [reduce_angle(angle, keep_sign=True) for angle in np.ravel(theta)]
         theta_min = min(reduced_theta)
         theta_max = max(reduced_theta)
         if theta_max - theta_min >= 2 * np.pi:
@@ -99,6 +102,75 @@ class ToricWedge(Figure):
                 normal_sides = (max(self.r_tube) - min(self.r_tube))**2 * (self.theta[1] - self.theta[0])
             return external_toric + internal_toric + tangent_sides + normal_sides
 
+    def _contains(self, xyz):
+        return toric_wedge_contains(xyz, self.r_torus, min(self.r_tube), max(self.r_tube), self.phi,
+                                    self.theta[0], self.theta[1])
+
+    def _signed_distance(self, xyz):
+        return toric_wedge_signed_distance(xyz, self.r_torus, min(self.r_tube), max(self.r_tube), self.phi,
+                                           self.theta[0], self.theta[1])
+
+    def _intersect_rays(self, origins, directions):
+        return toric_wedge_intersect_rays(origins, directions, self.r_torus, min(self.r_tube), max(self.r_tube),
+                                          self.phi, self.theta[0], self.theta[1])
+
+    def _local_bounding_box(self):
+        r_tube = max(self.r_tube)
+        return sector_bounding_box(self.r_torus + r_tube, self.phi, -r_tube, r_tube)
+
+    def _sample_volume(self, u):
+        r_torus, r_min, r_max = self.r_torus, min(self.r_tube), max(self.r_tube)
+        theta_min, theta_max = self.theta
+        d_sin = np.sin(theta_max) - np.sin(theta_min)
+        # tube radius from its marginal density, poloidal angle from the conditional one
+        r = quadratic_inverse(lambda x: x * (r_torus * (theta_max - theta_min) + x * d_sin), [r_min, r_max], u[:, 0])
+        theta = _poloidal_angle(r_torus, r, theta_min, theta_max, u[:, 1])
+        return cylindrical_points(r_torus + r * np.cos(theta), u[:, 2] * self.phi, r * np.sin(theta))
+
+    def _surface_faces(self):
+        r_torus, r_min, r_max, phi = self.r_torus, min(self.r_tube), max(self.r_tube), self.phi
+        theta_min, theta_max = self.theta
+        d_sin = np.sin(theta_max) - np.sin(theta_min)
+
+        def tube(r):
+            def sampler(u):
+                theta = _poloidal_angle(r_torus, r, theta_min, theta_max, u[:, 0])
+                return cylindrical_points(r_torus + r * np.cos(theta), u[:, 1] * phi, r * np.sin(theta))
+            return r * phi * (r_torus * (theta_max - theta_min) + r * d_sin), sampler
+
+        def end(theta):
+            def sampler(u):
+                r = quadratic_inverse(lambda x: r_torus + x * np.cos(theta), [r_min, r_max], u[:, 0])
+                return cylindrical_points(r_torus + r * np.cos(theta), u[:, 1] * phi, r * np.sin(theta))
+            return phi * (r_torus * (r_max - r_min) + np.cos(theta) * (r_max ** 2 - r_min ** 2) / 2), sampler
+
+        def side(angle):
+            def sampler(u):
+                r = np.sqrt(r_min ** 2 + u[:, 0] * (r_max ** 2 - r_min ** 2))
+                theta = theta_min + u[:, 1] * (theta_max - theta_min)
+                return cylindrical_points(r_torus + r * np.cos(theta), angle, r * np.sin(theta))
+            return (theta_max - theta_min) / 2 * (r_max ** 2 - r_min ** 2), sampler
+
+        faces = [tube(r_max), tube(r_min)]
+        if not full_turn(theta_max - theta_min):
+            faces += [end(theta_min), end(theta_max)]
+        if not full_turn(phi):
+            faces += [side(0.0), side(phi)]
+        return faces
+
+
+def _poloidal_angle(r_torus, r, theta_min, theta_max, u):
+    """
+    Inverse transform sampling of the poloidal angle with density proportional to r_torus + r * cos(theta)
+    """
+    def cdf(theta):
+        return r_torus * (theta - theta_min) + r * (np.sin(theta) - np.sin(theta_min))
+
+    def pdf(theta):
+        return r_torus + r * np.cos(theta)
+
+    return inverse_cdf(cdf, u * cdf(np.full_like(u, theta_max)), theta_min, theta_max, pdf=pdf)
+
 
 class ToricSector(ToricWedge):
 
@@ -116,5 +188,5 @@ class Torus(ToricSector):
     def __init__(self, name='Torus', coordinate_system=None,
                  r_torus=1.0, r_tube=np.array([0, 0.25])):
 
-        super(ToricSector, self).__init__(name, coordinate_system=coordinate_system,
-                                          phi=2*np.pi, r_torus=r_torus, r_tube=r_tube)
+        super(Torus, self).__init__(name, coordinate_system=coordinate_system,
+                                    phi=2*np.pi, r_torus=r_torus, r_tube=r_tube)
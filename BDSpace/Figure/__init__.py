@@ -1,4 +1,8 @@
+import numpy as np
+
 from BDSpace import Space
+from ._qmc import sobol_points, halton_points
+from ._sampling import uniform_variates, sample_faces
 
 
 class Figure(Space):
@@ -6,6 +10,11 @@ class Figure(Space):
     def __init__(self, name, coordinate_system=None):
         super(Figure, self).__init__(name, coordinate_system=coordinate_system)
 
+    def __setattr__(self, name, value):
+        super(Figure, self).__setattr__(name, value)
+        # any change of the Figure parameters outdates its cached bounding box
+        self.geometry_changed()
+
     def __str__(self):
         description = 'Figure: %s\n' % self.name
         description += str(self.coordinate_system)
@@ -50,3 +59,254 @@ class Figure(Space):
 
     def surface_area(self):
         return self.inner_surface_area() + self.external_surface_area()
+
+    def sample_volume(self, n, rng=None, stratified=False, local=False):
+        """
+        Generates points uniformly distributed in the Figure volume by inverse transform sampling
+        in the Figure native coordinates.
+        :param n: number of points
+        :param rng: numpy random Generator, seed or None
+        :param stratified: if True uniform variates are stratified (Latin hypercube) for more even coverage
+        :param local: if True points are returned in the Figure coordinate system, otherwise in the global one
+        :return: array of points with shape (n, 3)
+        """
+        xyz = np.ascontiguousarray(self._sample_volume(uniform_variates(n, rng, stratified)))
+        if not local:
+            xyz = np.asarray(self.to_global_coordinate_system(xyz))
+        return xyz
+
+    def sample_surface(self, n, rng=None, stratified=False, local=False):
+        """
+        Generates points uniformly distributed on the Figure surface. Faces are chosen with probability
+        proportional to their areas and points on the face are generated by inverse transform sampling
+        in the Figure native coordinates.
+        :param n: number of points
+        :param rng: numpy random Generator, seed or None
+        :param stratified: if True uniform variates are stratified (Latin hypercube) for more even coverage
+        :param local: if True points are returned in the Figure coordinate system, otherwise in the global one
+        :return: array of points with shape (n, 3)
+        """
+        xyz = np.ascontiguousarray(sample_faces(self._surface_faces(), uniform_variates(n, rng, stratified)))
+        if not local:
+            xyz = np.asarray(self.to_global_coordinate_system(xyz))
+        return xyz
+
+    def _sample_volume(self, u):
+        """
+        Maps uniform variates to the points uniformly distributed in the Figure volume.
+        Overridden by the figures supporting sampling.
+        :param u: array of uniform variates with shape (N, 3)
+        :return: array of N points in the Figure coordinate system with shape (N, 3)
+        """
+        raise NotImplementedError('Volume sampling is not implemented for %s' % self.__class__.__name__)
+
+    def _surface_faces(self):
+        """
+        Faces of the Figure surface. Overridden by the figures supporting sampling.
+        :return: list of tuples of face area and function mapping array of uniform variates with shape (M, 2)
+                 to the points uniformly distributed on the face in the Figure coordinate system
+        """
+        raise NotImplementedError('Surface sampling is not implemented for %s' % self.__class__.__name__)
+
+    def integrate(self, integrand, n_points=65536, method='sobol', n_randomizations=8, seed=None, local=True):
+        """
+        Estimates integral of the function over the Figure volume. Points are sampled in the Figure bounding box
+        by randomized quasi-Monte Carlo or Monte Carlo method and masked with the Figure membership test.
+        Error is estimated as the standard error of the mean over independent randomizations of the point set.
+        :param integrand: function of array of N points with shape (N, 3) returning array of values with shape (N, ...)
+        :param n_points: number of points sampled in the bounding box per randomization,
+                         powers of two give balanced Sobol point sets
+        :param method: 'sobol', 'halton' or 'random' sampling of the bounding box
+        :param n_randomizations: number of independent randomizations, at least two
+        :param seed: seed of the random numbers generator
+        :param local: if True integrand is evaluated at points in the Figure coordinate system,
+                      otherwise in the global one
+        :return: tuple of the integral estimate and its standard error
+        """
+        return _mean_error(self._integrate_randomizations(integrand, n_points=n_points, method=method,
+                                                          n_randomizations=n_randomizations, seed=seed, local=local))
+
+    def _integrate_randomizations(self, integrand, n_points=65536, method='sobol', n_randomizations=8, seed=None,
+                                  local=True):
+        """
+        Estimates integral of the function over the Figure volume for every randomization of the point set
+        :return: array of estimates with shape (n_randomizations, ...)
+        """
+        if n_randomizations < 2:
+            raise ValueError('At least two randomizations are needed to estimate the error')
+        box = self._local_bounding_box()
+        if box is None:
+            raise ValueError('Figure has no bounding box to sample')
+        box = np.asarray(box, dtype=np.float64)
+        extent = box[1] - box[0]
+        rng = np.random.default_rng(seed)
+        estimates = []
+        for _ in range(n_randomizations):
+            xyz = np.ascontiguousarray(box[0] + _unit_cube_points(n_points, method, rng) * extent)
+            xyz = xyz[self._contains(xyz)]
+            if not local:
+                xyz = np.asarray(self.to_global_coordinate_system(xyz))
+            values = np.asarray(integrand(xyz), dtype=np.float64)
+            estimates.append(np.prod(extent) * values.sum(axis=0) / n_points)
+        return np.array(estimates)
+
+    def estimate_volume(self, **kwargs):
+        """
+        Estimates volume of the Figure by sampling, see integrate for the sampling parameters.
+        :return: tuple of the volume estimate and its standard error
+        """
+        return self.integrate(_unit, **kwargs)
+
+    def centroid(self, local=True, **kwargs):
+        """
+        Estimates centroid of the Figure by sampling, see integrate for the sampling parameters.
+        :param local: if True centroid is calculated in the Figure coordinate system, otherwise in the global one
+        :return: tuple of the centroid coordinates and their standard errors
+        """
+        moments = self._integrate_randomizations(_first_moments, local=local, **kwargs)
+        return _mean_error(moments[:, 1:] / moments[:, :1])
+
+    def inertia_tensor(self, density=1.0, local=True, **kwargs):
+        """
+        Estimates inertia tensor of the Figure with uniform density about its centroid by sampling,
+        see integrate for the sampling parameters.
+        :param density: density of the Figure material
+        :param local: if True tensor is calculated in the Figure coordinate system, otherwise in the global one
+        :return: tuple of the inertia tensor with shape (3, 3) and its standard errors
+        """
+        moments = self._integrate_randomizations(_second_moments, local=local, **kwargs)
+        m0 = moments[:, 0]
+        m1 = moments[:, 1:4]
+        covariance = moments[:, 4:].reshape(-1, 3, 3) - m1[:, :, None] * m1[:, None, :] / m0[:, None, None]
+        trace = np.trace(covariance, axis1=1, axis2=2)
+        return _mean_error(density * (trace[:, None, None] * np.eye(3) - covariance))
+
+    def integrate_field(self, field, **kwargs):
+        """
+        Estimates integral of the scalar field over the Figure volume by sampling,
+        see integrate for the sampling parameters.
+        :param field: Field object evaluated in its own coordinate system
+        :return: tuple of the integral estimate and its standard error
+        """
+        kwargs['local'] = True
+        return self.integrate(lambda xyz: field.scalar_field(self.transform_to(field, xyz)), **kwargs)
+
+    def contains(self, xyz, local=True):
+        """
+        Checks which points are inside the Figure.
+        :param xyz: array of N points with shape (N, 3)
+        :param local: if True points are given in the Figure coordinate system, otherwise in the global one
+        :return: boolean array of N elements
+        """
+        xyz = np.ascontiguousarray(xyz, dtype=np.float64).reshape(-1, 3)
+        if not local:
+            xyz = np.asarray(self.to_local_coordinate_system(xyz))
+        return self._contains(xyz)
+
+    def _contains(self, xyz):
+        """
+        Checks which points given in the Figure coordinate system are inside the Figure.
+        Overridden by the figures with compiled membership kernels.
+        :param xyz: C-contiguous array of N points with shape (N, 3)
+        :return: boolean array of N elements
+        """
+        return np.zeros(xyz.shape[0], dtype=np.bool_)
+
+    def signed_distance(self, xyz, local=True):
+        """
+        Calculates signed distance from points to the Figure surface.
+        :param xyz: array of N points with shape (N, 3)
+        :param local: if True points are given in the Figure coordinate system, otherwise in the global one
+        :return: array of N distances, negative inside the Figure
+        """
+        xyz = np.ascontiguousarray(xyz, dtype=np.float64).reshape(-1, 3)
+        if not local:
+            xyz = np.asarray(self.to_local_coordinate_system(xyz))
+        return np.asarray(self._signed_distance(xyz))
+
+    def _signed_distance(self, xyz):
+        """
+        Calculates signed distance from points given in the Figure coordinate system to the Figure surface.
+        Overridden by the figures with compiled distance kernels.
+        :param xyz: C-contiguous array of N points with shape (N, 3)
+        :return: array of N distances
+        """
+        return np.full(xyz.shape[0], np.inf)
+
+    def _distance(self, xyz):
+        """
+        Calculates distance from points in the global coordinate system to the Figure, zero inside the Figure.
+        Figures without compiled distance kernels fall back to the distance to their bounding box.
+        :param xyz: array of N points with shape (N, 3)
+        :return: array of N distances
+        """
+        xyz = np.ascontiguousarray(xyz, dtype=np.float64).reshape(-1, 3)
+        distance = np.maximum(self.signed_distance(xyz, local=False), 0.0)
+        unknown = ~np.isfinite(distance)
+        if unknown.any():
+            distance[unknown] = super(Figure, self)._distance(xyz[unknown])
+        return distance
+
+    def intersect_rays(self, origins, directions, local=True):
+        """
+        Finds the first intersection of rays with the Figure surface.
+        :param origins: array of N ray origins with shape (N, 3)
+        :param directions: array of N ray directions with shape (N, 3)
+        :param local: if True rays are given in the Figure coordinate system, otherwise in the global one
+        :return: tuple of distances along the normalized rays (inf for missed rays) and outward surface normals
+        """
+        origins = np.ascontiguousarray(origins, dtype=np.float64).reshape(-1, 3)
+        directions = np.array(directions, dtype=np.float64).reshape(-1, 3)
+        directions /= np.linalg.norm(directions, axis=1)[:, None]
+        if local:
+            return self._intersect_rays(origins, directions)
+        basis = np.asarray(self.basis_in_global_coordinate_system().basis)
+        origins = np.asarray(self.to_local_coordinate_system(origins))
+        distance, normals = self._intersect_rays(origins, np.ascontiguousarray(np.dot(directions, basis.T)))
+        return distance, np.dot(normals, basis)
+
+    def _intersect_rays(self, origins, directions):
+        """
+        Finds the first intersection of rays given in the Figure coordinate system with the Figure surface.
+        Overridden by the figures with compiled ray casting kernels.
+        :param origins: C-contiguous array of N ray origins with shape (N, 3)
+        :param directions: C-contiguous array of N unit ray directions with shape (N, 3)
+        :return: tuple of distances and outward surface normals
+        """
+        return np.full(origins.shape[0], np.inf), np.zeros((origins.shape[0], 3))
+
+
+def _unit_cube_points(n, method, rng):
+    """
+    Generates randomized point set in the unit cube
+    :param n: number of points
+    :param method: 'sobol', 'halton' or 'random'
+    :param rng: numpy random generator
+    :return: array of points with shape (n, 3)
+    """
+    if method == 'sobol':
+        return np.asarray(sobol_points(0, n, rng.integers(0, 2 ** 32, 3, dtype=np.uint32)))
+    elif method == 'halton':
+        return np.asarray(halton_points(0, n, rng.random(3)))
+    elif method == 'random':
+        return rng.random((n, 3))
+    raise ValueError('Unknown sampling method %s' % method)
+
+
+def _mean_error(estimates):
+    """
+    Mean of the estimates over randomizations and its standard error
+    """
+    return estimates.mean(axis=0), estimates.std(axis=0, ddof=1) / np.sqrt(estimates.shape[0])
+
+
+def _unit(xyz):
+    return np.ones(xyz.shape[0])
+
+
+def _first_moments(xyz):
+    return np.hstack((np.ones((xyz.shape[0], 1)), xyz))
+
+
+def _second_moments(xyz):
+    return np.hstack((np.ones((xyz.shape[0], 1)), xyz, (xyz[:, :, None] * xyz[:, None, :]).reshape(-1, 9)))
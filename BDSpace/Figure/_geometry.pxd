@@ -0,0 +1,101 @@
+from BDSpace.Coordinates.transforms cimport Vector3
+
+
+cdef enum:
+    SPHERICAL_WEDGE = 1
+    SPHERICAL_SEGMENT_WEDGE = 2
+    CYLINDRICAL_WEDGE = 3
+    CONICAL_WEDGE = 4
+    TORIC_WEDGE = 5
+
+
+cdef struct Profile:
+    # profile of a solid of revolution in (rho, z) half-plane bounded by segments and circular arcs
+    int kind
+    double parameters[6]
+    int n_segments
+    double segments[48]
+    bint axis[12]
+    int n_arcs
+    double arcs[10]
+
+
+cdef bint angle_in_range(double angle, double start, double width) nogil
+cdef bint spherical_wedge_point(double x, double y, double z, double r_inner, double r_outer, double phi,
+                                double theta_min, double theta_max) nogil
+cdef bint spherical_segment_wedge_point(double x, double y, double z, double r_inner, double r_outer,
+                                        double phi, double h1, double h2) nogil
+cdef bint cylindrical_wedge_point(double x, double y, double z, double r_inner, double r_outer, double phi,
+                                  double z_min, double z_max) nogil
+cdef bint conical_wedge_point(double x, double y, double z, double tan_theta, double phi,
+                              double z_min, double z_max, double z_offset, double r_min) nogil
+cdef bint toric_wedge_point(double x, double y, double z, double r_torus, double r_tube_min,
+                            double r_tube_max, double phi, double theta_min, double theta_max) nogil
+cdef bint parallelepiped_point(double x, double y, double z, double[:, :] inverse) nogil
+cpdef object spherical_wedge_contains(double[:, :] xyz, double r_inner, double r_outer, double phi,
+                                      double theta_min, double theta_max)
+cpdef object spherical_segment_wedge_contains(double[:, :] xyz, double r_inner, double r_outer, double phi,
+                                              double h1, double h2)
+cpdef object cylindrical_wedge_contains(double[:, :] xyz, double r_inner, double r_outer, double phi,
+                                        double z_min, double z_max)
+cpdef object conical_wedge_contains(double[:, :] xyz, double tan_theta, double phi, double z_min, double z_max,
+                                    double z_offset, double r_min)
+cpdef object toric_wedge_contains(double[:, :] xyz, double r_torus, double r_tube_min, double r_tube_max,
+                                  double phi, double theta_min, double theta_max)
+cpdef object parallelepiped_contains(double[:, :] xyz, double[:, :] inverse)
+
+cdef double segment_distance_2d(double u, double z, double au, double az, double bu, double bz) nogil
+cdef double arc_distance_2d(double u, double z, double cu, double cz, double r, double start, double width) nogil
+cdef void profile_add_segment(Profile* profile, double au, double az, double bu, double bz, bint axis) nogil
+cdef void profile_add_arc(Profile* profile, double cu, double cz, double r, double start, double width) nogil
+cdef bint profile_contains(Profile* profile, double u, double z) nogil
+cdef double profile_boundary_distance(Profile* profile, double u, double z, bint axis) nogil
+cdef double profile_face_distance(Profile* profile, double rho, double z, double delta) nogil
+cdef double revolved_signed_distance(double x, double y, double z, double phi, Profile* profile) nogil
+cdef Profile spherical_wedge_profile(double r_inner, double r_outer, double theta_min, double theta_max) nogil
+cdef Profile spherical_segment_wedge_profile(double r_inner, double r_outer, double h1, double h2) nogil
+cdef Profile cylindrical_wedge_profile(double r_inner, double r_outer, double z_min, double z_max) nogil
+cdef Profile conical_wedge_profile(double tan_theta, double z_min, double z_max, double z_offset,
+                                   double r_min) nogil
+cdef Profile toric_wedge_profile(double r_torus, double r_tube_min, double r_tube_max,
+                                 double theta_min, double theta_max) nogil
+cdef double parallelepiped_signed_distance_point(double x, double y, double z, double[:, :] vectors,
+                                                 double[:, :] inverse) nogil
+cdef double[:] revolved_signed_distance_array(double[:, :] xyz, double phi, Profile* profile)
+cpdef double[:] spherical_wedge_signed_distance(double[:, :] xyz, double r_inner, double r_outer, double phi,
+                                               double theta_min, double theta_max)
+cpdef double[:] spherical_segment_wedge_signed_distance(double[:, :] xyz, double r_inner, double r_outer,
+                                                       double phi, double h1, double h2)
+cpdef double[:] cylindrical_wedge_signed_distance(double[:, :] xyz, double r_inner, double r_outer, double phi,
+                                                 double z_min, double z_max)
+cpdef double[:] conical_wedge_signed_distance(double[:, :] xyz, double tan_theta, double phi, double z_min,
+                                             double z_max, double z_offset, double r_min)
+cpdef double[:] toric_wedge_signed_distance(double[:, :] xyz, double r_torus, double r_tube_min,
+                                           double r_tube_max, double phi, double theta_min, double theta_max)
+cpdef double[:] parallelepiped_signed_distance(double[:, :] xyz, double[:, :] vectors, double[:, :] inverse)
+cdef bint revolved_contains(double x, double y, double z, double phi, Profile* profile) nogil
+cdef int quadratic_roots(double a, double b, double c, double* roots) nogil
+cdef double polynomial_value(double* c, int degree, double t) nogil
+cdef int polynomial_roots(double* c, int degree, double lo, double hi, double* roots) nogil
+cdef int revolved_ray_candidates(double ox, double oy, double oz, double dx, double dy, double dz,
+                                 double phi, Profile* profile, double* t) nogil
+cdef double revolved_ray_hit(double ox, double oy, double oz, double dx, double dy, double dz,
+                             double phi, Profile* profile, Vector3* normal) nogil
+cdef double parallelepiped_ray_hit(double ox, double oy, double oz, double dx, double dy, double dz,
+                                   double[:, :] inverse, Vector3* normal) nogil
+cdef tuple revolved_intersect_rays_array(double[:, :] origins, double[:, :] directions, double phi,
+                                         Profile* profile)
+cdef tuple ray_hits(double[:] distance, double[:, :] normals)
+cpdef tuple spherical_wedge_intersect_rays(double[:, :] origins, double[:, :] directions, double r_inner,
+                                           double r_outer, double phi, double theta_min, double theta_max)
+cpdef tuple spherical_segment_wedge_intersect_rays(double[:, :] origins, double[:, :] directions, double r_inner,
+                                                   double r_outer, double phi, double h1, double h2)
+cpdef tuple cylindrical_wedge_intersect_rays(double[:, :] origins, double[:, :] directions, double r_inner,
+                                             double r_outer, double phi, double z_min, double z_max)
+cpdef tuple conical_wedge_intersect_rays(double[:, :] origins, double[:, :] directions, double tan_theta,
+                                         double phi, double z_min, double z_max, double z_offset, double r_min)
+cpdef tuple toric_wedge_intersect_rays(double[:, :] origins, double[:, :] directions, double r_torus,
+                                       double r_tube_min, double r_tube_max, double phi,
+                                       double theta_min, double theta_max)
+cpdef tuple parallelepiped_intersect_rays(double[:, :] origins, double[:, :] directions, double[:, :] inverse)
+cpdef object sector_bounding_box(double rho_max, double phi, double z_min, double z_max)
@@ -0,0 +1,986 @@
+import numpy as np
+
+from cython import boundscheck, wraparound
+from cython.parallel import prange
+
+from cpython.array cimport array, clone
+
+from libc.math cimport sqrt, fabs, fmod, sin, cos, asin, acos, atan2, M_PI
+from libc.float cimport DBL_MAX
+
+from BDSpace.Coordinates.transforms cimport Vector3
+
+
+cdef Vector3 _zero_vector
+_zero_vector.x = _zero_vector.y = _zero_vector.z = 0.0
+
+
+cdef bint angle_in_range(double angle, double start, double width) nogil:
+    """
+    Checks if angle is within the range [start, start + width] modulo 2 pi
+    """
+    if width >= 2 * M_PI:
+        return True
+    angle = fmod(angle - start, 2 * M_PI)
+    if angle < 0:
+        angle += 2 * M_PI
+    return angle <= width
+
+
+cdef bint spherical_wedge_point(double x, double y, double z, double r_inner, double r_outer, double phi,
+                                double theta_min, double theta_max) nogil:
+    cdef:
+        double r = sqrt(x * x + y * y + z * z), theta = 0.0
+    if r < r_inner or r > r_outer:
+        return False
+    if r > 0:
+        theta = acos(min(max(z / r, -1.0), 1.0))
+    return theta_min <= theta <= theta_max and angle_in_range(atan2(y, x), 0.0, phi)
+
+
+cdef bint spherical_segment_wedge_point(double x, double y, double z, double r_inner, double r_outer,
+                                        double phi, double h1, double h2) nogil:
+    cdef:
+        double r2 = x * x + y * y + z * z
+    if r2 < r_inner * r_inner or r2 > r_outer * r_outer or z < h1 or z > h2:
+        return False
+    return angle_in_range(atan2(y, x), 0.0, phi)
+
+
+cdef bint cylindrical_wedge_point(double x, double y, double z, double r_inner, double r_outer, double phi,
+                                  double z_min, double z_max) nogil:
+    cdef:
+        double rho2 = x * x + y * y
+    if rho2 < r_inner * r_inner or rho2 > r_outer * r_outer or z < z_min or z > z_max:
+        return False
+    return angle_in_range(atan2(y, x), 0.0, phi)
+
+
+cdef bint conical_wedge_point(double x, double y, double z, double tan_theta, double phi,
+                              double z_min, double z_max, double z_offset, double r_min) nogil:
+    cdef:
+        double rho = sqrt(x * x + y * y), rho_outer, rho_inner
+    if z < z_min or z > z_max:
+        return False
+    rho_outer = r_min + fabs(z) * tan_theta
+    rho_inner = max(rho_outer - z_offset * tan_theta, 0.0)
+    if rho < rho_inner or rho > rho_outer:
+        return False
+    return angle_in_range(atan2(y, x), 0.0, phi)
+
+
+cdef bint toric_wedge_point(double x, double y, double z, double r_torus, double r_tube_min,
+                            double r_tube_max, double phi, double theta_min, double theta_max) nogil:
+    cdef:
+        double u = sqrt(x * x + y * y) - r_torus
+        double r2 = u * u + z * z
+    if r2 < r_tube_min * r_tube_min or r2 > r_tube_max * r_tube_max:
+        return False
+    if not angle_in_range(atan2(y, x), 0.0, phi):
+        return False
+    return r2 == 0 or angle_in_range(atan2(z, u), theta_min, theta_max - theta_min)
+
+
+@boundscheck(False)
+@wraparound(False)
+cdef bint parallelepiped_point(double x, double y, double z, double[:, :] inverse) nogil:
+    cdef:
+        int j
+        double f
+    for j in range(3):
+        f = x * inverse[0, j] + y * inverse[1, j] + z * inverse[2, j]
+        if f < 0 or f > 1:
+            return False
+    return True
+
+
+@boundscheck(False)
+@wraparound(False)
+cpdef object spherical_wedge_contains(double[:, :] xyz, double r_inner, double r_outer, double phi,
+                                      double theta_min, double theta_max):
+    """
+    Checks which points are inside the spherical wedge
+    :param xyz: array of N points in the figure coordinate system with shape (N, 3)
+    :return: boolean array of N elements
+    """
+    cdef:
+        int i, n = xyz.shape[0]
+        unsigned char[:] result
+    mask = np.empty(n, dtype=np.bool_)
+    result = mask.view(np.uint8)
+    with nogil:
+        for i in prange(n):
+            result[i] = spherical_wedge_point(xyz[i, 0], xyz[i, 1], xyz[i, 2], r_inner, r_outer, phi,
+                                              theta_min, theta_max)
+    return mask
+
+
+@boundscheck(False)
+@wraparound(False)
+cpdef object spherical_segment_wedge_contains(double[:, :] xyz, double r_inner, double r_outer, double phi,
+                                              double h1, double h2):
+    """
+    Checks which points are inside the spherical segment wedge
+    :param xyz: array of N points in the figure coordinate system with shape (N, 3)
+    :return: boolean array of N elements
+    """
+    cdef:
+        int i, n = xyz.shape[0]
+        unsigned char[:] result
+    mask = np.empty(n, dtype=np.bool_)
+    result = mask.view(np.uint8)
+    with nogil:
+        for i in prange(n):
+            result[i] = spherical_segment_wedge_point(xyz[i, 0], xyz[i, 1], xyz[i, 2], r_inner, r_outer, phi,
+                                                      h1, h2)
+    return mask
+
+
+@boundscheck(False)
+@wraparound(False)
+cpdef object cylindrical_wedge_contains(double[:, :] xyz, double r_inner, double r_outer, double phi,
+                                        double z_min, double z_max):
+    """
+    Checks which points are inside the cylindrical wedge
+    :param xyz: array of N points in the figure coordinate system with shape (N, 3)
+    :return: boolean array of N elements
+    """
+    cdef:
+        int i, n = xyz.shape[0]
+        unsigned char[:] result
+    mask = np.empty(n, dtype=np.bool_)
+    result = mask.view(np.uint8)
+    with nogil:
+        for i in prange(n):
+            result[i] = cylindrical_wedge_point(xyz[i, 0], xyz[i, 1], xyz[i, 2], r_inner, r_outer, phi,
+                                                z_min, z_max)
+    return mask
+
+
+@boundscheck(False)
+@wraparound(False)
+cpdef object conical_wedge_contains(double[:, :] xyz, double tan_theta, double phi, double z_min, double z_max,
+                                    double z_offset, double r_min):
+    """
+    Checks which points are inside the conical wedge
+    :param xyz: array of N points in the figure coordinate system with shape (N, 3)
+    :return: boolean array of N elements
+    """
+    cdef:
+        int i, n = xyz.shape[0]
+        unsigned char[:] result
+    mask = np.empty(n, dtype=np.bool_)
+    result = mask.view(np.uint8)
+    with nogil:
+        for i in prange(n):
+            result[i] = conical_wedge_point(xyz[i, 0], xyz[i, 1], xyz[i, 2], tan_theta, phi,
+                                            z_min, z_max, z_offset, r_min)
+    return mask
+
+
+@boundscheck(False)
+@wraparound(False)
+cpdef object toric_wedge_contains(double[:, :] xyz, double r_torus, double r_tube_min, double r_tube_max,
+                                  double phi, double theta_min, double theta_max):
+    """
+    Checks which points are inside the toric wedge
+    :param xyz: array of N points in the figure coordinate system with shape (N, 3)
+    :return: boolean array of N elements
+    """
+    cdef:
+        int i, n = xyz.shape[0]
+        unsigned char[:] result
+    mask = np.empty(n, dtype=np.bool_)
+    result = mask.view(np.uint8)
+    with nogil:
+        for i in prange(n):
+            result[i] = toric_wedge_point(xyz[i, 0], xyz[i, 1], xyz[i, 2], r_torus, r_tube_min, r_tube_max,
+                                          phi, theta_min, theta_max)
+    return mask
+
+
+@boundscheck(False)
+@wraparound(False)
+cpdef object parallelepiped_contains(double[:, :] xyz, double[:, :] inverse):
+    """
+    Checks which points are inside the parallelepiped
+    :param xyz: array of N points in the figure coordinate system with shape (N, 3)
+    :param inverse: inverse of the matrix of parallelepiped edge vectors (rows)
+    :return: boolean array of N elements
+    """
+    cdef:
+        int i, n = xyz.shape[0]
+        unsigned char[:] result
+    mask = np.empty(n, dtype=np.bool_)
+    result = mask.view(np.uint8)
+    with nogil:
+        for i in prange(n):
+            result[i] = parallelepiped_point(xyz[i, 0], xyz[i, 1], xyz[i, 2], inverse)
+    return mask
+
+
+cdef double segment_distance_2d(double u, double z, double au, double az, double bu, double bz) nogil:
+    cdef:
+        double du = bu - au, dz = bz - az, length2 = du * du + dz * dz, s = 0.0
+    if length2 > 0:
+        s = min(max(((u - au) * du + (z - az) * dz) / length2, 0.0), 1.0)
+    du = u - au - s * du
+    dz = z - az - s * dz
+    return sqrt(du * du + dz * dz)
+
+
+cdef double arc_distance_2d(double u, double z, double cu, double cz, double r,
+                            double start, double width) nogil:
+    cdef:
+        double du = u - cu, dz = z - cz
+    if angle_in_range(atan2(dz, du), start, width):
+        return fabs(sqrt(du * du + dz * dz) - r)
+    return min(segment_distance_2d(u, z, cu + r * cos(start), cz + r * sin(start),
+                                   cu + r * cos(start), cz + r * sin(start)),
+               segment_distance_2d(u, z, cu + r * cos(start + width), cz + r * sin(start + width),
+                                   cu + r * cos(start + width), cz + r * sin(start + width)))
+
+
+cdef void profile_add_segment(Profile* profile, double au, double az, double bu, double bz, bint axis) nogil:
+    cdef int k = profile.n_segments
+    profile.segments[4 * k] = au
+    profile.segments[4 * k + 1] = az
+    profile.segments[4 * k + 2] = bu
+    profile.segments[4 * k + 3] = bz
+    profile.axis[k] = axis
+    profile.n_segments += 1
+
+
+cdef void profile_add_arc(Profile* profile, double cu, double cz, double r, double start, double width) nogil:
+    cdef int k = profile.n_arcs
+    profile.arcs[5 * k] = cu
+    profile.arcs[5 * k + 1] = cz
+    profile.arcs[5 * k + 2] = r
+    profile.arcs[5 * k + 3] = start
+    profile.arcs[5 * k + 4] = width
+    profile.n_arcs += 1
+
+
+cdef bint profile_contains(Profile* profile, double u, double z) nogil:
+    cdef double* p = profile.parameters
+    if profile.kind == SPHERICAL_WEDGE:
+        return spherical_wedge_point(u, 0, z, p[0], p[1], 2 * M_PI, p[2], p[3])
+    elif profile.kind == SPHERICAL_SEGMENT_WEDGE:
+        return spherical_segment_wedge_point(u, 0, z, p[0], p[1], 2 * M_PI, p[2], p[3])
+    elif profile.kind == CYLINDRICAL_WEDGE:
+        return cylindrical_wedge_point(u, 0, z, p[0], p[1], 2 * M_PI, p[2], p[3])
+    elif profile.kind == CONICAL_WEDGE:
+        return conical_wedge_point(u, 0, z, p[0], 2 * M_PI, p[1], p[2], p[3], p[4])
+    elif profile.kind == TORIC_WEDGE:
+        return toric_wedge_point(u, 0, z, p[0], p[1], p[2], 2 * M_PI, p[3], p[4])
+    return False
+
+
+cdef double profile_boundary_distance(Profile* profile, double u, double z, bint axis) nogil:
+    cdef:
+        int k
+        double d = DBL_MAX
+    for k in range(profile.n_segments):
+        if axis or not profile.axis[k]:
+            d = min(d, segment_distance_2d(u, z, profile.segments[4 * k], profile.segments[4 * k + 1],
+                                           profile.segments[4 * k + 2], profile.segments[4 * k + 3]))
+    for k in range(profile.n_arcs):
+        d = min(d, arc_distance_2d(u, z, profile.arcs[5 * k], profile.arcs[5 * k + 1], profile.arcs[5 * k + 2],
+                                   profile.arcs[5 * k + 3], profile.arcs[5 * k + 4]))
+    return d
+
+
+cdef double profile_face_distance(Profile* profile, double rho, double z, double delta) nogil:
+    cdef:
+        double u = rho * cos(delta), w = rho * sin(delta), d = 0.0
+    if u < 0 or not profile_contains(profile, u, z):
+        d = profile_boundary_distance(profile, u, z, True)
+    return sqrt(w * w + d * d)
+
+
+cdef double revolved_signed_distance(double x, double y, double z, double phi, Profile* profile) nogil:
+    """
+    Signed distance to the solid of revolution of the profile in the (rho, z) half-plane about z axis
+    limited to azimuth range [0, phi]. Negative inside.
+    """
+    cdef:
+        double rho = sqrt(x * x + y * y), alpha = atan2(y, x), d
+        bint full = phi >= 2 * M_PI
+    if alpha < 0:
+        alpha += 2 * M_PI
+    if full or alpha <= phi:
+        d = profile_boundary_distance(profile, rho, z, False)
+        if not profile_contains(profile, rho, z):
+            return d
+        if not full:
+            d = min(d, rho * sin(alpha) if alpha < M_PI / 2 else rho)
+            d = min(d, rho * sin(phi - alpha) if phi - alpha < M_PI / 2 else rho)
+        return -d
+    return min(profile_face_distance(profile, rho, z, 2 * M_PI - alpha),
+               profile_face_distance(profile, rho, z, alpha - phi))
+
+
+cdef Profile spherical_wedge_profile(double r_inner, double r_outer, double theta_min, double theta_max) nogil:
+    cdef Profile profile
+    profile.kind = SPHERICAL_WEDGE
+    profile.parameters[0] = r_inner
+    profile.parameters[1] = r_outer
+    profile.parameters[2] = theta_min
+    profile.parameters[3] = theta_max
+    profile.n_segments = 0
+    profile.n_arcs = 0
+    profile_add_arc(&profile, 0, 0, r_outer, M_PI / 2 - theta_max, theta_max - theta_min)
+    if r_inner > 0:
+        profile_add_arc(&profile, 0, 0, r_inner, M_PI / 2 - theta_max, theta_max - theta_min)
+    profile_add_segment(&profile, r_inner * sin(theta_min), r_inner * cos(theta_min),
+                        r_outer * sin(theta_min), r_outer * cos(theta_min), theta_min <= 0)
+    profile_add_segment(&profile, r_inner * sin(theta_max), r_inner * cos(theta_max),
+                        r_outer * sin(theta_max), r_outer * cos(theta_max), theta_max >= M_PI)
+    return profile
+
+
+cdef Profile spherical_segment_wedge_profile(double r_inner, double r_outer, double h1, double h2) nogil:
+    cdef Profile profile
+    profile.kind = SPHERICAL_SEGMENT_WEDGE
+    profile.parameters[0] = r_inner
+    profile.parameters[1] = r_outer
+    profile.parameters[2] = h1
+    profile.parameters[3] = h2
+    profile.n_segments = 0
+    profile.n_arcs = 0
+    h1 = min(max(h1, -r_outer), r_outer)
+    h2 = min(max(h2, -r_outer), r_outer)
+    profile_add_arc(&profile, 0, 0, r_outer, asin(h1 / r_outer), asin(h2 / r_outer) - asin(h1 / r_outer))
+    if r_inner > 0 and h1 < r_inner and h2 > -r_inner:
+        profile_add_arc(&profile, 0, 0, r_inner, asin(max(h1, -r_inner) / r_inner),
+                        asin(min(h2, r_inner) / r_inner) - asin(max(h1, -r_inner) / r_inner))
+    profile_add_segment(&profile, sqrt(max(r_inner * r_inner - h1 * h1, 0.0)), h1,
+                        sqrt(max(r_outer * r_outer - h1 * h1, 0.0)), h1, False)
+    profile_add_segment(&profile, sqrt(max(r_inner * r_inner - h2 * h2, 0.0)), h2,
+                        sqrt(max(r_outer * r_outer - h2 * h2, 0.0)), h2, False)
+    if h1 < min(h2, -r_inner):
+        profile_add_segment(&profile, 0, h1, 0, min(h2, -r_inner), True)
+    if max(h1, r_inner) < h2:
+        profile_add_segment(&profile, 0, max(h1, r_inner), 0, h2, True)
+    return profile
+
+
+cdef Profile cylindrical_wedge_profile(double r_inner, double r_outer, double z_min, double z_max) nogil:
+    cdef Profile profile
+    profile.kind = CYLINDRICAL_WEDGE
+    profile.parameters[0] = r_inner
+    profile.parameters[1] = r_outer
+    profile.parameters[2] = z_min
+    profile.parameters[3] = z_max
+    profile.n_segments = 0
+    profile.n_arcs = 0
+    profile_add_segment(&profile, r_inner, z_min, r_outer, z_min, False)
+    profile_add_segment(&profile, r_inner, z_max, r_outer, z_max, False)
+    profile_add_segment(&profile, r_outer, z_min, r_outer, z_max, False)
+    profile_add_segment(&profile, r_inner, z_min, r_inner, z_max, r_inner <= 0)
+    return profile
+
+
+cdef Profile conical_wedge_profile(double tan_theta, double z_min, double z_max, double z_offset,
+                                   double r_min) nogil:
+    cdef:
+        Profile profile
+        int i, j, n = 2
+        double z_break[5]
+        double rho_outer[5]
+        double rho_inner[5]
+        double z_cut = z_offset - r_min / tan_theta if tan_theta > 0 else -1.0
+    profile.kind = CONICAL_WEDGE
+    profile.parameters[0] = tan_theta
+    profile.parameters[1] = z_min
+    profile.parameters[2] = z_max
+    profile.parameters[3] = z_offset
+    profile.parameters[4] = r_min
+    profile.n_segments = 0
+    profile.n_arcs = 0
+    z_break[0] = z_min
+    z_break[1] = z_max
+    if z_min < 0 < z_max:
+        z_break[n] = 0.0
+        n += 1
+    if z_cut > 0 and z_min < z_cut < z_max:
+        z_break[n] = z_cut
+        n += 1
+    if z_cut > 0 and z_min < -z_cut < z_max:
+        z_break[n] = -z_cut
+        n += 1
+    for i in range(1, n):
+        j = i
+        while j > 0 and z_break[j - 1] > z_break[j]:
+            z_break[j - 1], z_break[j] = z_break[j], z_break[j - 1]
+            j -= 1
+    for i in range(n):
+        rho_outer[i] = r_min + fabs(z_break[i]) * tan_theta
+        rho_inner[i] = max(rho_outer[i] - z_offset * tan_theta, 0.0)
+    for i in range(n - 1):
+        profile_add_segment(&profile, rho_outer[i], z_break[i], rho_outer[i + 1], z_break[i + 1], False)
+        profile_add_segment(&profile, rho_inner[i], z_break[i], rho_inner[i + 1], z_break[i + 1],
+                            rho_inner[i] <= 0 and rho_inner[i + 1] <= 0)
+    profile_add_segment(&profile, rho_inner[0], z_break[0], rho_outer[0], z_break[0], False)
+    profile_add_segment(&profile, rho_inner[n - 1], z_break[n - 1], rho_outer[n - 1], z_break[n - 1], False)
+    return profile
+
+
+cdef Profile toric_wedge_profile(double r_torus, double r_tube_min, double r_tube_max,
+                                 double theta_min, double theta_max) nogil:
+    cdef Profile profile
+    profile.kind = TORIC_WEDGE
+    profile.parameters[0] = r_torus
+    profile.parameters[1] = r_tube_min
+    profile.parameters[2] = r_tube_max
+    profile.parameters[3] = theta_min
+    profile.parameters[4] = theta_max
+    profile.n_segments = 0
+    profile.n_arcs = 0
+    profile_add_arc(&profile, r_torus, 0, r_tube_max, theta_min, theta_max - theta_min)
+    if r_tube_min > 0:
+        profile_add_arc(&profile, r_torus, 0, r_tube_min, theta_min, theta_max - theta_min)
+    if theta_max - theta_min < 2 * M_PI:
+        profile_add_segment(&profile, r_torus + r_tube_min * cos(theta_min), r_tube_min * sin(theta_min),
+                            r_torus + r_tube_max * cos(theta_min), r_tube_max * sin(theta_min), False)
+        profile_add_segment(&profile, r_torus + r_tube_min * cos(theta_max), r_tube_min * sin(theta_max),
+                            r_torus + r_tube_max * cos(theta_max), r_tube_max * sin(theta_max), False)
+    return profile
+
+
+@boundscheck(False)
+@wraparound(False)
+cdef double parallelepiped_signed_distance_point(double x, double y, double z, double[:, :] vectors,
+                                                 double[:, :] inverse) nogil:
+    cdef:
+        int j, k, c, c1, c2, j1, j2
+        double f[3]
+        double norm[3]
+        double s, fj, d = DBL_MAX
+        double ax, ay, az, bx, by, bz, t, length2
+        bint inside = True, on_face
+    for k in range(3):
+        f[k] = x * inverse[0, k] + y * inverse[1, k] + z * inverse[2, k]
+        norm[k] = sqrt(inverse[0, k] * inverse[0, k] + inverse[1, k] * inverse[1, k] +
+                       inverse[2, k] * inverse[2, k])
+        if f[k] < 0 or f[k] > 1:
+            inside = False
+    if inside:
+        for k in range(3):
+            d = min(d, min(f[k], 1 - f[k]) / norm[k])
+        return -d
+    for k in range(3):
+        for c in range(2):
+            s = f[k] - c
+            on_face = True
+            for j in range(3):
+                if j != k:
+                    fj = f[j] - s * (inverse[0, k] * inverse[0, j] + inverse[1, k] * inverse[1, j] +
+                                     inverse[2, k] * inverse[2, j]) / (norm[k] * norm[k])
+                    if fj < 0 or fj > 1:
+                        on_face = False
+            if on_face:
+                d = min(d, fabs(s) / norm[k])
+        j1 = (k + 1) % 3
+        j2 = (k + 2) % 3
+        length2 = vectors[k, 0] * vectors[k, 0] + vectors[k, 1] * vectors[k, 1] + vectors[k, 2] * vectors[k, 2]
+        for c1 in range(2):
+            for c2 in range(2):
+                ax = x - c1 * vectors[j1, 0] - c2 * vectors[j2, 0]
+                ay = y - c1 * vectors[j1, 1] - c2 * vectors[j2, 1]
+                az = z - c1 * vectors[j1, 2] - c2 * vectors[j2, 2]
+                t = min(max((ax * vectors[k, 0] + ay * vectors[k, 1] + az * vectors[k, 2]) / length2, 0.0), 1.0)
+                bx = ax - t * vectors[k, 0]
+                by = ay - t * vectors[k, 1]
+                bz = az - t * vectors[k, 2]
+                d = min(d, sqrt(bx * bx + by * by + bz * bz))
+    return d
+
+
+@boundscheck(False)
+@wraparound(False)
+cdef double[:] revolved_signed_distance_array(double[:, :] xyz, double phi, Profile* profile):
+    cdef:
+        int i, n = xyz.shape[0]
+        array[double] result, template = array('d')
+    result = clone(template, n, zero=False)
+    with nogil:
+        for i in prange(n):
+            result[i] = revolved_signed_distance(xyz[i, 0], xyz[i, 1], xyz[i, 2], phi, profile)
+    return result
+
+
+cpdef double[:] spherical_wedge_signed_distance(double[:, :] xyz, double r_inner, double r_outer, double phi,
+                                               double theta_min, double theta_max):
+    """
+    Calculates signed distance from points to the spherical wedge surface
+    :param xyz: array of N points in the figure coordinate system with shape (N, 3)
+    :return: array of N distances, negative inside the figure
+    """
+    cdef Profile profile = spherical_wedge_profile(r_inner, r_outer, theta_min, theta_max)
+    return revolved_signed_distance_array(xyz, phi, &profile)
+
+
+cpdef double[:] spherical_segment_wedge_signed_distance(double[:, :] xyz, double r_inner, double r_outer,
+                                                       double phi, double h1, double h2):
+    """
+    Calculates signed distance from points to the spherical segment wedge surface
+    :param xyz: array of N points in the figure coordinate system with shape (N, 3)
+    :return: array of N distances, negative inside the figure
+    """
+    cdef Profile profile = spherical_segment_wedge_profile(r_inner, r_outer, h1, h2)
+    return revolved_signed_distance_array(xyz, phi, &profile)
+
+
+cpdef double[:] cylindrical_wedge_signed_distance(double[:, :] xyz, double r_inner, double r_outer, double phi,
+                                                 double z_min, double z_max):
+    """
+    Calculates signed distance from points to the cylindrical wedge surface
+    :param xyz: array of N points in the figure coordinate system with shape (N, 3)
+    :return: array of N distances, negative inside the figure
+    """
+    cdef Profile profile = cylindrical_wedge_profile(r_inner, r_outer, z_min, z_max)
+    return revolved_signed_distance_array(xyz, phi, &profile)
+
+
+cpdef double[:] conical_wedge_signed_distance(double[:, :] xyz, double tan_theta, double phi, double z_min,
+                                             double z_max, double z_offset, double r_min):
+    """
+    Calculates signed distance from points to the conical wedge surface
+    :param xyz: array of N points in the figure coordinate system with shape (N, 3)
+    :return: array of N distances, negative inside the figure
+    """
+    cdef Profile profile = conical_wedge_profile(tan_theta, z_min, z_max, z_offset, r_min)
+    return revolved_signed_distance_array(xyz, phi, &profile)
+
+
+cpdef double[:] toric_wedge_signed_distance(double[:, :] xyz, double r_torus, double r_tube_min,
+                                           double r_tube_max, double phi, double theta_min, double theta_max):
+    """
+    Calculates signed distance from points to the toric wedge surface
+    :param xyz: array of N points in the figure coordinate system with shape (N, 3)
+    :return: array of N distances, negative inside the figure
+    """
+    cdef Profile profile = toric_wedge_profile(r_torus, r_tube_min, r_tube_max, theta_min, theta_max)
+    return revolved_signed_distance_array(xyz, phi, &profile)
+
+
+@boundscheck(False)
+@wraparound(False)
+cpdef double[:] parallelepiped_signed_distance(double[:, :] xyz, double[:, :] vectors, double[:, :] inverse):
+    """
+    Calculates signed distance from points to the parallelepiped surface
+    :param xyz: array of N points in the figure coordinate system with shape (N, 3)
+    :param vectors: matrix of parallelepiped edge vectors (rows)
+    :param inverse: inverse of the vectors matrix
+    :return: array of N distances, negative inside the figure
+    """
+    cdef:
+        int i, n = xyz.shape[0]
+        array[double] result, template = array('d')
+    result = clone(template, n, zero=False)
+    with nogil:
+        for i in prange(n):
+            result[i] = parallelepiped_signed_distance_point(xyz[i, 0], xyz[i, 1], xyz[i, 2], vectors, inverse)
+    return result
+
+
+cdef bint revolved_contains(double x, double y, double z, double phi, Profile* profile) nogil:
+    cdef:
+        double alpha = atan2(y, x)
+    if alpha < 0:
+        alpha += 2 * M_PI
+    if phi < 2 * M_PI and alpha > phi:
+        return False
+    return profile_contains(profile, sqrt(x * x + y * y), z)
+
+
+cdef int quadratic_roots(double a, double b, double c, double* roots) nogil:
+    """
+    Finds real roots of a * t^2 + b * t + c = 0
+    """
+    cdef:
+        double discriminant, q
+    if fabs(a) <= 1e-14 * (fabs(b) + fabs(c)):
+        if b == 0:
+            return 0
+        roots[0] = -c / b
+        return 1
+    discriminant = b * b - 4 * a * c
+    if discriminant < 0:
+        return 0
+    q = -0.5 * (b + sqrt(discriminant)) if b >= 0 else -0.5 * (b - sqrt(discriminant))
+    if q == 0:
+        roots[0] = 0.0
+        return 1
+    roots[0] = q / a
+    roots[1] = c / q
+    return 2
+
+
+cdef double polynomial_value(double* c, int degree, double t) nogil:
+    cdef:
+        int k
+        double value = c[degree]
+    for k in range(degree - 1, -1, -1):
+        value = value * t + c[k]
+    return value
+
+
+cdef int polynomial_roots(double* c, int degree, double lo, double hi, double* roots) nogil:
+    """
+    Finds real roots of the polynomial with coefficients c (c[k] at t^k) of degree up to 4 in the range [lo, hi].
+    Roots of the derivative split the range into monotone intervals which are solved by bisection.
+    """
+    cdef:
+        int i, j, k, n = 0, n_breaks
+        double derivative[4]
+        double breaks[6]
+        double a, b, m, fa, fb, fm
+    if degree <= 2:
+        k = quadratic_roots(c[2] if degree == 2 else 0.0, c[1], c[0], breaks)
+        for i in range(k):
+            if lo <= breaks[i] <= hi:
+                roots[n] = breaks[i]
+                n += 1
+        return n
+    for k in range(degree):
+        derivative[k] = (k + 1) * c[k + 1]
+    breaks[0] = lo
+    n_breaks = 1 + polynomial_roots(derivative, degree - 1, lo, hi, &breaks[1])
+    breaks[n_breaks] = hi
+    n_breaks += 1
+    for i in range(1, n_breaks):
+        j = i
+        while j > 0 and breaks[j - 1] > breaks[j]:
+            breaks[j - 1], breaks[j] = breaks[j], breaks[j - 1]
+            j -= 1
+    for i in range(n_breaks - 1):
+        a = breaks[i]
+        b = breaks[i + 1]
+        fa = polynomial_value(c, degree, a)
+        fb = polynomial_value(c, degree, b)
+        if fa == 0:
+            if n == 0 or roots[n - 1] < a:
+                roots[n] = a
+                n += 1
+            continue
+        if fa * fb > 0 or b <= a:
+            continue
+        for k in range(200):
+            m = 0.5 * (a + b)
+            if m <= a or m >= b:
+                break
+            fm = polynomial_value(c, degree, m)
+            if fa * fm <= 0:
+                b = m
+            else:
+                a = m
+                fa = fm
+        roots[n] = 0.5 * (a + b)
+        n += 1
+    return n
+
+
+cdef int revolved_ray_candidates(double ox, double oy, double oz, double dx, double dy, double dz,
+                                 double phi, Profile* profile, double* t) nogil:
+    """
+    Collects ray parameters of intersections with all the surfaces bounding the solid of revolution:
+    planes, cones and cylinders of the profile segments, spheres and tori of the profile arcs
+    and azimuthal half-planes of the wedge. Direction must be a unit vector.
+    """
+    cdef:
+        int k, n = 0
+        double au, az, bu, bz, b, w, cu, cz, r, s, q, rho2, nx, ny, bound
+        double c[5]
+    for k in range(profile.n_segments):
+        if profile.axis[k]:
+            continue
+        au = profile.segments[4 * k]
+        az = profile.segments[4 * k + 1]
+        bu = profile.segments[4 * k + 2]
+        bz = profile.segments[4 * k + 3]
+        if fabs(bz - az) <= 1e-12 * (fabs(bu - au) + fabs(bz - az)):
+            if dz != 0:
+                t[n] = (az - oz) / dz
+                n += 1
+        else:
+            b = (bu - au) / (bz - az)
+            w = au - b * az + b * oz
+            n += quadratic_roots(dx * dx + dy * dy - b * b * dz * dz, 2 * (ox * dx + oy * dy - b * dz * w),
+                                 ox * ox + oy * oy - w * w, &t[n])
+    for k in range(profile.n_arcs):
+        cu = profile.arcs[5 * k]
+        cz = profile.arcs[5 * k + 1]
+        r = profile.arcs[5 * k + 2]
+        s = ox * dx + oy * dy + (oz - cz) * dz
+        q = ox * ox + oy * oy + (oz - cz) * (oz - cz)
+        if cu == 0:
+            n += quadratic_roots(1.0, 2 * s, q - r * r, &t[n])
+        else:
+            q += cu * cu - r * r
+            rho2 = dx * dx + dy * dy
+            c[4] = 1.0
+            c[3] = 4 * s
+            c[2] = 4 * s * s + 2 * q - 4 * cu * cu * rho2
+            c[1] = 4 * s * q - 8 * cu * cu * (ox * dx + oy * dy)
+            c[0] = q * q - 4 * cu * cu * (ox * ox + oy * oy)
+            bound = 1 + max(max(fabs(c[0]), fabs(c[1])), max(fabs(c[2]), fabs(c[3])))
+            n += polynomial_roots(c, 4, 0.0, bound, &t[n])
+    if phi < 2 * M_PI:
+        if dy != 0:
+            t[n] = -oy / dy
+            n += 1
+        nx = -sin(phi)
+        ny = cos(phi)
+        if dx * nx + dy * ny != 0:
+            t[n] = -(ox * nx + oy * ny) / (dx * nx + dy * ny)
+            n += 1
+    return n
+
+
+cdef double revolved_ray_hit(double ox, double oy, double oz, double dx, double dy, double dz,
+                             double phi, Profile* profile, Vector3* normal) nogil:
+    """
+    Finds the first crossing of the ray with the surface of the solid of revolution.
+    Candidate intersections are sorted and the first one where the membership of the ray changes is the hit.
+    Outward normal is the gradient of the signed distance at the hit point.
+    :return: distance along the ray or DBL_MAX if the ray misses the figure
+    """
+    cdef:
+        int i, j, n, m = 0
+        double t[48]
+        double t_next, x, y, z, h, gx, gy, gz, g
+        bint state, inside
+    n = revolved_ray_candidates(ox, oy, oz, dx, dy, dz, phi, profile, t)
+    for i in range(n):
+        if t[i] > 0:
+            t[m] = t[i]
+            j = m
+            while j > 0 and t[j - 1] > t[j]:
+                t[j - 1], t[j] = t[j], t[j - 1]
+                j -= 1
+            m += 1
+    if m == 0:
+        return DBL_MAX
+    x = 0.5 * t[0]
+    inside = revolved_contains(ox + x * dx, oy + x * dy, oz + x * dz, phi, profile)
+    for i in range(m):
+        t_next = t[i + 1] if i + 1 < m else 2 * t[i] + 1
+        if t_next <= t[i]:
+            continue
+        x = 0.5 * (t[i] + t_next)
+        state = revolved_contains(ox + x * dx, oy + x * dy, oz + x * dz, phi, profile)
+        if state != inside:
+            x = ox + t[i] * dx
+            y = oy + t[i] * dy
+            z = oz + t[i] * dz
+            h = 1e-7 * (1 + max(max(fabs(x), fabs(y)), fabs(z)))
+            gx = revolved_signed_distance(x + h, y, z, phi, profile) \
+                 - revolved_signed_distance(x - h, y, z, phi, profile)
+            gy = revolved_signed_distance(x, y + h, z, phi, profile) \
+                 - revolved_signed_distance(x, y - h, z, phi, profile)
+            gz = revolved_signed_distance(x, y, z + h, phi, profile) \
+                 - revolved_signed_distance(x, y, z - h, phi, profile)
+            g = sqrt(gx * gx + gy * gy + gz * gz)
+            if g > 0:
+                normal.x = gx / g
+                normal.y = gy / g
+                normal.z = gz / g
+            else:
+                normal.x = -dx if state else dx
+                normal.y = -dy if state else dy
+                normal.z = -dz if state else dz
+            return t[i]
+        inside = state
+    return DBL_MAX
+
+
+@boundscheck(False)
+@wraparound(False)
+cdef double parallelepiped_ray_hit(double ox, double oy, double oz, double dx, double dy, double dz,
+                                   double[:, :] inverse, Vector3* normal) nogil:
+    """
+    Finds the first crossing of the ray with the parallelepiped surface with the slab test
+    in fractional coordinates.
+    :return: distance along the ray or DBL_MAX if the ray misses the figure
+    """
+    cdef:
+        int k, k_near = 0, k_far = 0
+        double f, fd, t1, t2, t, g, t_near = -DBL_MAX, t_far = DBL_MAX
+        double side, side_near = 0.0, side_far = 0.0
+    for k in range(3):
+        f = ox * inverse[0, k] + oy * inverse[1, k] + oz * inverse[2, k]
+        fd = dx * inverse[0, k] + dy * inverse[1, k] + dz * inverse[2, k]
+        if fd == 0:
+            if f < 0 or f > 1:
+                return DBL_MAX
+            continue
+        t1 = -f / fd
+        t2 = (1 - f) / fd
+        side = -1.0
+        if t1 > t2:
+            t1, t2 = t2, t1
+            side = 1.0
+        if t1 > t_near:
+            t_near = t1
+            k_near = k
+            side_near = side
+        if t2 < t_far:
+            t_far = t2
+            k_far = k
+            side_far = -side
+    if t_near > t_far or t_far <= 0:
+        return DBL_MAX
+    if t_near > 0:
+        t = t_near
+        k = k_near
+        side = side_near
+    else:
+        t = t_far
+        k = k_far
+        side = side_far
+    g = sqrt(inverse[0, k] * inverse[0, k] + inverse[1, k] * inverse[1, k] + inverse[2, k] * inverse[2, k])
+    normal.x = side * inverse[0, k] / g
+    normal.y = side * inverse[1, k] / g
+    normal.z = side * inverse[2, k] / g
+    return t
+
+
+@boundscheck(False)
+@wraparound(False)
+cdef tuple revolved_intersect_rays_array(double[:, :] origins, double[:, :] directions, double phi,
+                                         Profile* profile):
+    cdef:
+        int i, n = origins.shape[0]
+        Vector3 normal
+        double[:] distance = np.empty(n, dtype=np.double)
+        double[:, :] normals = np.zeros((n, 3), dtype=np.double)
+    with nogil:
+        for i in prange(n):
+            normal = _zero_vector
+            distance[i] = revolved_ray_hit(origins[i, 0], origins[i, 1], origins[i, 2],
+                                           directions[i, 0], directions[i, 1], directions[i, 2],
+                                           phi, profile, &normal)
+            normals[i, 0] = normal.x
+            normals[i, 1] = normal.y
+            normals[i, 2] = normal.z
+    return ray_hits(distance, normals)
+
+
+cdef tuple ray_hits(double[:] distance, double[:, :] normals):
+    result = np.asarray(distance)
+    missed = result >= DBL_MAX
+    result[missed] = np.inf
+    np.asarray(normals)[missed] = 0.0
+    return result, np.asarray(normals)
+
+
+cpdef tuple spherical_wedge_intersect_rays(double[:, :] origins, double[:, :] directions, double r_inner,
+                                           double r_outer, double phi, double theta_min, double theta_max):
+    """
+    Finds the first intersection of rays with the spherical wedge surface
+    :param origins: array of N ray origins in the figure coordinate system with shape (N, 3)
+    :param directions: array of N unit ray directions with shape (N, 3)
+    :return: tuple of distances (inf for missed rays) and outward surface normals at the hit points
+    """
+    cdef Profile profile = spherical_wedge_profile(r_inner, r_outer, theta_min, theta_max)
+    return revolved_intersect_rays_array(origins, directions, phi, &profile)
+
+
+cpdef tuple spherical_segment_wedge_intersect_rays(double[:, :] origins, double[:, :] directions, double r_inner,
+                                                   double r_outer, double phi, double h1, double h2):
+    """
+    Finds the first intersection of rays with the spherical segment wedge surface
+    :param origins: array of N ray origins in the figure coordinate system with shape (N, 3)
+    :param directions: array of N unit ray directions with shape (N, 3)
+    :return: tuple of distances (inf for missed rays) and outward surface normals at the hit points
+    """
+    cdef Profile profile = spherical_segment_wedge_profile(r_inner, r_outer, h1, h2)
+    return revolved_intersect_rays_array(origins, directions, phi, &profile)
+
+
+cpdef tuple cylindrical_wedge_intersect_rays(double[:, :] origins, double[:, :] directions, double r_inner,
+                                             double r_outer, double phi, double z_min, double z_max):
+    """
+    Finds the first intersection of rays with the cylindrical wedge surface
+    :param origins: array of N ray origins in the figure coordinate system with shape (N, 3)
+    :param directions: array of N unit ray directions with shape (N, 3)
+    :return: tuple of distances (inf for missed rays) and outward surface normals at the hit points
+    """
+    cdef Profile profile = cylindrical_wedge_profile(r_inner, r_outer, z_min, z_max)
+    return revolved_intersect_rays_array(origins, directions, phi, &profile)
+
+
+cpdef tuple conical_wedge_intersect_rays(double[:, :] origins, double[:, :] directions, double tan_theta,
+                                         double phi, double z_min, double z_max, double z_offset, double r_min):
+    """
+    Finds the first intersection of rays with the conical wedge surface
+    :param origins: array of N ray origins in the figure coordinate system with shape (N, 3)
+    :param directions: array of N unit ray directions with shape (N, 3)
+    :return: tuple of distances (inf for missed rays) and outward surface normals at the hit points
+    """
+    cdef Profile profile = conical_wedge_profile(tan_theta, z_min, z_max, z_offset, r_min)
+    return revolved_intersect_rays_array(origins, directions, phi, &profile)
+
+
+cpdef tuple toric_wedge_intersect_rays(double[:, :] origins, double[:, :] directions, double r_torus,
+                                       double r_tube_min, double r_tube_max, double phi,
+                                       double theta_min, double theta_max):
+    """
+    Finds the first intersection of rays with the toric wedge surface
+    :param origins: array of N ray origins in the figure coordinate system with shape (N, 3)
+    :param directions: array of N unit ray directions with shape (N, 3)
+    :return: tuple of distances (inf for missed rays) and outward surface normals at the hit points
+    """
+    cdef Profile profile = toric_wedge_profile(r_torus, r_tube_min, r_tube_max, theta_min, theta_max)
+    return revolved_intersect_rays_array(origins, directions, phi, &profile)
+
+
+@boundscheck(False)
+@wraparound(False)
+cpdef tuple parallelepiped_intersect_rays(double[:, :] origins, double[:, :] directions, double[:, :] inverse):
+    """
+    Finds the first intersection of rays with the parallelepiped surface
+    :param origins: array of N ray origins in the figure coordinate system with shape (N, 3)
+    :param directions: array of N unit ray directions with shape (N, 3)
+    :param inverse: inverse of the matrix of parallelepiped edge vectors (rows)
+    :return: tuple of distances (inf for missed rays) and outward surface normals at the hit points
+    """
+    cdef:
+        int i, n = origins.shape[0]
+        Vector3 normal
+        double[:] distance = np.empty(n, dtype=np.double)
+        double[:, :] normals = np.zeros((n, 3), dtype=np.double)
+    with nogil:
+        for i in prange(n):
+            normal = _zero_vector
+            distance[i] = parallelepiped_ray_hit(origins[i, 0], origins[i, 1], origins[i, 2],
+                                                 directions[i, 0], directions[i, 1], directions[i, 2],
+                                                 inverse, &normal)
+            normals[i, 0] = normal.x
+            normals[i, 1] = normal.y
+            normals[i, 2] = normal.z
+    return ray_hits(distance, normals)
+
+
+cpdef object sector_bounding_box(double rho_max, double phi, double z_min, double z_max):
+    """
+    Calculates bounding box of the azimuthal sector [0, phi] of a solid of revolution
+    :param rho_max: maximal distance of the solid from z axis
+    :param phi: azimuthal angle of the sector
+    :param z_min: lower limit of the solid along z axis
+    :param z_max: upper limit of the solid along z axis
+    :return: array of lower and upper corners of the box with shape (2, 3)
+    """
+    cdef:
+        int k
+        double angle
+    x = [0.0, rho_max, rho_max * cos(phi)]
+    y = [0.0, 0.0, rho_max * sin(phi)]
+    for k in range(1, 4):
+        angle = k * M_PI / 2
+        if angle <= phi:
+            x.append(rho_max * cos(angle))
+            y.append(rho_max * sin(angle))
+    return np.array([[min(x), min(y), z_min], [max(x), max(y), z_max]], dtype=np.double)
@@ -0,0 +1,4 @@
+cdef double sobol_coordinate(unsigned long long index, int dimension, unsigned int shift) nogil
+cdef double radical_inverse(unsigned long long index, unsigned int base) nogil
+cpdef double[:, :] sobol_points(unsigned long long start, int n, unsigned int[:] shift)
+cpdef double[:, :] halton_points(unsigned long long start, int n, double[:] shift)
@@ -0,0 +1,110 @@
+import numpy as np
+
+from cython import boundscheck, wraparound
+from cython.parallel import prange
+
+
+# Direction numbers of the first three dimensions of Sobol sequence
+cdef unsigned int _directions[3][32]
+# Bases of the three dimensions of Halton sequence
+cdef unsigned int _halton_bases[3]
+_halton_bases[:] = [2, 3, 5]
+
+
+cdef void _init_directions():
+    """
+    Fills direction numbers from primitive polynomials x + 1 and x^2 + x + 1
+    and initial numbers m = (1) and m = (1, 3) of Joe and Kuo
+    """
+    cdef:
+        int k
+        unsigned long long m[32]
+    for k in range(32):
+        _directions[0][k] = 1u << (31 - k)
+    m[0] = 1
+    for k in range(1, 32):
+        m[k] = (m[k - 1] << 1) ^ m[k - 1]
+    for k in range(32):
+        _directions[1][k] = <unsigned int> (m[k] << (31 - k))
+    m[0] = 1
+    m[1] = 3
+    for k in range(2, 32):
+        m[k] = (m[k - 1] << 1) ^ (m[k - 2] << 2) ^ m[k - 2]
+    for k in range(32):
+        _directions[2][k] = <unsigned int> (m[k] << (31 - k))
+
+
+_init_directions()
+
+
+cdef double sobol_coordinate(unsigned long long index, int dimension, unsigned int shift) nogil:
+    """
+    Coordinate of Sobol point with given index calculated directly from the index bits,
+    so the points are generated independently of each other.
+    Random digital shift (XOR with shift) keeps the point set structure and makes every point uniformly distributed.
+    """
+    cdef:
+        unsigned int x = 0
+        int k = 0
+    while index > 0 and k < 32:
+        if index & 1:
+            x ^= _directions[dimension][k]
+        index >>= 1
+        k += 1
+    return (x ^ shift) * 2.3283064365386963e-10
+
+
+cdef double radical_inverse(unsigned long long index, unsigned int base) nogil:
+    """
+    Van der Corput radical inverse of the index in given base
+    """
+    cdef:
+        double f = 1.0, result = 0.0
+    while index > 0:
+        f /= base
+        result += f * (index % base)
+        index //= base
+    return result
+
+
+@boundscheck(False)
+@wraparound(False)
+cpdef double[:, :] sobol_points(unsigned long long start, int n, unsigned int[:] shift):
+    """
+    Generates points of digitally shifted three-dimensional Sobol sequence in the unit cube in parallel
+    :param start: index of the first point
+    :param n: number of points, powers of two give the balanced point sets
+    :param shift: array of three random 32-bit integers used for digital shift, zeros give the original sequence
+    :return: array of points with shape (n, 3)
+    """
+    cdef:
+        int i, j
+        double[:, :] points = np.empty((n, 3), dtype=np.double)
+    with nogil:
+        for i in prange(n):
+            for j in range(3):
+                points[i, j] = sobol_coordinate(start + i, j, shift[j])
+    return points
+
+
+@boundscheck(False)
+@wraparound(False)
+cpdef double[:, :] halton_points(unsigned long long start, int n, double[:] shift):
+    """
+    Generates points of randomly shifted (Cranley-Patterson rotation) three-dimensional Halton sequence
+    in the unit cube in parallel
+    :param start: index of the first point
+    :param n: number of points
+    :param shift: array of three shifts in [0, 1), zeros give the original sequence
+    :return: array of points with shape (n, 3)
+    """
+    cdef:
+        int i, j
+        double x
+        double[:, :] points = np.empty((n, 3), dtype=np.double)
+    with nogil:
+        for i in prange(n):
+            for j in range(3):
+                x = radical_inverse(start + i, _halton_bases[j]) + shift[j]
+                points[i, j] = x - 1.0 if x >= 1.0 else x
+    return points
@@ -0,0 +1,132 @@
+import numpy as np
+
+from BDSpace.Coordinates.transforms import spherical_to_cartesian, cylindrical_to_cartesian
+
+
+def uniform_variates(n, rng=None, stratified=False):
+    """
+    Generates uniform variates in the unit cube
+    :param n: number of points
+    :param rng: numpy random Generator, seed or None
+    :param stratified: if True every coordinate is stratified into n strata (Latin hypercube sampling)
+    :return: array of variates with shape (n, 3)
+    """
+    rng = np.random.default_rng(rng)
+    if not stratified:
+        return rng.random((n, 3))
+    u = np.empty((n, 3), dtype=np.float64)
+    for j in range(3):
+        u[:, j] = (rng.permutation(n) + rng.random(n)) / n
+    return u
+
+
+def inverse_cdf(cdf, target, lower, upper, pdf=None, iterations=64):
+    """
+    Solves cdf(x) = target for monotonically increasing function by vectorized bisection.
+    If the derivative is given Newton steps are taken while they stay inside the bracket of the solution.
+    :param cdf: cumulative function of the array of arguments
+    :param target: array of target values
+    :param lower: lower bound of the solution
+    :param upper: upper bound of the solution
+    :param pdf: derivative of the cumulative function or None
+    :param iterations: maximal number of iterations
+    :return: array of solutions
+    """
+    lower = np.array(np.broadcast_to(lower, target.shape), dtype=np.float64)
+    upper = np.array(np.broadcast_to(upper, target.shape), dtype=np.float64)
+    x = (lower + upper) / 2
+    tolerance = 1e-14 * (np.abs(lower) + np.abs(upper))
+    for _ in range(iterations):
+        residual = cdf(x) - target
+        below = residual < 0
+        lower = np.where(below, x, lower)
+        upper = np.where(below, upper, x)
+        x_next = (lower + upper) / 2
+        if pdf is not None:
+            with np.errstate(divide='ignore', invalid='ignore'):
+                newton = x - residual / pdf(x)
+            inside = (newton >= lower) & (newton <= upper)
+            x_next = np.where(inside, newton, x_next)
+        if np.all(np.abs(x_next - x) <= tolerance):
+            return x_next
+        x = x_next
+    return x
+
+
+def quadratic_integral(density, edges):
+    """
+    Integral of the function which is a polynomial of at most second degree between neighbouring edges.
+    Simpson rule is exact for such pieces.
+    :param density: function of the array of arguments
+    :param edges: breakpoints of the function
+    :return: integral from the first to the last edge
+    """
+    edges = np.unique(edges)
+    a, b = edges[:-1], edges[1:]
+    return np.sum((b - a) / 6 * (density(a) + 4 * density((a + b) / 2) + density(b)))
+
+
+def quadratic_inverse(density, edges, u):
+    """
+    Inverse transform sampling of the density which is a polynomial of at most second degree
+    between neighbouring edges
+    :param density: nonnegative function of the array of arguments
+    :param edges: breakpoints of the density
+    :param u: array of uniform variates
+    :return: array of samples
+    """
+    edges = np.unique(edges)
+    a, b = edges[:-1], edges[1:]
+    cumulative = np.concatenate(([0.0], np.cumsum((b - a) / 6 * (density(a) + 4 * density((a + b) / 2)
+                                                                  + density(b)))))
+
+    def cdf(x):
+        k = np.clip(np.searchsorted(edges, x, side='right') - 1, 0, a.size - 1)
+        e = edges[k]
+        return cumulative[k] + (x - e) / 6 * (density(e) + 4 * density((e + x) / 2) + density(x))
+
+    return inverse_cdf(cdf, u * cumulative[-1], edges[0], edges[-1], pdf=density)
+
+
+def sample_faces(faces, u):
+    """
+    Samples points on the surface composed of faces, faces are chosen with probability proportional to their areas
+    :param faces: list of tuples of face area and function mapping array of uniform variates with shape (m, 2)
+                  to the points on the face with shape (m, 3)
+    :param u: array of uniform variates with shape (n, 3), first variate chooses the face
+    :return: array of points with shape (n, 3)
+    """
+    areas = np.array([area for area, _ in faces], dtype=np.float64)
+    if areas.sum() <= 0:
+        raise ValueError('Figure has no surface to sample')
+    face = np.searchsorted(np.cumsum(areas) / areas.sum(), u[:, 0], side='right')
+    face = np.minimum(face, len(faces) - 1)
+    xyz = np.empty((u.shape[0], 3), dtype=np.float64)
+    for k, (area, sampler) in enumerate(faces):
+        chosen = face == k
+        if area > 0 and np.any(chosen):
+            xyz[chosen] = sampler(u[chosen, 1:])
+    return xyz
+
+
+def spherical_points(r, theta, phi):
+    """
+    Cartesian coordinates of points given by arrays of spherical coordinates
+    """
+    return np.asarray(spherical_to_cartesian(np.column_stack(np.broadcast_arrays(r, theta, phi))
+                                             .astype(np.float64)))
+
+
+def cylindrical_points(rho, phi, z):
+    """
+    Cartesian coordinates of points given by arrays of cylindrical coordinates
+    """
+    return np.asarray(cylindrical_to_cartesian(np.column_stack(np.broadcast_arrays(rho, phi, z))
+                                               .astype(np.float64)))
+
+
+def full_turn(angle):
+    """
+    Checks if the angular range closes the full turn, faces bounding the range are absent then
+    """
+    return np.isclose(angle, 2 * np.pi)
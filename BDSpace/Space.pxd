@@ -8,6 +8,35 @@ cdef class Space(object):
         Space __parent
         dict __elements
 
+        Cartesian __global_coordinate_system
+        bint __global_valid
+        unsigned long __global_generation
+        dict __transforms_cache
+
+        unsigned long __geometry_generation
+        tuple __box_state
+        unsigned long __box_generation
+        object __box_own
+        object __box_local
+        object __box_global
+
+        object __observers
+        object __weakref__
+
+    cdef Cartesian __global_basis(self)
+    cdef void __invalidate_global(self)
+    cpdef void coordinate_system_changed(self, Cartesian coordinate_system) except *
+    cdef tuple __chain_transform(self, Space ancestor)
+    cdef tuple __relative_transform(self, Space other)
+    cpdef void geometry_changed(self) except *
+    cdef unsigned long __update_bounding_box(self)
+    cpdef object bounding_box(self, bint local=*)
+    cdef void __ray_nodes(self, list nodes) except *
+
+    cpdef add_observer(self, observer)
+    cpdef remove_observer(self, observer)
+    cdef void __notify(self, Space space, bint subtree) except *
+
     cpdef bint add_element(self, Space element)
     cpdef bint remove_element(self, Space element)
     cpdef void detach_from_parent(self)
@@ -18,3 +47,5 @@ cdef class Space(object):
     cpdef Cartesian basis_in_global_coordinate_system(self)
     cpdef double[:] to_local_coordinate_system_vector(self, double[:] xyz)
     cpdef double[:, :] to_local_coordinate_system(self, double[:, :] xyz)
+    cpdef double[:] transform_to_vector(self, Space other, double[:] xyz)
+    cpdef double[:, :] transform_to(self, Space other, double[:, :] xyz)
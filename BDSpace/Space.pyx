@@ -1,24 +1,46 @@
 import numpy as np
+from weakref import WeakSet
 
 from cython import boundscheck, wraparound
+from cython.parallel import prange
 
 from cpython.array cimport array, clone
+from libc.float cimport DBL_MAX
+
 
 from BDSpace.Coordinates.Cartesian cimport Cartesian
+from BDSpace.Coordinates.transforms cimport affine_transform
 
 from ._version import __version__
 
 
+# Global counter used to stamp every rebuild of the cached global coordinate system
+cdef unsigned long _global_generation = 0
+# Maximal number of cached Space-to-Space transforms kept by each Space
+cdef int _transforms_cache_size = 64
+# Global counter used to stamp every recalculation of the cached bounding boxes
+cdef unsigned long _box_generation = 0
+
+
 cdef class Space(object):
 
     def __init__(self, str name, Cartesian coordinate_system=None):
         self.__name = name
-        if coordinate_system is None:
-            self.__coordinate_system = Cartesian()
-        else:
-            self.__coordinate_system = coordinate_system
+        self.__global_coordinate_system = None
+        self.__global_valid = False
+        self.__global_generation = 0
+        self.__transforms_cache = {}
+        self.__box_state = None
+        self.__box_own = None
+        self.__box_local = None
+        self.__box_global = None
+        self.__observers = WeakSet()
         self.__parent = None
         self.__elements = {}
+        if coordinate_system is None:
+            self.coordinate_system = Cartesian()
+        else:
+            self.coordinate_system = coordinate_system
 
     @property
     def name(self):
@@ -34,7 +56,12 @@ cdef class Space(object):
 
     @coordinate_system.setter
     def coordinate_system(self, Cartesian coordinate_system):
+        if self.__coordinate_system is not None:
+            self.__coordinate_system.remove_observer(self)
         self.__coordinate_system = coordinate_system
+        self.__coordinate_system.add_observer(self)
+        self.__invalidate_global()
+        self.__notify(self, True)
 
     @property
     def parent(self):
@@ -44,6 +71,7 @@ cdef class Space(object):
     def parent(self, parent):
         if isinstance(parent, Space) or parent is None:
             self.__parent = parent
+            self.__invalidate_global()
         else:
             raise ValueError('Only Space object or None are accepted for parent.')
 
@@ -51,23 +79,75 @@ cdef class Space(object):
     def elements(self):
         return self.__elements
 
+    @property
+    def global_generation(self):
+        """
+        Stamp of the cached global coordinate system. Changes every time the global coordinate system
+        of the Space is rebuilt after coordinate system change of the Space or any of its parents or reparenting.
+        """
+        self.__global_basis()
+        return self.__global_generation
+
     def __str__(self):
         description = 'BDSpace: %s\n' % self.name
         description += str(self.coordinate_system)
         return description
 
+    cpdef void coordinate_system_changed(self, Cartesian coordinate_system) except *:
+        """
+        Callback for the observed coordinate systems. Marks cached global coordinate system
+        of the Space and all its subspaces as outdated.
+        :param coordinate_system: changed Cartesian coordinate system
+        """
+        self.__invalidate_global()
+        self.__notify(self, True)
+
+    cdef void __invalidate_global(self):
+        cdef:
+            Space element
+        # subspace can not have valid cache if its parent cache is invalid
+        if self.__global_valid:
+            self.__global_valid = False
+            for element in self.__elements.values():
+                element.__invalidate_global()
+
+    @boundscheck(False)
+    @wraparound(False)
+    cdef Cartesian __global_basis(self):
+        global _global_generation
+        cdef:
+            Cartesian parent_basis
+            double[:, :] basis
+            double[:] origin
+        if self.__global_valid:
+            return self.__global_coordinate_system
+        if self.__global_coordinate_system is not None:
+            self.__global_coordinate_system.remove_observer(self)
+        if self.__parent is None:
+            # root Space caches a copy, so that modification of the returned object does not move the Space
+            basis = np.array(self.__coordinate_system.basis, dtype=np.double)
+            origin = self.__coordinate_system.origin
+        else:
+            parent_basis = self.__parent.__global_basis()
+            basis = np.dot(np.asarray(self.__coordinate_system.basis), np.asarray(parent_basis.basis))
+            origin = parent_basis.to_parent_vector(self.__coordinate_system.origin)
+        self.__global_coordinate_system = Cartesian(basis=basis, origin=origin,
+                                                    name=self.__coordinate_system.name,
+                                                    labels=self.__coordinate_system.labels)
+        # cached coordinate system is observed to catch its modification from outside
+        self.__global_coordinate_system.add_observer(self)
+        _global_generation += 1
+        self.__global_generation = _global_generation
+        self.__global_valid = True
+        return self.__global_coordinate_system
+
     cpdef double[:] to_global_coordinate_system_vector(self, double[:] xyz):
         """
         convert local points coordinates xyz to global coordinate system coordinates
         :param xyz: 3D vector
         :return: 3D vector in global coordinates system
         """
-        cdef:
-            double[:] parent_xyz = self.coordinate_system.to_parent_vector(xyz)
-        if self.__parent is None:
-            return parent_xyz
-        else:
-            return self.parent.to_global_coordinate_system_vector(parent_xyz)
+        return self.__global_basis().to_parent_vector(xyz)
 
     cpdef double[:, :] to_global_coordinate_system(self, double[:, :] xyz):
         """
@@ -75,60 +155,15 @@ cdef class Space(object):
         :param xyz: array of points shaped Nx3
         :return: array of points in global coordinates system
         """
-        parent_xyz = self.coordinate_system.to_parent(xyz)
-        if self.parent is None:
-            return parent_xyz
-        else:
-            return self.parent.to_global_coordinate_system(parent_xyz)
+        return self.__global_basis().to_parent(xyz)
 
-    @boundscheck(False)
     cpdef Cartesian basis_in_global_coordinate_system(self):
         """
-        returns local coordinate system basis in global coordinate system as Cartesian class object
+        returns local coordinate system basis in global coordinate system as Cartesian class object.
+        The object is cached and rebuilt only when coordinate system of the Space or of any of its parents changes.
         :return: local Cartesian coordinate system in global coordinate system
         """
-        cdef:
-            double[:, :] basis = np.empty((3, 3), dtype=np.double)
-            double[:] origin
-            array[double] template = array('d')
-        origin = clone(template, 3, zero=False)
-        origin[0] = self.coordinate_system.origin[0]
-        origin[1] = self.coordinate_system.origin[1]
-        origin[2] = self.coordinate_system.origin[2]
-        basis[0, 0] = self.coordinate_system.basis[0, 0]
-        basis[0, 1] = self.coordinate_system.basis[0, 1]
-        basis[0, 2] = self.coordinate_system.basis[0, 2]
-        basis[1, 0] = self.coordinate_system.basis[1, 0]
-        basis[1, 1] = self.coordinate_system.basis[1, 1]
-        basis[1, 2] = self.coordinate_system.basis[1, 2]
-        basis[2, 0] = self.coordinate_system.basis[2, 0]
-        basis[2, 1] = self.coordinate_system.basis[2, 1]
-        basis[2, 2] = self.coordinate_system.basis[2, 2]
-        if self.parent is not None:
-            basis[0, 0] += origin[0]
-            basis[0, 1] += origin[1]
-            basis[0, 2] += origin[2]
-            basis[1, 0] += origin[0]
-            basis[1, 1] += origin[1]
-            basis[1, 2] += origin[2]
-            basis[2, 0] += origin[0]
-            basis[2, 1] += origin[1]
-            basis[2, 2] += origin[2]
-            basis = self.parent.to_global_coordinate_system(basis)
-            origin = self.parent.to_global_coordinate_system_vector(origin)
-            basis[0, 0] -= origin[0]
-            basis[0, 1] -= origin[1]
-            basis[0, 2] -= origin[2]
-            basis[1, 0] -= origin[0]
-            basis[1, 1] -= origin[1]
-            basis[1, 2] -= origin[2]
-            basis[2, 0] -= origin[0]
-            basis[2, 1] -= origin[1]
-            basis[2, 2] -= origin[2]
-        name = self.coordinate_system.name
-        labels = self.coordinate_system.labels
-        coordinate_system = Cartesian(basis=basis, origin=origin, name=name, labels=labels)
-        return coordinate_system
+        return self.__global_basis()
 
     cpdef double[:] to_local_coordinate_system_vector(self, double[:] xyz):
         """
@@ -136,9 +171,7 @@ cdef class Space(object):
         :param xyz: array of points shaped Nx3
         :return: array of points in local coordinates system
         """
-        cdef:
-            Cartesian basis_global = self.basis_in_global_coordinate_system()
-        return basis_global.to_local_vector(xyz)
+        return self.__global_basis().to_local_vector(xyz)
 
     cpdef double[:, :] to_local_coordinate_system(self, double[:, :] xyz):
         """
@@ -146,9 +179,101 @@ cdef class Space(object):
         :param xyz: array of points shaped Nx3
         :return: array of points in local coordinates system
         """
+        return self.__global_basis().to_local(xyz)
+
+    cdef tuple __chain_transform(self, Space ancestor):
+        """
+        Composes transform from the Space local coordinates to the coordinates of the ancestor Space
+        as a pair (m, t), so that xyz_ancestor = xyz * m + t.
+        If ancestor is None the transform to the global coordinate system is returned.
+        """
+        cdef:
+            Space node = self
+        m = np.eye(3, dtype=np.double)
+        t = np.zeros(3, dtype=np.double)
+        while node is not ancestor:
+            basis = np.asarray(node.__coordinate_system.basis)
+            m = np.dot(m, basis)
+            t = np.dot(t, basis) + np.asarray(node.__coordinate_system.origin)
+            node = node.__parent
+        return m, t
+
+    cdef tuple __relative_transform(self, Space other):
+        """
+        Returns transform (m, t) from the Space local coordinates to the local coordinates of the other Space,
+        so that xyz_other = xyz * m + t. The transform is composed up to the lowest common ancestor
+        of both Spaces and cached until any of the two Spaces or their parents move.
+        """
+        cdef:
+            Space node, ancestor = None
+            unsigned long self_generation, other_generation
+            set self_ancestors = set()
+        self.__global_basis()
+        other.__global_basis()
+        self_generation = self.__global_generation
+        other_generation = other.__global_generation
+        key = id(other)
+        cached = self.__transforms_cache.pop(key, None)
+        if cached is not None and cached[0] == self_generation and cached[1] == other_generation:
+            # reinsert to keep the dict ordered by the last use
+            self.__transforms_cache[key] = cached
+            return cached[2], cached[3]
+        node = self
+        while node is not None:
+            self_ancestors.add(id(node))
+            node = node.__parent
+        node = other
+        while node is not None:
+            if id(node) in self_ancestors:
+                ancestor = node
+                break
+            node = node.__parent
+        m_self, t_self = self.__chain_transform(ancestor)
+        m_other, t_other = other.__chain_transform(ancestor)
+        m = np.dot(m_self, m_other.T)
+        t = np.dot(t_self - t_other, m_other.T)
+        if len(self.__transforms_cache) >= _transforms_cache_size:
+            # evict the least recently used transform
+            del self.__transforms_cache[next(iter(self.__transforms_cache))]
+        self.__transforms_cache[key] = (self_generation, other_generation, m, t)
+        return m, t
+
+    @boundscheck(False)
+    @wraparound(False)
+    cpdef double[:] transform_to_vector(self, Space other, double[:] xyz):
+        """
+        convert local point coordinates xyz to local coordinates of other Space
+        :param other: target Space
+        :param xyz: 3D vector
+        :return: 3D vector in local coordinates of other Space
+        """
+        cdef:
+            double[:, :] m
+            double[:] t
+            array[double] result, template = array('d')
+        m, t = self.__relative_transform(other)
+        result = clone(template, 3, zero=False)
+        result[0] = xyz[0] * m[0, 0] + xyz[1] * m[1, 0] + xyz[2] * m[2, 0] + t[0]
+        result[1] = xyz[0] * m[0, 1] + xyz[1] * m[1, 1] + xyz[2] * m[2, 1] + t[1]
+        result[2] = xyz[0] * m[0, 2] + xyz[1] * m[1, 2] + xyz[2] * m[2, 2] + t[2]
+        return result
+
+    cpdef double[:, :] transform_to(self, Space other, double[:, :] xyz):
+        """
+        convert local points coordinates xyz to local coordinates of other Space in a single pass
+        without conversion to the global coordinate system
+        :param other: target Space
+        :param xyz: array of points shaped Nx3
+        :return: array of points in local coordinates of other Space
+        """
         cdef:
-            Cartesian basis_global = self.basis_in_global_coordinate_system()
-        return basis_global.to_local(xyz)
+            double[:, :] m
+            double[:] t
+            double[:, :] result = np.empty((xyz.shape[0], 3), dtype=np.double)
+        m, t = self.__relative_transform(other)
+        with nogil:
+            affine_transform(xyz, m, t, result)
+        return result
 
     cpdef bint add_element(self, Space element):
         if element == self:
@@ -164,6 +289,7 @@ cdef class Space(object):
                 element.name = element_name
                 self.elements[element.name] = element
                 element.parent = self
+                self.__notify(element, True)
                 return True
             elif element.parent == self:
                 return False
@@ -175,6 +301,8 @@ cdef class Space(object):
     cpdef bint remove_element(self, Space element):
         cdef list to_remove = []
         if element.parent == self:
+            # observers are notified before the element is detached and the notification can reach them
+            self.__notify(element, True)
             for key in self.elements.keys():
                 if self.elements[key] == element:
                     to_remove.append(key)
@@ -188,9 +316,295 @@ cdef class Space(object):
         if self.__parent is not None:
             self.__parent.remove_element(self)
 
+    def _local_bounding_box(self):
+        """
+        Bounding box of the Space own geometry in its local coordinate system.
+        Plain Space has no geometry of its own, subclasses with geometry override the method.
+        :return: array of lower and upper corners of the box with shape (2, 3) or None
+        """
+        return None
+
+    cpdef void geometry_changed(self) except *:
+        """
+        Must be called every time the Space own geometry changes to outdate its cached bounding box
+        """
+        self.__geometry_generation += 1
+        self.__notify(self, False)
+
+    cpdef add_observer(self, observer):
+        """
+        Register an object to be notified about changes of the Space and all its subspaces.
+        Observer must implement space_changed(space, subtree) method which is called with the changed Space
+        and the flag telling whether the whole subtree of the Space has changed (coordinate system change,
+        adding or removing of the element) or only the Space own geometry.
+        Only weak reference to the observer is stored.
+        :param observer: observer object
+        """
+        self.__observers.add(observer)
+
+    cpdef remove_observer(self, observer):
+        """
+        Unregister an observer object
+        :param observer: observer object
+        """
+        self.__observers.discard(observer)
+
+    cdef void __notify(self, Space space, bint subtree) except *:
+        """
+        Notifies observers of the Space and of all its parents about the change of the space
+        """
+        # figures change their geometry already before Space initialization
+        if self.__observers is not None:
+            for observer in list(self.__observers):
+                observer.space_changed(space, subtree)
+        if self.__parent is not None:
+            self.__parent.__notify(space, subtree)
+
+    def _distance(self, xyz):
+        """
+        Calculates distance from points to the Space own geometry. Plain Space approximates the distance
+        with the distance to the bounding box of its own geometry, subclasses with exact distance override the method.
+        :param xyz: array of N points in the global coordinate system with shape (N, 3)
+        :return: array of N distances (inf if the Space has no geometry of its own)
+        """
+        xyz = np.ascontiguousarray(xyz, dtype=np.double).reshape(-1, 3)
+        box = self._local_bounding_box()
+        if box is None:
+            return np.full(xyz.shape[0], np.inf)
+        box = np.asarray(box, dtype=np.double)
+        xyz = np.asarray(self.to_local_coordinate_system(xyz))
+        return np.linalg.norm(np.maximum(np.maximum(box[0] - xyz, xyz - box[1]), 0.0), axis=1)
+
+    cdef unsigned long __update_bounding_box(self):
+        """
+        Recalculates cached bounding boxes if the Space geometry, its global coordinate system, the list of elements
+        or the bounding box of any of the elements changed.
+        :return: stamp of the cached bounding boxes
+        """
+        global _box_generation
+        cdef:
+            Space element
+            list elements = list(self.__elements.values())
+            list local_lower = [], local_upper = [], global_lower = [], global_upper = []
+        self.__global_basis()
+        state = (self.__global_generation, self.__geometry_generation,
+                 tuple([(id(element), element.__update_bounding_box()) for element in elements]))
+        if state == self.__box_state:
+            return self.__box_generation
+        own_box = self._local_bounding_box()
+        self.__box_own = None
+        if own_box is not None:
+            own_box = np.asarray(own_box, dtype=np.double)
+            corners = np.asarray(self.to_global_coordinate_system(_box_corners(own_box)))
+            self.__box_own = np.array([corners.min(axis=0), corners.max(axis=0)])
+            local_lower.append(own_box[0])
+            local_upper.append(own_box[1])
+            global_lower.append(self.__box_own[0])
+            global_upper.append(self.__box_own[1])
+        for element in elements:
+            if element.__box_local is not None:
+                corners = np.asarray(element.__coordinate_system.to_parent(_box_corners(element.__box_local)))
+                local_lower.append(corners.min(axis=0))
+                local_upper.append(corners.max(axis=0))
+                global_lower.append(element.__box_global[0])
+                global_upper.append(element.__box_global[1])
+        if local_lower:
+            self.__box_local = np.array([np.min(local_lower, axis=0), np.max(local_upper, axis=0)])
+            self.__box_global = np.array([np.min(global_lower, axis=0), np.max(global_upper, axis=0)])
+        else:
+            self.__box_local = None
+            self.__box_global = None
+        _box_generation += 1
+        self.__box_generation = _box_generation
+        self.__box_state = state
+        return self.__box_generation
+
+    cpdef object bounding_box(self, bint local=False):
+        """
+        Axis aligned bounding box of the Space own geometry and all its elements.
+        The box is cached and recalculated only when geometry or coordinate system of the Space or any of its
+        elements changes.
+        :param local: if True the box is calculated in the Space coordinate system, otherwise in the global one
+        :return: array of lower and upper corners of the box with shape (2, 3) or None if the Space
+                 and its elements have no geometry
+        """
+        self.__update_bounding_box()
+        box = self.__box_local if local else self.__box_global
+        if box is None:
+            return None
+        return box.copy()
+
+    def intersect_rays(self, origins, directions, local=True):
+        """
+        Finds the first intersection of rays with the Space own surface.
+        Plain Space has no surface, subclasses with surface override the method.
+        :param origins: array of N ray origins with shape (N, 3)
+        :param directions: array of N ray directions with shape (N, 3)
+        :param local: if True rays are given in the Space coordinate system, otherwise in the global one
+        :return: tuple of distances along the normalized rays (inf for missed rays) and outward surface normals
+        """
+        n = np.asarray(origins).reshape(-1, 3).shape[0]
+        return np.full(n, np.inf), np.zeros((n, 3), dtype=np.double)
+
+    cdef void __ray_nodes(self, list nodes) except *:
+        """
+        Appends the ray casting nodes of the Space subtree to the list in depth-first order. Every node is the list
+        of the Space, global bounding box of the Space own geometry, global bounding box of the subtree
+        and index of the first node after the subtree. Subtrees without geometry are dropped.
+        """
+        cdef Space element
+        node = [self, self.__box_own, self.__box_global, 0]
+        nodes.append(node)
+        for element in self.__elements.values():
+            if element.__box_global is not None:
+                element.__ray_nodes(nodes)
+        node[3] = len(nodes)
+
+    def cast_rays(self, origins, directions):
+        """
+        Finds the first hit of rays with the surfaces of the Space and all its subspaces.
+        The tree of cached bounding boxes is flattened to arrays and walked for all rays in parallel without the GIL,
+        surfaces of the Spaces whose boxes are hit are then intersected node by node by compiled nogil kernels.
+        :param origins: array of N ray origins in the global coordinate system with shape (N, 3)
+        :param directions: array of N ray directions in the global coordinate system with shape (N, 3)
+        :return: tuple of the list of hit Spaces (None for missed rays), distances along the normalized rays
+                 (inf for missed rays) and outward surface normals in the global coordinate system
+        """
+        origins = np.ascontiguousarray(origins, dtype=np.double).reshape(-1, 3)
+        directions = np.array(directions, dtype=np.double).reshape(-1, 3)
+        directions /= np.linalg.norm(directions, axis=1)[:, None]
+        n = origins.shape[0]
+        distance = np.full(n, np.inf)
+        normals = np.zeros((n, 3), dtype=np.double)
+        hits = np.full(n, None, dtype=object)
+        self.__update_bounding_box()
+        if self.__box_global is not None:
+            nodes = []
+            self.__ray_nodes(nodes)
+            _cast_rays(nodes, origins, directions, distance, normals, hits)
+        return list(hits), distance, normals
+
     @boundscheck(False)
     @wraparound(False)
     cpdef void print_tree(self, int level=0):
         print('-' * level + ' ' * (level > 0) + self.name)
         for key in self.elements.keys():
             self.elements[key].print_tree(level=level+1)
+
+
+def _box_corners(box):
+    """
+    Returns 8 corners of the box given by its lower and upper corners
+    """
+    return np.array([[box[i][0], box[j][1], box[k][2]] for i in (0, 1) for j in (0, 1) for k in (0, 1)],
+                    dtype=np.double)
+
+
+@boundscheck(False)
+@wraparound(False)
+cdef inline bint _ray_box_entry(double[:, ::1] origins, double[:, ::1] directions, Py_ssize_t i,
+                                double[:, :, ::1] boxes, Py_ssize_t k, double* entry) nogil:
+    """
+    Slab test of the ray against the axis aligned box
+    :return: True if the ray hits the box, entry is set to the distance along the ray to the box entry point
+             (zero for the ray starting inside)
+    """
+    cdef:
+        int j
+        double t1, t2, t_near = 0.0, t_far = DBL_MAX
+    for j in range(3):
+        if directions[i, j] == 0:
+            if origins[i, j] < boxes[k, 0, j] or origins[i, j] > boxes[k, 1, j]:
+                return False
+            continue
+        t1 = (boxes[k, 0, j] - origins[i, j]) / directions[i, j]
+        t2 = (boxes[k, 1, j] - origins[i, j]) / directions[i, j]
+        if t1 > t2:
+            t1, t2 = t2, t1
+        t_near = max(t_near, t1)
+        t_far = min(t_far, t2)
+    if t_far < t_near:
+        return False
+    entry[0] = t_near
+    return True
+
+
+@boundscheck(False)
+@wraparound(False)
+cdef Py_ssize_t _ray_candidates(double[:, ::1] origins, double[:, ::1] directions, Py_ssize_t i,
+                                double[:, :, ::1] boxes, double[:, :, ::1] own_boxes, unsigned char[::1] has_own,
+                                Py_ssize_t[::1] skip, Py_ssize_t* nodes, double* entries) nogil:
+    """
+    Walks the flattened ray casting tree skipping the subtrees whose boxes are missed by the ray
+    :param nodes: output array of the nodes with own box hit by the ray or NULL to count them only
+    :param entries: output array of the distances to the own boxes entry points, used only if nodes is not NULL
+    :return: number of the nodes with own box hit by the ray
+    """
+    cdef:
+        Py_ssize_t k = 0, count = 0, m = boxes.shape[0]
+        double entry
+    while k < m:
+        if not _ray_box_entry(origins, directions, i, boxes, k, &entry):
+            k = skip[k]
+            continue
+        if has_own[k] and _ray_box_entry(origins, directions, i, own_boxes, k, &entry):
+            if nodes != NULL:
+                nodes[count] = k
+                entries[count] = entry
+            count += 1
+        k += 1
+    return count
+
+
+@boundscheck(False)
+@wraparound(False)
+def _cast_rays(list nodes, double[:, ::1] origins, double[:, ::1] directions, distance, normals, hits):
+    """
+    Intersects rays with the flattened ray casting tree updating the closest hits in place.
+    Boxes are culled for all rays in parallel without the GIL, then surfaces of the Spaces are intersected
+    in depth-first order with the rays which hit their own boxes closer than the current hits
+    """
+    cdef:
+        Py_ssize_t i, k, n = origins.shape[0], m = len(nodes)
+        double[:, :, ::1] boxes, own_boxes
+        unsigned char[::1] has_own
+        Py_ssize_t[::1] skip
+        Py_ssize_t[::1] counts = np.zeros(n, dtype=np.intp)
+        Py_ssize_t[::1] offsets
+        Py_ssize_t[::1] candidates
+        double[::1] entries
+    boxes = np.array([node[2] for node in nodes], dtype=np.double)
+    own_boxes = np.array([np.zeros((2, 3)) if node[1] is None else node[1] for node in nodes], dtype=np.double)
+    has_own = np.array([node[1] is not None for node in nodes], dtype=np.uint8)
+    skip = np.array([node[3] for node in nodes], dtype=np.intp)
+    with nogil:
+        for i in prange(n):
+            counts[i] = _ray_candidates(origins, directions, i, boxes, own_boxes, has_own, skip, NULL, NULL)
+    offsets = np.zeros(n + 1, dtype=np.intp)
+    np.cumsum(counts, out=np.asarray(offsets)[1:])
+    candidates = np.empty(offsets[n], dtype=np.intp)
+    entries = np.empty(offsets[n], dtype=np.double)
+    with nogil:
+        for i in prange(n):
+            if counts[i] > 0:
+                _ray_candidates(origins, directions, i, boxes, own_boxes, has_own, skip,
+                                &candidates[offsets[i]], &entries[offsets[i]])
+    order = np.argsort(candidates, kind='stable')
+    rays = np.repeat(np.arange(n), counts)[order]
+    node_entries = np.asarray(entries)[order]
+    bounds = np.searchsorted(np.asarray(candidates)[order], np.arange(m + 1))
+    origins_array, directions_array = np.asarray(origins), np.asarray(directions)
+    for k in range(m):
+        if bounds[k] == bounds[k + 1]:
+            continue
+        node_rays = rays[bounds[k]:bounds[k + 1]]
+        node_rays = node_rays[node_entries[bounds[k]:bounds[k + 1]] < distance[node_rays]]
+        if node_rays.size == 0:
+            continue
+        space = nodes[k][0]
+        d, n_hit = space.intersect_rays(origins_array[node_rays], directions_array[node_rays], local=False)
+        closer = d < distance[node_rays]
+        node_rays = node_rays[closer]
+        distance[node_rays] = d[closer]
+        normals[node_rays] = n_hit[closer]
+        hits[node_rays] = space
@@ -0,0 +1,39 @@
+from BDSpace.Space cimport Space
+
+
+cdef class SpatialIndex(object):
+    cdef:
+        Space __space
+        unsigned long __space_generation
+        int __leaf_size
+        dict __dirty
+        dict __slots
+        list __items
+        list __extra
+        int __n_items
+        int __n_dead
+        int __n_built
+        int __n_leaves
+        double[:, :] __lower
+        double[:, :] __upper
+        int[:] __position
+        int[:] __order
+        int[:] __extra_slots
+        double[:, :] __node_lower
+        double[:, :] __node_upper
+
+        object __weakref__
+
+    cpdef void space_changed(self, Space space, bint subtree) except *
+    cdef bint __attached(self, Space space)
+    cdef void __set_item(self, Space space, object box, list changed) except *
+    cdef void __build(self) except *
+    cdef void __refit_leaf(self, int leaf) nogil
+    cdef void __refit(self, int[:] slots, bint full) nogil
+    cpdef void update(self) except *
+    cdef int __collect(self, double* lower, double* upper, int* out) nogil
+    cdef int __nearest_candidates(self, double x, double y, double z, int* slots, double* bounds) nogil
+    cdef tuple __query(self, double[:, ::1] lower, double[:, ::1] upper)
+    cpdef list query_point(self, double[:, :] xyz)
+    cpdef list query_box(self, double[:, :] lower, double[:, :] upper)
+    cpdef tuple nearest(self, double[:, :] xyz)
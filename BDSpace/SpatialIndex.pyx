@@ -0,0 +1,515 @@
+import numpy as np
+
+from cython import boundscheck, wraparound
+from cython.parallel import prange
+
+from libc.math cimport sqrt
+from libc.float cimport DBL_MAX
+
+from BDSpace.Space cimport Space
+
+
+# Traversal stack size, every level of the binary tree pushes at most two nodes
+DEF STACK_SIZE = 256
+# Number of elements kept as candidates of the exact nearest element search
+DEF MAX_CANDIDATES = 8
+# Minimal number of elements inserted since the last build which triggers the rebuild of the tree
+DEF MIN_REBUILD = 32
+
+
+@boundscheck(False)
+@wraparound(False)
+cdef inline bint _overlap(double[:, :] box_lower, double[:, :] box_upper, int i,
+                          double* lower, double* upper) nogil:
+    """
+    Checks if nonempty box i overlaps the box from lower to upper corner
+    """
+    return (box_lower[i, 0] <= box_upper[i, 0]
+            and box_lower[i, 0] <= upper[0] and box_upper[i, 0] >= lower[0]
+            and box_lower[i, 1] <= upper[1] and box_upper[i, 1] >= lower[1]
+            and box_lower[i, 2] <= upper[2] and box_upper[i, 2] >= lower[2])
+
+
+@boundscheck(False)
+@wraparound(False)
+cdef inline double _box_distance2(double[:, :] box_lower, double[:, :] box_upper, int i,
+                                  double x, double y, double z) nogil:
+    """
+    Squared distance from point (x, y, z) to nonempty box i
+    """
+    cdef:
+        double dx = max(max(box_lower[i, 0] - x, x - box_upper[i, 0]), 0.0)
+        double dy = max(max(box_lower[i, 1] - y, y - box_upper[i, 1]), 0.0)
+        double dz = max(max(box_lower[i, 2] - z, z - box_upper[i, 2]), 0.0)
+    return dx * dx + dy * dy + dz * dz
+
+
+cdef inline int _insert_candidate(int slot, double d2, int* slots, double* bounds, int n) nogil:
+    """
+    Inserts the candidate into the sorted list of at most MAX_CANDIDATES candidates
+    :return: new number of candidates
+    """
+    cdef int j
+    if n == MAX_CANDIDATES and d2 >= bounds[n - 1]:
+        return n
+    j = n if n < MAX_CANDIDATES else n - 1
+    while j > 0 and bounds[j - 1] > d2:
+        bounds[j] = bounds[j - 1]
+        slots[j] = slots[j - 1]
+        j -= 1
+    bounds[j] = d2
+    slots[j] = slot
+    return min(n + 1, MAX_CANDIDATES)
+
+
+def _morton_codes(centers):
+    """
+    Morton codes of points quantized to 1024 levels along every axis of their bounding box
+    """
+    lower = centers.min(axis=0)
+    extent = centers.max(axis=0) - lower
+    extent[extent <= 0] = 1.0
+    q = np.minimum(((centers - lower) / extent * 1023).astype(np.uint64), np.uint64(1023))
+    codes = np.zeros(centers.shape[0], dtype=np.uint64)
+    for bit in range(10):
+        for axis in range(3):
+            codes |= ((q[:, axis] >> np.uint64(bit)) & np.uint64(1)) << np.uint64(3 * bit + axis)
+    return codes
+
+
+def _empty_boxes(n):
+    """
+    Arrays of lower and upper corners of n empty boxes
+    """
+    return np.full((n, 3), DBL_MAX, dtype=np.double), np.full((n, 3), -DBL_MAX, dtype=np.double)
+
+
+def _evaluate(items, xyz, rows, slots, distance, result):
+    """
+    Updates the nearest elements of the points with exact distances to the candidate elements
+    :param items: list of indexed elements
+    :param xyz: array of points with shape (N, 3)
+    :param rows: indices of points of the (point, element) candidate pairs
+    :param slots: indices of elements of the (point, element) candidate pairs
+    :param distance: array of N distances to the nearest elements updated in place
+    :param result: array of N indices of the nearest elements updated in place
+    """
+    order = np.argsort(slots, kind='stable')
+    rows = rows[order]
+    slots = slots[order]
+    unique_slots, starts = np.unique(slots, return_index=True)
+    stops = np.append(starts[1:], slots.shape[0])
+    for slot, start, stop in zip(unique_slots, starts, stops):
+        points = rows[start:stop]
+        d = np.asarray(items[slot]._distance(xyz[points]))
+        closer = d < distance[points]
+        distance[points[closer]] = d[closer]
+        result[points[closer]] = slot
+
+
+def _split(items, offsets, slots):
+    """
+    Splits found slots to the lists of elements of every query
+    """
+    found = [items[slot] for slot in slots.tolist()]
+    offsets = offsets.tolist()
+    return [found[start:stop] for start, stop in zip(offsets[:-1], offsets[1:])]
+
+
+cdef class SpatialIndex(object):
+    """
+    Bounding volume hierarchy over cached global bounding boxes of all Spaces with geometry of their own
+    in the tree of the given Space. Leaves hold elements in Morton order of their box centers and nodes form
+    the implicit binary tree with children of node i stored at 2i and 2i + 1.
+    The index observes the Space tree and is updated lazily on the next query: boxes of moved or changed elements
+    are refitted, new elements are kept in the linear overflow list and removed elements leave empty slots
+    until the tree is rebuilt.
+    """
+
+    def __init__(self, Space space, int leaf_size=4):
+        if leaf_size < 1:
+            raise ValueError('Leaf size must be positive')
+        self.__space = space
+        self.__space_generation = 0
+        self.__leaf_size = leaf_size
+        self.__dirty = {}
+        self.__slots = {}
+        self.__items = []
+        self.__extra = []
+        self.__n_items = 0
+        self.__n_dead = 0
+        self.__lower, self.__upper = _empty_boxes(16)
+        self.__position = np.full(16, -1, dtype=np.intc)
+        self.__build()
+        space.add_observer(self)
+        self.space_changed(space, True)
+
+    @property
+    def space(self):
+        return self.__space
+
+    @property
+    def elements(self):
+        """
+        List of indexed Spaces
+        """
+        self.update()
+        return [item for item in self.__items if item is not None]
+
+    def __len__(self):
+        self.update()
+        return self.__n_items - self.__n_dead
+
+    cpdef void space_changed(self, Space space, bint subtree) except *:
+        """
+        Callback for the observed Space tree. Marks the changed Space to be reindexed on the next query.
+        :param space: changed Space
+        :param subtree: True if the whole subtree of the Space must be reindexed
+        """
+        previous = self.__dirty.get(id(space))
+        self.__dirty[id(space)] = (space, subtree or (previous is not None and previous[1]))
+
+    cdef bint __attached(self, Space space):
+        while space is not None:
+            if space is self.__space:
+                return True
+            space = space.__parent
+        return False
+
+    cdef void __set_item(self, Space space, object box, list changed) except *:
+        """
+        Sets the global bounding box of the Space own geometry, inserts the Space to the index or removes it
+        if the box is None
+        """
+        cdef:
+            int j, slot = self.__slots.get(id(space), -1)
+        if box is None:
+            if slot < 0:
+                return
+            del self.__slots[id(space)]
+            self.__items[slot] = None
+            self.__n_dead += 1
+            for j in range(3):
+                self.__lower[slot, j] = DBL_MAX
+                self.__upper[slot, j] = -DBL_MAX
+            changed.append(slot)
+            return
+        if slot < 0:
+            slot = self.__n_items
+            if slot == self.__lower.shape[0]:
+                lower, upper = _empty_boxes(2 * slot)
+                lower[:slot] = self.__lower
+                upper[:slot] = self.__upper
+                self.__lower, self.__upper = lower, upper
+                self.__position = np.append(self.__position, np.full(slot, -1, dtype=np.intc))
+            self.__n_items += 1
+            self.__items.append(space)
+            self.__slots[id(space)] = slot
+            self.__extra.append(slot)
+        else:
+            changed.append(slot)
+        for j in range(3):
+            self.__lower[slot, j] = box[0, j]
+            self.__upper[slot, j] = box[1, j]
+
+    cdef void __build(self) except *:
+        """
+        Rebuilds the tree from all live elements dropping the empty slots
+        """
+        live = [slot for slot in range(self.__n_items) if self.__items[slot] is not None]
+        n = len(live)
+        lower, upper = _empty_boxes(max(16, n))
+        lower[:n] = np.asarray(self.__lower)[live]
+        upper[:n] = np.asarray(self.__upper)[live]
+        self.__items = [self.__items[slot] for slot in live]
+        self.__slots = {id(item): slot for slot, item in enumerate(self.__items)}
+        self.__lower, self.__upper = lower, upper
+        self.__n_items = n
+        self.__n_dead = 0
+        self.__n_built = n
+        self.__extra = []
+        self.__extra_slots = np.empty(0, dtype=np.intc)
+        order = np.argsort(_morton_codes((lower[:n] + upper[:n]) / 2), kind='stable') if n > 0 else np.empty(0, dtype=np.intp)
+        self.__order = order.astype(np.intc)
+        position = np.full(lower.shape[0], -1, dtype=np.intc)
+        position[order] = np.arange(n, dtype=np.intc)
+        self.__position = position
+        self.__n_leaves = 1
+        while self.__n_leaves * self.__leaf_size < n:
+            self.__n_leaves *= 2
+        self.__node_lower, self.__node_upper = _empty_boxes(2 * self.__n_leaves)
+        with nogil:
+            self.__refit(self.__order, True)
+
+    @boundscheck(False)
+    @wraparound(False)
+    cdef void __refit_leaf(self, int leaf) nogil:
+        """
+        Recalculates the box of the leaf and of all its ancestors
+        """
+        cdef:
+            int k, j, slot, node = self.__n_leaves + leaf
+            int start = leaf * self.__leaf_size, stop = min(start + self.__leaf_size, self.__n_built)
+        for j in range(3):
+            self.__node_lower[node, j] = DBL_MAX
+            self.__node_upper[node, j] = -DBL_MAX
+        for k in range(start, stop):
+            slot = self.__order[k]
+            for j in range(3):
+                self.__node_lower[node, j] = min(self.__node_lower[node, j], self.__lower[slot, j])
+                self.__node_upper[node, j] = max(self.__node_upper[node, j], self.__upper[slot, j])
+        node //= 2
+        while node > 0:
+            for j in range(3):
+                self.__node_lower[node, j] = min(self.__node_lower[2 * node, j], self.__node_lower[2 * node + 1, j])
+                self.__node_upper[node, j] = max(self.__node_upper[2 * node, j], self.__node_upper[2 * node + 1, j])
+            node //= 2
+
+    @boundscheck(False)
+    @wraparound(False)
+    cdef void __refit(self, int[:] slots, bint full) nogil:
+        """
+        Recalculates boxes of the leaves holding the changed elements, whole tree is refitted bottom-up
+        if full is True or many elements changed
+        """
+        cdef:
+            int i, k, j, slot, node
+        if not full and slots.shape[0] * 4 < self.__n_leaves:
+            for i in range(slots.shape[0]):
+                if self.__position[slots[i]] >= 0:
+                    self.__refit_leaf(self.__position[slots[i]] // self.__leaf_size)
+            return
+        for node in range(2 * self.__n_leaves - 1, 0, -1):
+            for j in range(3):
+                self.__node_lower[node, j] = DBL_MAX
+                self.__node_upper[node, j] = -DBL_MAX
+            if node >= self.__n_leaves:
+                for k in range((node - self.__n_leaves) * self.__leaf_size,
+                               min((node - self.__n_leaves + 1) * self.__leaf_size, self.__n_built)):
+                    slot = self.__order[k]
+                    for j in range(3):
+                        self.__node_lower[node, j] = min(self.__node_lower[node, j], self.__lower[slot, j])
+                        self.__node_upper[node, j] = max(self.__node_upper[node, j], self.__upper[slot, j])
+            else:
+                for j in range(3):
+                    self.__node_lower[node, j] = min(self.__node_lower[2 * node, j],
+                                                     self.__node_lower[2 * node + 1, j])
+                    self.__node_upper[node, j] = max(self.__node_upper[2 * node, j],
+                                                     self.__node_upper[2 * node + 1, j])
+
+    cpdef void update(self) except *:
+        """
+        Reindexes Spaces which changed since the last update. Boxes of the changed elements are refitted,
+        the tree is rebuilt when too many elements were added or removed since the last build.
+        """
+        cdef:
+            Space space, node
+            bint subtree, removed = False
+            list changed = []
+            int[:] changed_slots
+        # move of the indexed Space parents is not reported to the index
+        if self.__space.global_generation != self.__space_generation:
+            self.__space_generation = self.__space.global_generation
+            self.space_changed(self.__space, True)
+        if not self.__dirty:
+            return
+        dirty = list(self.__dirty.values())
+        self.__dirty = {}
+        for space, subtree in dirty:
+            if not self.__attached(space):
+                removed = True
+                continue
+            space.__update_bounding_box()
+            if subtree:
+                stack = [space]
+                while stack:
+                    node = stack.pop()
+                    self.__set_item(node, node.__box_own, changed)
+                    stack.extend(node.__elements.values())
+            else:
+                self.__set_item(space, space.__box_own, changed)
+        if removed:
+            for node in self.__items:
+                if node is not None and not self.__attached(node):
+                    self.__set_item(node, None, changed)
+        if len(self.__extra) > max(MIN_REBUILD, self.__n_built // 8) or self.__n_dead * 4 > self.__n_built:
+            self.__build()
+        else:
+            self.__extra_slots = np.array(self.__extra, dtype=np.intc)
+            if changed:
+                changed_slots = np.array(changed, dtype=np.intc)
+                with nogil:
+                    self.__refit(changed_slots, False)
+
+    @boundscheck(False)
+    @wraparound(False)
+    cdef int __collect(self, double* lower, double* upper, int* out) nogil:
+        """
+        Finds elements with boxes overlapping the box from lower to upper corner
+        :param out: buffer for the found slots, only the number of elements is calculated if NULL
+        :return: number of found elements
+        """
+        cdef:
+            int node, k, slot, sp = 0, count = 0
+            int stack[STACK_SIZE]
+        if self.__n_built > 0:
+            stack[0] = 1
+            sp = 1
+        while sp > 0:
+            sp -= 1
+            node = stack[sp]
+            if not _overlap(self.__node_lower, self.__node_upper, node, lower, upper):
+                continue
+            if node >= self.__n_leaves:
+                for k in range((node - self.__n_leaves) * self.__leaf_size,
+                               min((node - self.__n_leaves + 1) * self.__leaf_size, self.__n_built)):
+                    slot = self.__order[k]
+                    if _overlap(self.__lower, self.__upper, slot, lower, upper):
+                        if out != NULL:
+                            out[count] = slot
+                        count += 1
+            else:
+                stack[sp] = 2 * node
+                stack[sp + 1] = 2 * node + 1
+                sp += 2
+        for k in range(self.__extra_slots.shape[0]):
+            slot = self.__extra_slots[k]
+            if _overlap(self.__lower, self.__upper, slot, lower, upper):
+                if out != NULL:
+                    out[count] = slot
+                count += 1
+        return count
+
+    @boundscheck(False)
+    @wraparound(False)
+    cdef int __nearest_candidates(self, double x, double y, double z, int* slots, double* bounds) nogil:
+        """
+        Finds at most MAX_CANDIDATES elements with the nearest boxes to the point (x, y, z)
+        :param slots: buffer for the found slots sorted by the distance to their boxes
+        :param bounds: buffer for the squared distances to the boxes of the found elements
+        :return: number of found elements
+        """
+        cdef:
+            int node, k, slot, near, sp = 0, n = 0
+            double d2
+            int stack[STACK_SIZE]
+        if self.__n_built > 0:
+            stack[0] = 1
+            sp = 1
+        while sp > 0:
+            sp -= 1
+            node = stack[sp]
+            if self.__node_lower[node, 0] > self.__node_upper[node, 0]:
+                continue
+            d2 = _box_distance2(self.__node_lower, self.__node_upper, node, x, y, z)
+            if n == MAX_CANDIDATES and d2 >= bounds[n - 1]:
+                continue
+            if node >= self.__n_leaves:
+                for k in range((node - self.__n_leaves) * self.__leaf_size,
+                               min((node - self.__n_leaves + 1) * self.__leaf_size, self.__n_built)):
+                    slot = self.__order[k]
+                    if self.__lower[slot, 0] <= self.__upper[slot, 0]:
+                        d2 = _box_distance2(self.__lower, self.__upper, slot, x, y, z)
+                        n = _insert_candidate(slot, d2, slots, bounds, n)
+            else:
+                # the nearer child is pushed last to be visited first
+                near = 2 * node
+                if self.__node_lower[near, 0] > self.__node_upper[near, 0] \
+                        or (self.__node_lower[near + 1, 0] <= self.__node_upper[near + 1, 0]
+                            and _box_distance2(self.__node_lower, self.__node_upper, near + 1, x, y, z)
+                            < _box_distance2(self.__node_lower, self.__node_upper, near, x, y, z)):
+                    near += 1
+                stack[sp] = 4 * node + 1 - near
+                stack[sp + 1] = near
+                sp += 2
+        for k in range(self.__extra_slots.shape[0]):
+            slot = self.__extra_slots[k]
+            if self.__lower[slot, 0] <= self.__upper[slot, 0]:
+                d2 = _box_distance2(self.__lower, self.__upper, slot, x, y, z)
+                n = _insert_candidate(slot, d2, slots, bounds, n)
+        return n
+
+    @boundscheck(False)
+    @wraparound(False)
+    cdef tuple __query(self, double[:, ::1] lower, double[:, ::1] upper):
+        """
+        Finds elements with boxes overlapping every box from lower to upper corner
+        :return: tuple of offsets array with shape (N + 1,) and array of found slots of all boxes
+        """
+        cdef:
+            int i, n = lower.shape[0]
+            int[:] counts = np.zeros(n, dtype=np.intc)
+            int[:] offsets
+            int[:] slots
+        self.update()
+        with nogil:
+            for i in prange(n):
+                counts[i] = self.__collect(&lower[i, 0], &upper[i, 0], NULL)
+        offsets = np.zeros(n + 1, dtype=np.intc)
+        np.cumsum(counts, out=np.asarray(offsets)[1:])
+        slots = np.empty(offsets[n], dtype=np.intc)
+        with nogil:
+            for i in prange(n):
+                if counts[i] > 0:
+                    self.__collect(&lower[i, 0], &upper[i, 0], &slots[offsets[i]])
+        return np.asarray(offsets), np.asarray(slots)
+
+    cpdef list query_point(self, double[:, :] xyz):
+        """
+        Finds elements with global bounding boxes containing the points
+        :param xyz: array of N points in the global coordinate system with shape (N, 3)
+        :return: list of N lists of found Spaces
+        """
+        points = np.ascontiguousarray(xyz, dtype=np.double)
+        offsets, slots = self.__query(points, points)
+        return _split(self.__items, offsets, slots)
+
+    cpdef list query_box(self, double[:, :] lower, double[:, :] upper):
+        """
+        Finds elements with global bounding boxes overlapping the boxes
+        :param lower: array of N lower corners of the boxes in the global coordinate system with shape (N, 3)
+        :param upper: array of N upper corners of the boxes in the global coordinate system with shape (N, 3)
+        :return: list of N lists of found Spaces
+        """
+        if lower.shape[0] != upper.shape[0]:
+            raise ValueError('Lower and upper corners arrays must have the same shape')
+        offsets, slots = self.__query(np.ascontiguousarray(lower, dtype=np.double),
+                                      np.ascontiguousarray(upper, dtype=np.double))
+        return _split(self.__items, offsets, slots)
+
+    @boundscheck(False)
+    @wraparound(False)
+    cpdef tuple nearest(self, double[:, :] xyz):
+        """
+        Finds the nearest elements to the points. Candidates are selected by the distance to their bounding boxes,
+        exact distances are calculated by the _distance method of the candidate elements.
+        :param xyz: array of N points in the global coordinate system with shape (N, 3)
+        :return: tuple of the list of N nearest Spaces (None if the index is empty) and array of N distances
+        """
+        cdef:
+            int i, s = xyz.shape[0]
+            int[:, ::1] candidates = np.full((s, MAX_CANDIDATES), -1, dtype=np.intc)
+            double[:, ::1] bounds = np.full((s, MAX_CANDIDATES), DBL_MAX, dtype=np.double)
+            int[:] counts = np.zeros(s, dtype=np.intc)
+        self.update()
+        with nogil:
+            for i in prange(s):
+                counts[i] = self.__nearest_candidates(xyz[i, 0], xyz[i, 1], xyz[i, 2],
+                                                      &candidates[i, 0], &bounds[i, 0])
+        points = np.ascontiguousarray(xyz, dtype=np.double)
+        candidate_slots = np.asarray(candidates)
+        distance = np.full(s, np.inf)
+        result = np.full(s, -1, dtype=np.intc)
+        rows, columns = np.nonzero(candidate_slots >= 0)
+        _evaluate(self.__items, points, rows, candidate_slots[rows, columns], distance, result)
+        # elements beyond the candidates may be closer than the nearest candidate
+        bound = np.sqrt(np.asarray(bounds)[:, MAX_CANDIDATES - 1])
+        unexplored = np.nonzero((np.asarray(counts) == MAX_CANDIDATES) & (distance > bound))[0]
+        if unexplored.size > 0:
+            radius = np.where(np.isfinite(distance[unexplored]), distance[unexplored], DBL_MAX / 4)[:, None]
+            offsets, slots = self.__query(np.ascontiguousarray(points[unexplored] - radius),
+                                          np.ascontiguousarray(points[unexplored] + radius))
+            rows = np.repeat(unexplored, np.diff(offsets))
+            fresh = ~np.any(candidate_slots[rows] == slots[:, None], axis=1)
+            _evaluate(self.__items, points, rows[fresh], slots[fresh], distance, result)
+        return [self.__items[slot] if slot >= 0 else None for slot in result], distance
@@ -1 +1,2 @@
 from .Space import Space
+from .SpatialIndex import SpatialIndex
@@ -0,0 +1,30 @@
+import timeit
+import numpy as np
+
+from BDSpace.Coordinates import transforms
+
+
+def per_point(function_point, points):
+    result = np.empty_like(points)
+    for i in range(points.shape[0]):
+        result[i] = function_point(points[i])
+    return result
+
+
+reference_size = 10**5
+for size in [10**6, 10**7]:
+    xyz = (np.random.random((size, 3)) - 0.5) * 200
+    out = np.empty_like(xyz)
+    print('Points number: %d' % size)
+    for name in ['cartesian_to_spherical', 'spherical_to_cartesian', 'invert_spherical',
+                 'cartesian_to_cylindrical', 'cylindrical_to_cartesian',
+                 'spherical_to_cylindrical', 'cylindrical_to_spherical']:
+        function = getattr(transforms, name)
+        function_point = getattr(transforms, name + '_point')
+        t_batch = min(timeit.repeat(lambda: function(xyz), number=1, repeat=3))
+        t_out = min(timeit.repeat(lambda: function(xyz, out=out), number=1, repeat=3))
+        # per-point evaluation is too slow for the whole array, so it is extrapolated
+        t_point = timeit.timeit(lambda: per_point(function_point, xyz[:reference_size]), number=1)
+        t_point *= size / reference_size
+        print('  %-26s batch: %8.4f s, batch (out=): %8.4f s, per-point loop: %8.2f s, speedup: %6.0f' %
+              (name, t_batch, t_out, t_point, t_point / t_batch))
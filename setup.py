@@ -3,6 +3,7 @@ from setuptools import setup, find_packages
 from setuptools.extension import Extension
 from setuptools.command.build_ext import build_ext
 from Cython.Build import cythonize
+import numpy
 
 from codecs import open
 from os import path, remove
@@ -31,6 +32,11 @@ extensions = [
         ['BDSpace/Space.pyx'],
         depends=['BDSpace/Space.pxd'],
     ),
+    Extension(
+        'BDSpace.SpatialIndex',
+        ['BDSpace/SpatialIndex.pyx'],
+        depends=['BDSpace/SpatialIndex.pxd'],
+    ),
     Extension(
         'BDSpace.Coordinates.Cartesian',
         ['BDSpace/Coordinates/Cartesian.pyx'],
@@ -41,6 +47,12 @@ extensions = [
         ['BDSpace/Coordinates/transforms.pyx'],
         depends=['BDSpace/Coordinates/transforms.pxd'],
     ),
+    Extension(
+        'BDSpace.Coordinates.ufuncs',
+        ['BDSpace/Coordinates/ufuncs.pyx'],
+        depends=['BDSpace/Coordinates/transforms.pxd'],
+        include_dirs=[numpy.get_include()],
+    ),
     Extension(
         'BDSpace.Field.Field',
         ['BDSpace/Field/Field.pyx'],
@@ -56,6 +68,16 @@ extensions = [
         ['BDSpace/Field/SuperposedField.pyx'],
         depends=['BDSpace/Field/SuperposedField.pxd'],
     ),
+    Extension(
+        'BDSpace.Field._octree',
+        ['BDSpace/Field/_octree.pyx'],
+        depends=['BDSpace/Field/_octree.pxd'],
+    ),
+    Extension(
+        'BDSpace.Field.TreeSuperposedField',
+        ['BDSpace/Field/TreeSuperposedField.pyx'],
+        depends=['BDSpace/Field/TreeSuperposedField.pxd'],
+    ),
     Extension(
         'BDSpace.Curve._helpers',
         ['BDSpace/Curve/_helpers.pyx'],
@@ -66,6 +88,21 @@ extensions = [
         ['BDSpace/Curve/Parametric.pyx'],
         depends=['BDSpace/Field/Field.pxd'],
     ),
+    Extension(
+        'BDSpace.Curve.BVH',
+        ['BDSpace/Curve/BVH.pyx'],
+        depends=['BDSpace/Curve/BVH.pxd'],
+    ),
+    Extension(
+        'BDSpace.Figure._geometry',
+        ['BDSpace/Figure/_geometry.pyx'],
+        depends=['BDSpace/Figure/_geometry.pxd'],
+    ),
+    Extension(
+        'BDSpace.Figure._qmc',
+        ['BDSpace/Figure/_qmc.pyx'],
+        depends=['BDSpace/Figure/_qmc.pxd'],
+    ),
     Extension(
         'BDSpace.Field.CurveField',
         ['BDSpace/Field/CurveField.pyx'],
@@ -155,6 +192,7 @@ setup(
         'BDSpace.Coordinates': ['*.pxd'],
         'BDSpace.Field': ['*.pxd'],
         'BDSpace.Curve': ['*.pxd'],
+        'BDSpace.Figure': ['*.pxd'],
     },
     install_requires=['numpy', 'scipy',
                       'BDQuaternions>=0.2.11',
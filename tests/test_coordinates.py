@@ -79,3 +79,35 @@ class TestCoordinates(unittest.TestCase):
         point_global = other_coordinate_system.to_parent(point_local)
         point_local_2 = other_coordinate_system.to_local(point_global)
         np.testing.assert_allclose(point_local_2, point_local, atol=np.finfo(float).eps)
+
+    def test_to_parent_to_local_vector(self):
+        other_coordinate_system = Cartesian(origin=[1.0, 2.0, 3.0])
+        other_coordinate_system.rotate_axis_angle(np.array([1.0, 1.0, 0.0]), np.pi / 3)
+        point_local = (np.random.random((10, 3)) - 0.5) * 100
+        point_global = np.dot(point_local, np.asarray(other_coordinate_system.basis)) + np.array([1.0, 2.0, 3.0])
+        np.testing.assert_allclose(other_coordinate_system.to_parent(point_local), point_global, atol=1e-12)
+        np.testing.assert_allclose(other_coordinate_system.to_local(point_global), point_local, atol=1e-12)
+        for i in range(10):
+            np.testing.assert_allclose(other_coordinate_system.to_parent_vector(point_local[i]), point_global[i],
+                                       atol=1e-12)
+            np.testing.assert_allclose(other_coordinate_system.to_local_vector(point_global[i]), point_local[i],
+                                       atol=1e-12)
+        generation = other_coordinate_system.generation
+        other_coordinate_system.origin = [0.0, 0.0, 0.0]
+        self.assertEqual(other_coordinate_system.generation, generation + 1)
+        np.testing.assert_allclose(other_coordinate_system.to_parent(point_local),
+                                   point_global - np.array([1.0, 2.0, 3.0]), atol=1e-12)
+
+    def test_to_parent_to_local_single_precision(self):
+        other_coordinate_system = Cartesian(origin=[1.0, 2.0, 3.0])
+        other_coordinate_system.rotate_axis_angle(np.array([1.0, 1.0, 0.0]), np.pi / 3)
+        point_local = ((np.random.random((10, 3)) - 0.5) * 100).astype(np.float32)
+        point_global = np.asarray(other_coordinate_system.to_parent(point_local))
+        self.assertEqual(point_global.dtype, np.float32)
+        np.testing.assert_allclose(point_global, other_coordinate_system.to_parent(point_local.astype(np.double)),
+                                   rtol=1e-6, atol=1e-5)
+        point_local_2 = np.asarray(other_coordinate_system.to_local(point_global))
+        self.assertEqual(point_local_2.dtype, np.float32)
+        np.testing.assert_allclose(point_local_2, point_local, rtol=1e-5, atol=1e-4)
+        other_coordinate_system.to_local(point_global, inplace=True)
+        np.testing.assert_allclose(point_global, point_local_2)
@@ -0,0 +1,101 @@
+import unittest
+import numpy as np
+from BDSpace.Curve.Parametric import ParametricCurve, Line, Arc, Helix
+
+
+class TestParametricCurve(unittest.TestCase):
+
+    def test_point_and_tangent(self):
+        t = np.linspace(0, 10, 101)
+        for curve in [Line(a=1.0, b=2.0, c=3.0), Arc(a=2.0, b=1.0, right=False), Helix(radius=2.0, pitch=0.5)]:
+            points, tangents = curve.point_and_tangent(t)
+            np.testing.assert_allclose(points, curve.generate_points(t))
+            np.testing.assert_allclose(tangents, curve.tangent(t))
+            np.testing.assert_allclose(curve.generate_points(t)[:, 0], curve.x(t))
+            np.testing.assert_allclose(curve.tangent(t)[:, 1], curve.tangent_y(t))
+            # closed-form tangent agrees with finite differences of points
+            h = 1e-6
+            numeric = (np.asarray(curve.generate_points(t + h)) - np.asarray(curve.generate_points(t - h))) / (2 * h)
+            np.testing.assert_allclose(tangents, numeric, atol=1e-6)
+
+    def test_helix_length(self):
+        helix = Helix(radius=2.0, pitch=0.5, start=0.0, stop=4 * np.pi)
+        exact = 2 * np.sqrt((2 * np.pi * 2.0) ** 2 + 0.5 ** 2)
+        self.assertAlmostEqual(helix.length(), exact, places=4)
+
+    def test_arc_length_table(self):
+        arc = Arc(a=3.0, b=1.0, start=0.0, stop=5.0)
+        fine_t = np.linspace(0, 5, 200001)
+        speed = np.sqrt(9 * np.sin(fine_t) ** 2 + np.cos(fine_t) ** 2)
+        fine_s = np.concatenate(([0], np.cumsum(np.diff(fine_t) * (speed[1:] + speed[:-1]) / 2)))
+        self.assertAlmostEqual(arc.length(), fine_s[-1], places=3)
+        s = np.linspace(0, arc.length(), 25)
+        t = np.asarray(arc.t_at_lengths(s))
+        np.testing.assert_allclose(np.interp(t, fine_t, fine_s), s, atol=1e-4)
+        self.assertAlmostEqual(arc.t_at_length(s[7]), t[7])
+        np.testing.assert_allclose(arc.points_at_lengths(s), arc.generate_points(t))
+        with self.assertRaises(ValueError):
+            arc.t_at_length(-1.0)
+        table_t, table_s = arc.arc_length_table
+        self.assertTrue(np.all(np.diff(table_s) > 0))
+        # table is kept for the last requested number of refinement iterations
+        coarse = arc.length(max_iterations=3)
+        coarse_t, coarse_s = arc.arc_length_table
+        self.assertLess(coarse_t.shape[0], table_t.shape[0])
+        self.assertEqual(coarse_s[-1], coarse)
+        arc.t_at_length(coarse / 2)
+        self.assertTrue(np.shares_memory(arc.arc_length_table[1], coarse_s))
+        arc.stop = 2 * np.pi
+        self.assertAlmostEqual(arc.length(), 13.364893, places=3)
+
+    def test_equal_spacing(self):
+        helix = Helix(radius=1.0, pitch=2.0, start=0.0, stop=6 * np.pi)
+        points = np.asarray(helix.points_at_lengths(np.linspace(0, helix.length(), 50)))
+        chords = np.linalg.norm(np.diff(points, axis=0), axis=1)
+        np.testing.assert_allclose(chords, chords[0], rtol=1e-6)
+
+    def test_adaptive_mesh(self):
+        arc = Arc(a=3.0, b=1.0, start=0.0, stop=2 * np.pi)
+        mesh = arc.adaptive_mesh()
+        t = np.asarray(mesh.physical_nodes)
+        self.assertTrue(np.all(np.diff(t) > 0))
+        self.assertEqual(t[0], 0.0)
+        self.assertEqual(t[-1], 2 * np.pi)
+        self.assertTrue(np.max(mesh.residual) <= arc.precision)
+        self.assertAlmostEqual(np.sum(mesh.solution), arc.length())
+        # nodes are denser where the curvature is higher
+        step = np.diff(t)
+        self.assertLess(np.min(step[np.abs(np.cos(t[1:])) > 0.99]), np.min(step[np.abs(np.cos(t[1:])) < 0.1]))
+        # the tree of uniform meshes has the same nodes
+        np.testing.assert_allclose(np.unique(arc.mesh_tree().flatten().physical_nodes), t)
+        self.assertEqual(arc.adaptive_mesh(max_iterations=0).num, 3)
+        arc.precision = 1e-8
+        self.assertGreater(arc.adaptive_mesh().num, mesh.num)
+
+    def test_closest_points(self):
+        np.random.seed(0)
+        helix = Helix(radius=2.0, pitch=0.5, start=0.0, stop=20.0)
+        xyz = np.random.uniform(-4, 4, (200, 3))
+        t, feet, distance = helix.closest_points(xyz)
+        np.testing.assert_allclose(feet, helix.generate_points(t))
+        np.testing.assert_allclose(distance, np.linalg.norm(np.asarray(feet) - xyz, axis=1))
+        fine = np.asarray(helix.generate_points(np.linspace(0, 20, 100001)))
+        brute = np.array([np.min(np.linalg.norm(fine - point, axis=1)) for point in xyz])
+        self.assertTrue(np.all(np.asarray(distance) <= brute + 1e-12))
+        np.testing.assert_allclose(distance, brute, atol=1e-6)
+        self.assertAlmostEqual(distance[0] ** 2, helix.distance_to_point_square(t[0], xyz[0]))
+        # points beyond the ends of a line segment are closest to its end points
+        line = Line(a=1.0, b=0.0, c=0.0, start=0.0, stop=1.0)
+        t, feet, distance = line.closest_points(np.array([[2.0, 1.0, 0.0], [0.5, 1.0, 0.0], [-1.0, 0.0, 0.0]]))
+        np.testing.assert_allclose(t, [1.0, 0.5, 0.0], atol=1e-12)
+        np.testing.assert_allclose(distance, [np.sqrt(2), 1.0, 1.0])
+
+    def test_bounding_box(self):
+        helix = Helix(name='Helix', radius=1, pitch=0.5, stop=10)
+        helix.coordinate_system.origin = np.array([1.0, 2.0, 3.0])
+        for radius in [1.0, 2.0]:
+            helix.radius = radius
+            xyz = np.asarray(helix.to_global_coordinate_system(helix.generate_points(np.linspace(0, 10, 10001))))
+            box = helix.bounding_box()
+            self.assertTrue(np.all(xyz >= box[0]) and np.all(xyz <= box[1]))
+            np.testing.assert_allclose(box, [xyz.min(axis=0), xyz.max(axis=0)], atol=1e-3)
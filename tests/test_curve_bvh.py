@@ -0,0 +1,71 @@
+import unittest
+import numpy as np
+from BDSpace import Space
+from BDSpace.Coordinates import Cartesian
+from BDSpace.Curve import Line, Arc, Helix, CurveBVH
+
+
+class TestCurveBVH(unittest.TestCase):
+
+    def setUp(self):
+        np.random.seed(2)
+        self.world = Space('World')
+        self.curves = []
+        for k in range(12):
+            coordinate_system = Cartesian(origin=np.random.uniform(-10, 10, 3))
+            coordinate_system.rotate_axis_angle(np.random.normal(size=3), np.random.uniform(0, 3))
+            curve = [Line(name='Line %d' % k, coordinate_system=coordinate_system, a=1, b=2, c=0.5, stop=3),
+                     Arc(name='Arc %d' % k, coordinate_system=coordinate_system, a=2, b=1, stop=4),
+                     Helix(name='Helix %d' % k, coordinate_system=coordinate_system, radius=1, pitch=0.3,
+                           stop=15)][k % 3]
+            self.world.add_element(curve)
+            self.curves.append(curve)
+        self.bvh = CurveBVH(self.world)
+        self.xyz = np.random.uniform(-12, 12, (300, 3))
+
+    def brute_force(self, xyz):
+        distances = []
+        for curve in self.bvh.curves:
+            distances.append(np.asarray(curve.closest_points(curve.to_local_coordinate_system(xyz))[2]))
+        return np.argmin(distances, axis=0), np.min(distances, axis=0)
+
+    def test_nearest(self):
+        self.assertEqual(len(self.bvh.curves), 12)
+        index, t, feet, distance = self.bvh.nearest(self.xyz)
+        expected_index, expected_distance = self.brute_force(self.xyz)
+        np.testing.assert_allclose(distance, expected_distance, atol=1e-10)
+        np.testing.assert_array_equal(index, expected_index)
+        curve = self.bvh.curves[index[0]]
+        np.testing.assert_allclose(curve.to_global_coordinate_system(curve.generate_points(t[:1])), feet[:1])
+
+    def test_update(self):
+        size = self.bvh.size
+        self.curves[4].coordinate_system.origin = np.array([0.0, 0.0, 0.0])
+        np.testing.assert_allclose(self.bvh.nearest(self.xyz)[3], self.brute_force(self.xyz)[1], atol=1e-10)
+        self.assertEqual(self.bvh.size, size)
+        self.curves[5].stop = 30
+        np.testing.assert_allclose(self.bvh.nearest(self.xyz)[3], self.brute_force(self.xyz)[1], atol=1e-10)
+        self.assertGreater(self.bvh.size, size)
+
+    def test_proximity(self):
+        for point in self.xyz[:20]:
+            curves = self.bvh.proximity(point, 5.0)
+            distances = self.brute_force(point[np.newaxis, :])
+            expected = []
+            for curve in self.bvh.curves:
+                local_point = curve.to_local_coordinate_system(point[np.newaxis, :])
+                if np.asarray(curve.closest_points(local_point)[2])[0] <= 5.0:
+                    expected.append(curve)
+            self.assertEqual(curves, expected)
+            self.assertEqual(len(curves) > 0, distances[1][0] <= 5.0)
+
+    def test_intersect_ray(self):
+        curve = self.curves[4]
+        target = np.asarray(curve.to_global_coordinate_system(curve.generate_points(np.array([1.3]))))[0]
+        origin = np.array([-30.0, -30.0, -30.0])
+        hits = [hit for hit in self.bvh.intersect_ray(origin, target - origin, 0.1) if hit[1] is curve]
+        self.assertEqual(len(hits), 1)
+        self.assertAlmostEqual(hits[0][0], np.linalg.norm(target - origin))
+        self.assertAlmostEqual(hits[0][2], 1.3)
+        self.assertAlmostEqual(hits[0][3], 0.0)
+        self.assertEqual(self.bvh.intersect_ray(origin, origin - target, 0.1), [])
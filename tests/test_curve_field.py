@@ -0,0 +1,80 @@
+import unittest
+import numpy as np
+from BDSpace.Coordinates import Cartesian
+from BDSpace.Curve.Parametric import Helix
+from BDSpace.Field import HyperbolicPotentialCurveConservativeField
+
+
+class TestCurveField(unittest.TestCase):
+
+    def setUp(self):
+        np.random.seed(1)
+        self.helix = Helix(name='Helix', coordinate_system=Cartesian(origin=np.array([1.0, 0.0, -2.0])),
+                           radius=2, pitch=0.5, start=0, stop=50)
+        self.field = HyperbolicPotentialCurveConservativeField('Helix field', 'Electrostatic field',
+                                                               curve=self.helix, r=0.05)
+        self.field.a = 1.0
+        self.xyz = (np.random.random((500, 3)) - 0.5) * np.array([10, 10, 40])
+
+    def test_direct(self):
+        mesh = self.helix.adaptive_mesh()
+        t = np.asarray(mesh.physical_nodes)
+        dl = np.asarray(mesh.solution)
+        points = np.asarray(self.helix.generate_points(t))
+        curve_xyz = np.asarray(self.field.coordinate_system.to_parent(self.xyz))
+        d = np.linalg.norm(curve_xyz[:, np.newaxis, :] - points[np.newaxis, :, :], axis=2)
+        np.testing.assert_allclose(self.field.scalar_field(self.xyz),
+                                   np.sum(dl / np.maximum(d, 0.05), axis=1))
+
+    def test_tree(self):
+        scalar = np.asarray(self.field.scalar_field(self.xyz))
+        vector = np.asarray(self.field.vector_field(self.xyz))
+        self.field.theta = 0.2
+        np.testing.assert_allclose(self.field.scalar_field(self.xyz), scalar, rtol=1e-3)
+        np.testing.assert_allclose(self.field.vector_field(self.xyz), vector, rtol=1e-2,
+                                   atol=1e-3 * np.max(np.abs(vector)))
+        self.field.a = 2.0
+        np.testing.assert_allclose(self.field.scalar_field(self.xyz), 2 * scalar, rtol=1e-3)
+        with self.assertRaises(ValueError):
+            self.field.theta = -0.1
+
+    def test_segments(self):
+        from BDSpace.Curve.Parametric import Line
+        line = Line(a=0, b=0, c=1)
+        field = HyperbolicPotentialCurveConservativeField('Line field', 'Electrostatic field', curve=line, r=1e-3,
+                                                          segments=True)
+        field.a = 2.0
+        self.assertTrue(field.segments)
+        xyz = np.random.random((100, 3)) * 2 - 0.5
+        ra = np.linalg.norm(xyz, axis=1)
+        rb = np.linalg.norm(xyz - np.array([0.0, 0.0, 1.0]), axis=1)
+        np.testing.assert_allclose(field.scalar_field(xyz), 2.0 * np.log((ra + rb + 1) / (ra + rb - 1)))
+        h = 1e-6
+        gradient = np.stack([(np.asarray(field.scalar_field(xyz + h * e)) -
+                              np.asarray(field.scalar_field(xyz - h * e))) / (2 * h) for e in np.eye(3)], axis=1)
+        np.testing.assert_allclose(field.vector_field(xyz), -gradient, rtol=1e-5, atol=1e-6)
+
+    def test_samples_cache(self):
+        scalar = np.asarray(self.field.scalar_field(self.xyz))
+        t, points, density, weights = self.field.samples
+        self.assertTrue(np.shares_memory(self.field.samples[1], points))
+        np.testing.assert_allclose(density, np.ones_like(t))
+        self.field.a = 3.0
+        np.testing.assert_allclose(self.field.samples[2], 3 * np.ones_like(t))
+        np.testing.assert_allclose(self.field.scalar_field(self.xyz), 3 * scalar)
+        points = self.field.samples[1]
+        self.helix.coordinate_system.origin = np.array([0.0, 0.0, 0.0])
+        self.assertTrue(np.shares_memory(self.field.samples[1], points))
+        generation = self.helix.generation
+        self.helix.radius = 1.0
+        self.assertEqual(self.helix.generation, generation + 1)
+        self.assertAlmostEqual(np.max(self.field.samples[1][:, 0]), 2.0, places=3)
+
+    def test_python_density(self):
+        class GrowingDensity(HyperbolicPotentialCurveConservativeField):
+            def linear_density(self, t):
+                return np.asarray(t) * self.a
+        field = GrowingDensity('Helix field', 'Electrostatic field', curve=self.helix, r=0.05)
+        field.a = 1.0
+        t = field.samples[0]
+        np.testing.assert_allclose(field.samples[2], t)
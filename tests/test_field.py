@@ -51,3 +51,34 @@ class TestField(unittest.TestCase):
         check = np.zeros((100, 3), dtype=np.double)
         check[:, 0] += np.ones(100, dtype=np.double)
         np.testing.assert_allclose(result, check)
+
+    def test_evaluate_single_precision(self):
+        from BDSpace.Field import HyperbolicPotentialSphericalConservativeField
+        xyz = (np.random.random((50, 3)) - 0.5) * 10
+        fields = [ConstantScalarConservativeField('Pot', 'Electrostatic field', 2.0),
+                  ConstantVectorConservativeField('Pot', 'Electrostatic field', np.array([1.0, 2.0, 3.0])),
+                  HyperbolicPotentialSphericalConservativeField('Pot', 'Electrostatic field', r=1, a=2.0)]
+        for field in fields:
+            scalar = field.evaluate_scalar(xyz)
+            vector = field.evaluate_vector(xyz)
+            self.assertEqual(scalar.dtype, np.double)
+            np.testing.assert_allclose(scalar, field.scalar_field(xyz))
+            np.testing.assert_allclose(vector, field.vector_field(xyz), atol=1e-12)
+            scalar_f = field.evaluate_scalar(xyz.astype(np.float32))
+            vector_f = field.evaluate_vector(xyz.astype(np.float32))
+            self.assertEqual(scalar_f.dtype, np.float32)
+            self.assertEqual(vector_f.dtype, np.float32)
+            np.testing.assert_allclose(scalar_f, scalar, rtol=1e-5)
+            np.testing.assert_allclose(vector_f, vector, rtol=1e-5, atol=1e-5)
+        out = np.empty((5, 10), dtype=np.float32)
+        result = fields[2].evaluate_scalar(xyz.reshape((5, 10, 3)).astype(np.float32), out=out)
+        self.assertIs(result, out)
+        with self.assertRaises(ValueError):
+            fields[2].evaluate_scalar(xyz, out=out)
+
+    def test_evaluate_python_subclass(self):
+        class MyField(ConstantScalarConservativeField):
+            def scalar_field(self, xyz):
+                return np.ones(xyz.shape[0])
+        field = MyField('Pot', 'Electrostatic field', 2.0)
+        np.testing.assert_allclose(field.evaluate_scalar(np.zeros((4, 3), dtype=np.float32)), np.ones(4))
@@ -0,0 +1,270 @@
+import unittest
+import numpy as np
+from BDSpace import Space
+from BDSpace.Coordinates import Cartesian
+from BDSpace.Field import ConstantScalarConservativeField
+from BDSpace.Figure import Figure
+from BDSpace.Figure.Sphere import SphericalWedge, Sphere, SphericalSegmentWedge, SphericalSegment
+from BDSpace.Figure.Cylinder import CylindricalWedge, Cylinder
+from BDSpace.Figure.Cone import ConicalWedge
+from BDSpace.Figure.Torus import ToricSector, Torus
+from BDSpace.Figure.Cube import ParallelepipedTriclinic, Cube
+
+
+class TestFigure(unittest.TestCase):
+
+    def setUp(self):
+        np.random.seed(1)
+        self.xyz = np.random.uniform(-2, 2, (400000, 3))
+        self.box_volume = 64.0
+
+    def test_contains_volume(self):
+        figures = [SphericalWedge(r_inner=0.3, r_outer=1.5, phi=1.0, theta=[0.2, 1.9]),
+                   Sphere(r_outer=1.2),
+                   SphericalSegmentWedge(r_inner=0.3, r_outer=1.5, h1=-0.5, h2=0.9, phi=2.0),
+                   CylindricalWedge(r_inner=0.3, r_outer=1.5, phi=4.0, z=[-1, 1.5]),
+                   ConicalWedge(phi=np.pi / 2, theta=np.pi / 6, z=[-1, 1.5], z_offset=0.5, r_min=0.2),
+                   Torus(r_torus=1.2, r_tube=[0.2, 0.6]),
+                   ToricSector(phi=2.0, r_torus=1.2, r_tube=[0, 0.6]),
+                   ParallelepipedTriclinic(a=1, b=1.5, c=1.2, alpha=1.2, beta=1.4, gamma=1.9)]
+        for figure in figures:
+            inside = figure.contains(self.xyz)
+            self.assertEqual(inside.dtype, np.bool_)
+            self.assertEqual(inside.shape, (self.xyz.shape[0],))
+            volume = inside.mean() * self.box_volume
+            self.assertAlmostEqual(volume, figure.volume(), delta=0.05 * max(figure.volume(), 1.0))
+
+    def test_contains_points(self):
+        cylinder = Cylinder(r_inner=0.5, r_outer=1.0, z=[0, 1])
+        inside = cylinder.contains([[0.75, 0, 0.5], [0, 0, 0.5], [0, 0.75, 1.5], [0, -0.75, 0.5]])
+        np.testing.assert_array_equal(inside, [True, False, False, True])
+        wedge = CylindricalWedge(r_inner=0, r_outer=1, phi=np.pi / 2, z=[0, 1])
+        inside = wedge.contains([[0.5, 0.5, 0.5], [-0.5, 0.5, 0.5], [0.5, -0.5, 0.5]])
+        np.testing.assert_array_equal(inside, [True, False, False])
+        cube = Cube(a=2.0)
+        np.testing.assert_array_equal(cube.contains([1, 1, 1]), [True])
+        np.testing.assert_array_equal(cube.contains([[1, 1, 2.5], [-0.1, 1, 1]]), [False, False])
+
+    def test_contains_global(self):
+        coordinate_system = Cartesian(origin=np.array([10.0, 0.0, 0.0]))
+        coordinate_system.rotate_axis_angle(np.array([0.0, 1.0, 0.0]), np.pi / 2)
+        cylinder = Cylinder(coordinate_system=coordinate_system, r_outer=1.0, z=[0, 3])
+        local_xyz = np.array([[0.5, 0.0, 2.0], [0.0, 0.0, -1.0]])
+        global_xyz = np.asarray(cylinder.to_global_coordinate_system(local_xyz))
+        np.testing.assert_array_equal(cylinder.contains(global_xyz, local=False), [True, False])
+        np.testing.assert_array_equal(cylinder.contains(local_xyz), [True, False])
+
+    def test_signed_distance_exact(self):
+        xyz = np.random.uniform(-2, 3, (2000, 3))
+        cube = Cube(a=1.3)
+        clipped = np.clip(xyz, 0, 1.3)
+        outside = np.linalg.norm(xyz - clipped, axis=1)
+        inside = np.min(np.minimum(xyz, 1.3 - xyz), axis=1)
+        np.testing.assert_allclose(cube.signed_distance(xyz), np.where(outside > 0, outside, -inside), atol=1e-12)
+        shell = Sphere(r_inner=0.5, r_outer=1.2)
+        r = np.linalg.norm(xyz, axis=1)
+        np.testing.assert_allclose(shell.signed_distance(xyz), np.maximum(r - 1.2, 0.5 - r), atol=1e-12)
+        cylinder = Cylinder(r_outer=1.0, z=[0, 1])
+        np.testing.assert_allclose(cylinder.signed_distance([[0, 0, 0.5], [2, 0, 0.5], [0.5, 0, 2], [2, 0, 2]]),
+                                   [-0.5, 1.0, 1.0, np.sqrt(2)])
+
+    def test_signed_distance_balls(self):
+        directions = np.random.normal(size=(20000, 3))
+        directions /= np.linalg.norm(directions, axis=1)[:, None]
+        figures = [SphericalWedge(r_inner=0.3, r_outer=1.5, phi=1.0, theta=[0.2, 1.9]),
+                   SphericalSegmentWedge(r_inner=0.3, r_outer=1.5, h1=-0.5, h2=0.9, phi=2.0),
+                   CylindricalWedge(r_inner=0.3, r_outer=1.5, phi=4.0, z=[-1, 1.5]),
+                   ConicalWedge(phi=np.pi / 2, theta=np.pi / 6, z=[-1, 1.5], z_offset=0.5, r_min=0.2),
+                   ToricSector(phi=2.0, r_torus=1.2, r_tube=[0.1, 0.6]),
+                   ParallelepipedTriclinic(a=1, b=1.5, c=1.2, alpha=1.2, beta=1.4, gamma=1.9)]
+        for figure in figures:
+            xyz = self.xyz[:20]
+            distance = figure.signed_distance(xyz)
+            inside = figure.contains(xyz)
+            np.testing.assert_array_equal(distance < 0, inside)
+            for point, d, point_inside in zip(xyz, np.abs(distance), inside):
+                # ball of radius |d| does not cross the surface, slightly larger ball does
+                self.assertTrue(np.all(figure.contains(point + directions * d * 0.999) == point_inside))
+                self.assertFalse(np.all(figure.contains(point + directions * (d * 1.05 + 1e-3)) == point_inside))
+
+    def test_signed_distance_global(self):
+        parent = Cube(name='Parent', coordinate_system=Cartesian(origin=np.array([0.0, 5.0, 0.0])))
+        coordinate_system = Cartesian(origin=np.array([10.0, 0.0, 0.0]))
+        coordinate_system.rotate_axis_angle(np.array([1.0, 1.0, 0.0]), 0.7)
+        sphere = Sphere(coordinate_system=coordinate_system, r_outer=2.0)
+        parent.add_element(sphere)
+        center = np.asarray(sphere.to_global_coordinate_system(np.zeros((1, 3))))
+        np.testing.assert_allclose(center, [[10.0, 5.0, 0.0]])
+        np.testing.assert_allclose(sphere.signed_distance(center + [[0, 0, 3], [1, 0, 0]], local=False), [1, -1])
+
+    def test_intersect_rays(self):
+        sphere = Sphere(r_outer=1.0)
+        distance, normals = sphere.intersect_rays([[-3, 0, 0], [0, 0, 0], [-3, 2, 0]], [[2, 0, 0], [0, 0, 1], [1, 0, 0]])
+        np.testing.assert_allclose(distance[:2], [2, 1])
+        self.assertEqual(distance[2], np.inf)
+        np.testing.assert_allclose(normals, [[-1, 0, 0], [0, 0, 1], [0, 0, 0]], atol=1e-6)
+        torus = Torus(r_torus=1.0, r_tube=[0, 0.25])
+        distance, normals = torus.intersect_rays([[-3, 0, 0], [0, 0, 3]], [[1, 0, 0], [0, 0, -1]])
+        np.testing.assert_allclose(distance[0], 1.75)
+        self.assertEqual(distance[1], np.inf)
+        np.testing.assert_allclose(normals[0], [-1, 0, 0], atol=1e-6)
+        cube = Cube(a=1.0)
+        distance, normals = cube.intersect_rays([[0.5, 0.5, -1], [0.5, 0.5, 0.5]], [[0, 0, 1], [1, 0, 0]])
+        np.testing.assert_allclose(distance, [1, 0.5])
+        np.testing.assert_allclose(normals, [[0, 0, -1], [1, 0, 0]], atol=1e-12)
+
+    def test_intersect_rays_signed_distance(self):
+        figures = [SphericalWedge(r_inner=0.3, r_outer=1.5, phi=1.0, theta=[0.2, 1.9]),
+                   SphericalSegmentWedge(r_inner=0.3, r_outer=1.5, h1=-0.5, h2=0.9, phi=2.0),
+                   CylindricalWedge(r_inner=0.3, r_outer=1.5, phi=4.0, z=[-1, 1.5]),
+                   ConicalWedge(phi=np.pi / 2, theta=np.pi / 6, z=[-1, 1.5], z_offset=0.5, r_min=0.2),
+                   ToricSector(phi=2.0, r_torus=1.2, r_tube=[0.1, 0.6]),
+                   ParallelepipedTriclinic(a=1, b=1.5, c=1.2, alpha=1.2, beta=1.4, gamma=1.9)]
+        origins = np.random.uniform(-3, 3, (500, 3))
+        directions = np.random.uniform(-0.3, 0.3, (500, 3)) - origins
+        directions /= np.linalg.norm(directions, axis=1)[:, None]
+        for figure in figures:
+            distance, normals = figure.intersect_rays(origins, directions)
+            hit = np.isfinite(distance)
+            self.assertTrue(np.any(hit))
+            # hit points lie on the surface and nothing is crossed before them
+            points = origins[hit] + distance[hit, None] * directions[hit]
+            np.testing.assert_allclose(figure.signed_distance(points), 0, atol=1e-8)
+            for fraction in np.linspace(0.05, 0.95, 10):
+                before = origins[hit] + fraction * distance[hit, None] * directions[hit]
+                np.testing.assert_array_equal(figure.contains(before), figure.contains(origins[hit]))
+            # normals point outside
+            self.assertTrue(np.all(figure.signed_distance(points + 1e-4 * normals[hit]) >
+                                   figure.signed_distance(points - 1e-4 * normals[hit])))
+
+    def test_cast_rays(self):
+        world = Space('World')
+        figures = []
+        for k in range(40):
+            coordinate_system = Cartesian(origin=np.random.uniform(-10, 10, 3))
+            coordinate_system.rotate_axis_angle(np.random.normal(size=3), np.random.uniform(0, 3))
+            figure = [Sphere(name='Sphere', coordinate_system=coordinate_system, r_outer=1.0),
+                      Cylinder(name='Cylinder', coordinate_system=coordinate_system, r_outer=0.5, z=[0, 2]),
+                      Torus(name='Torus', coordinate_system=coordinate_system, r_torus=1.0, r_tube=[0, 0.3]),
+                      Cube(name='Cube', coordinate_system=coordinate_system, a=1.0)][k % 4]
+            if k % 2:
+                figures[-1].add_element(figure)
+            else:
+                world.add_element(figure)
+            figures.append(figure)
+        origins = np.random.uniform(-15, 15, (2000, 3))
+        directions = np.random.normal(size=(2000, 3))
+        hits, distance, normals = world.cast_rays(origins, directions)
+        expected = np.array([figure.intersect_rays(origins, directions, local=False)[0] for figure in figures])
+        np.testing.assert_allclose(distance, expected.min(axis=0))
+        self.assertTrue(np.any(np.isfinite(distance)))
+        for hit, index, d in zip(hits, expected.argmin(axis=0), distance):
+            self.assertIs(hit, figures[index] if np.isfinite(d) else None)
+        # rays parallel to the coordinate planes are culled by the slab test without division by zero
+        directions = np.eye(3)[np.arange(2000) % 3] * np.where(np.arange(2000) % 2, 1.0, -1.0)[:, None]
+        distance = world.cast_rays(origins, directions)[1]
+        expected = np.array([figure.intersect_rays(origins, directions, local=False)[0] for figure in figures])
+        np.testing.assert_allclose(distance, expected.min(axis=0))
+        self.assertTrue(np.any(np.isfinite(distance)))
+
+    def test_bounding_box(self):
+        figures = [SphericalWedge(r_inner=0.3, r_outer=1.5, phi=1.0, theta=[0.2, 1.9]),
+                   SphericalSegmentWedge(r_inner=0.3, r_outer=1.5, h1=-0.5, h2=0.9, phi=2.0),
+                   CylindricalWedge(r_inner=0.3, r_outer=1.5, phi=4.0, z=[-1, 1.5]),
+                   ConicalWedge(phi=np.pi / 2, theta=np.pi / 6, z=[-1, 1.5], z_offset=0.5, r_min=0.2),
+                   ToricSector(phi=2.0, r_torus=1.2, r_tube=[0.1, 0.6]),
+                   ParallelepipedTriclinic(a=1, b=1.5, c=1.2, alpha=1.2, beta=1.4, gamma=1.9)]
+        for figure in figures:
+            box = figure.bounding_box(local=True)
+            inside = self.xyz[figure.contains(self.xyz)]
+            self.assertTrue(np.all(inside >= box[0]) and np.all(inside <= box[1]))
+            # analytic box is tight up to the sampling resolution
+            np.testing.assert_allclose(inside.min(axis=0), box[0], atol=0.1)
+            np.testing.assert_allclose(inside.max(axis=0), box[1], atol=0.1)
+        sphere = Sphere(r_outer=1.0, coordinate_system=Cartesian(origin=np.array([5.0, 0.0, 0.0])))
+        np.testing.assert_allclose(sphere.bounding_box(), [[4, -1, -1], [6, 1, 1]])
+        sphere.r_outer = 2.0
+        np.testing.assert_allclose(sphere.bounding_box(), [[3, -2, -2], [7, 2, 2]])
+        np.testing.assert_allclose(sphere.bounding_box(local=True), [[-2, -2, -2], [2, 2, 2]])
+
+    def test_integrate(self):
+        figures = [SphericalWedge(r_inner=0.3, r_outer=1.5, phi=1.0, theta=[0.2, 1.9]),
+                   Sphere(r_inner=0.5, r_outer=1.0),
+                   Cylinder(r_inner=0.3, r_outer=1.5, z=[-1, 1.5]),
+                   Torus(r_torus=1.2, r_tube=[0.0, 0.6]),
+                   ParallelepipedTriclinic(a=1, b=1.5, c=1.2, alpha=1.2, beta=1.4, gamma=1.9)]
+        volumes = [1 / 3 * (1.5 ** 3 - 0.3 ** 3) * (np.cos(0.2) - np.cos(1.9)),
+                   4 / 3 * np.pi * (1 - 0.5 ** 3), np.pi * (1.5 ** 2 - 0.3 ** 2) * 2.5,
+                   2 * np.pi ** 2 * 1.2 * 0.36, abs(np.linalg.det(figures[-1].vectors))]
+        for figure, volume in zip(figures, volumes):
+            for method in ['sobol', 'halton', 'random']:
+                estimate, error = figure.estimate_volume(n_points=4096, method=method, seed=1)
+                self.assertTrue(0 < error < 0.05 * volume)
+                self.assertLess(abs(estimate - volume), 5 * error)
+        # randomized quasi-Monte Carlo converges faster than Monte Carlo
+        sphere = figures[1]
+        self.assertLess(sphere.estimate_volume(seed=2)[1], sphere.estimate_volume(method='random', seed=2)[1] / 3)
+        self.assertRaises(ValueError, sphere.estimate_volume, method='grid')
+        self.assertRaises(ValueError, sphere.estimate_volume, n_randomizations=1)
+        coordinate_system = Cartesian(origin=np.array([1.0, 2.0, 3.0]))
+        coordinate_system.rotate_axis_angle(np.array([1.0, 1.0, 0.0]), 0.7)
+        cube = Cube(a=2.0, coordinate_system=coordinate_system)
+        centroid, error = cube.centroid(local=False, seed=3)
+        np.testing.assert_allclose(centroid, cube.to_global_coordinate_system(np.ones((1, 3)))[0], atol=1e-4)
+        inertia, error = cube.inertia_tensor(density=2.0, seed=4)
+        np.testing.assert_allclose(inertia, 2.0 * 8 * 4 / 6 * np.eye(3), atol=1e-4)
+        # inertia tensor of the rotated cube is the same in the global coordinate system
+        np.testing.assert_allclose(cube.inertia_tensor(local=False, seed=4)[0], 8 * 4 / 6 * np.eye(3), atol=1e-3)
+        field = ConstantScalarConservativeField('Field', 'Scalar', 2.0)
+        np.testing.assert_allclose(sphere.integrate_field(field, seed=5)[0], 2 * volumes[1], rtol=1e-3)
+        moments, error = sphere.integrate(lambda xyz: xyz[:, 2] ** 2, seed=6)
+        self.assertLess(abs(moments - 4 * np.pi / 15 * (1 - 0.5 ** 5)), 5 * error)
+
+    def test_sample_volume(self):
+        figures = [SphericalWedge(r_inner=0.3, r_outer=1.5, phi=1.0, theta=[0.2, 1.9]),
+                   CylindricalWedge(r_inner=0.3, r_outer=1.5, phi=4.0, z=[-1, 1.5]),
+                   ConicalWedge(phi=np.pi / 2, theta=np.pi / 6, z=[-1, 1.5], z_offset=0.5, r_min=0.2),
+                   ToricSector(phi=2.0, r_torus=1.2, r_tube=[0.1, 0.6]),
+                   SphericalSegmentWedge(r_inner=0.3, r_outer=1.5, h1=-0.5, h2=0.9, phi=2.0),
+                   ParallelepipedTriclinic(a=1, b=1.5, c=1.2, alpha=1.2, beta=1.4, gamma=1.9)]
+        for figure in figures:
+            moments = figure.integrate(lambda x: np.hstack((x, x ** 2)), n_points=1 << 16)[0]
+            moments /= figure.estimate_volume(n_points=1 << 16)[0]
+            for stratified in [False, True]:
+                xyz = figure.sample_volume(100000, rng=1, stratified=stratified, local=True)
+                self.assertEqual(xyz.shape, (100000, 3))
+                self.assertTrue(np.all(np.asarray(figure.signed_distance(xyz)) < 1e-9))
+                # uniform points have the same moments as the Figure volume
+                np.testing.assert_allclose(np.hstack((xyz, xyz ** 2)).mean(axis=0), moments, atol=0.01)
+        coordinate_system = Cartesian(origin=np.array([1.0, 2.0, 3.0]))
+        coordinate_system.rotate_axis_angle(np.array([1.0, 1.0, 0.0]), 0.7)
+        cone = ConicalWedge(phi=5.0, theta=np.pi / 5, z=[0.3, 1.5], z_offset=2.0, coordinate_system=coordinate_system)
+        xyz = cone.sample_volume(1000, rng=np.random.default_rng(2))
+        np.testing.assert_allclose(xyz, cone.to_global_coordinate_system(cone.sample_volume(1000, rng=2, local=True)))
+        self.assertTrue(np.all(cone.contains(xyz[:100], local=False) | (np.abs(cone.signed_distance(
+            xyz[:100], local=False)) < 1e-9)))
+        self.assertRaises(NotImplementedError, Figure('Figure').sample_volume, 10)
+
+    def test_sample_surface(self):
+        figures = [SphericalWedge(r_inner=0.3, r_outer=1.5, phi=1.0, theta=[0.2, 1.9]),
+                   Sphere(r_inner=0.5, r_outer=1.0),
+                   CylindricalWedge(r_inner=0.3, r_outer=1.5, phi=4.0, z=[-1, 1.5]),
+                   ConicalWedge(phi=np.pi / 2, theta=np.pi / 6, z=[-1, 1.5], z_offset=0.5, r_min=0.2),
+                   ToricSector(phi=2.0, r_torus=1.2, r_tube=[0.1, 0.6]),
+                   Torus(r_torus=1.2, r_tube=[0.2, 0.6]),
+                   ParallelepipedTriclinic(a=1, b=1.5, c=1.2, alpha=1.2, beta=1.4, gamma=1.9),
+                   SphericalSegmentWedge(r_inner=0.3, r_outer=1.5, h1=-0.5, h2=0.9, phi=2.0),
+                   SphericalSegment(r_inner=0.5, r_outer=1.2, h1=-1.0, h2=0.2)]
+        for figure in figures:
+            xyz = figure.sample_surface(20000, rng=3, stratified=True, local=True)
+            self.assertTrue(np.all(np.abs(figure.signed_distance(xyz)) < 1e-9))
+        # closed form areas of the full figures
+        for figure in figures[1], figures[5], figures[6], figures[8]:
+            self.assertAlmostEqual(sum(area for area, _ in figure._surface_faces()), figure.surface_area())
+        # points are spread over the faces proportionally to their areas
+        cylinder = Cylinder(r_inner=0.5, r_outer=1.0, z=[0, 2])
+        xyz = cylinder.sample_surface(100000, rng=4, local=True)
+        rho = np.sqrt(xyz[:, 0] ** 2 + xyz[:, 1] ** 2)
+        fractions = [np.mean(np.isclose(rho, 1.0)), np.mean(np.isclose(rho, 0.5)), np.mean(np.isclose(xyz[:, 2], 0))]
+        np.testing.assert_allclose(fractions, np.array([4, 2, 0.75]) / 7.5, atol=0.01)
+        self.assertAlmostEqual(np.mean(xyz[:, 2]), 1.0, delta=0.01)
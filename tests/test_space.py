@@ -1,5 +1,8 @@
 import unittest
+import numpy as np
 from BDSpace import Space
+from BDSpace.Coordinates import Cartesian
+from BDSpace.Figure.Cube import Cube
 
 
 class TestSpace(unittest.TestCase):
@@ -44,3 +47,94 @@ class TestSpace(unittest.TestCase):
 
     def test_basis_in_global_coordinates(self):
         print('Basis in GCS:', self.solar_system.basis_in_global_coordinate_system())
+
+    def test_global_coordinate_system_cache(self):
+        earth = self.solar_system.elements['Earth']
+        moon = Space('Moon')
+        earth.add_element(moon)
+        earth.coordinate_system.origin = [1.0, 0.0, 0.0]
+        moon.coordinate_system.origin = [0.0, 1.0, 0.0]
+        xyz = np.array([[0.0, 0.0, 1.0]])
+        np.testing.assert_allclose(moon.to_global_coordinate_system(xyz), [[1.0, 1.0, 1.0]])
+        basis = moon.basis_in_global_coordinate_system()
+        generation = moon.global_generation
+        self.assertIs(moon.basis_in_global_coordinate_system(), basis)
+        self.assertEqual(moon.global_generation, generation)
+        self.solar_system.coordinate_system.rotate_axis_angle(np.array([0.0, 0.0, 1.0]), np.pi / 2)
+        self.assertNotEqual(moon.global_generation, generation)
+        np.testing.assert_allclose(moon.to_global_coordinate_system(xyz), [[-1.0, 1.0, 1.0]], atol=1e-12)
+        np.testing.assert_allclose(moon.to_local_coordinate_system(np.array([[-1.0, 1.0, 1.0]])), xyz, atol=1e-12)
+        generation = moon.global_generation
+        moon.detach_from_parent()
+        self.assertNotEqual(moon.global_generation, generation)
+        np.testing.assert_allclose(moon.to_global_coordinate_system(xyz), [[0.0, 1.0, 1.0]], atol=1e-12)
+        self.solar_system.elements['Mars'].add_element(moon)
+        np.testing.assert_allclose(moon.to_global_coordinate_system(xyz), [[-1.0, 0.0, 1.0]], atol=1e-12)
+        # modification of the returned coordinate system does not move the root Space
+        basis = self.solar_system.basis_in_global_coordinate_system()
+        self.assertIsNot(basis, self.solar_system.coordinate_system)
+        basis.origin = [5.0, 0.0, 0.0]
+        np.testing.assert_allclose(self.solar_system.coordinate_system.origin, [0.0, 0.0, 0.0])
+        np.testing.assert_allclose(self.solar_system.basis_in_global_coordinate_system().origin, [0.0, 0.0, 0.0])
+
+    def test_observer_errors(self):
+        class FailingObserver(object):
+            def coordinate_system_changed(self, coordinate_system):
+                raise RuntimeError('observer failed')
+
+            def space_changed(self, space, subtree):
+                raise RuntimeError('observer failed')
+
+        coordinate_system = Cartesian()
+        observer = FailingObserver()
+        coordinate_system.add_observer(observer)
+        self.assertRaises(RuntimeError, setattr, coordinate_system, 'origin', [1.0, 0.0, 0.0])
+        coordinate_system.remove_observer(observer)
+        earth = self.solar_system.elements['Earth']
+        moon = Cube('Moon', a=1.0)
+        earth.add_element(moon)
+        self.solar_system.add_observer(observer)
+        self.assertRaises(RuntimeError, earth.coordinate_system.rotate_axis_angle, np.array([0.0, 0.0, 1.0]), 1.0)
+        self.assertRaises(RuntimeError, setattr, moon, 'a', 2.0)
+
+    def test_transform_to(self):
+        earth = self.solar_system.elements['Earth']
+        mars = self.solar_system.elements['Mars']
+        moon = Space('Moon')
+        earth.add_element(moon)
+        earth.coordinate_system.origin = [1.0, 0.0, 0.0]
+        earth.coordinate_system.rotate_axis_angle(np.array([0.0, 0.0, 1.0]), np.pi / 3)
+        moon.coordinate_system.origin = [0.0, 1.0, 0.0]
+        mars.coordinate_system.origin = [-2.0, 0.5, 0.0]
+        mars.coordinate_system.rotate_axis_angle(np.array([1.0, 0.0, 1.0]), np.pi / 5)
+        xyz = np.random.random((10, 3))
+        check = mars.to_local_coordinate_system(moon.to_global_coordinate_system(xyz))
+        np.testing.assert_allclose(moon.transform_to(mars, xyz), check, atol=1e-12)
+        np.testing.assert_allclose(moon.transform_to_vector(mars, xyz[0]), check[0], atol=1e-12)
+        np.testing.assert_allclose(mars.transform_to(moon, check), xyz, atol=1e-12)
+        np.testing.assert_allclose(moon.transform_to(earth, xyz), moon.coordinate_system.to_parent(xyz), atol=1e-12)
+        earth.coordinate_system.rotate_axis_angle(np.array([0.0, 1.0, 0.0]), np.pi / 7)
+        check = mars.to_local_coordinate_system(moon.to_global_coordinate_system(xyz))
+        np.testing.assert_allclose(moon.transform_to(mars, xyz), check, atol=1e-12)
+
+    def test_bounding_box(self):
+        self.assertIsNone(self.solar_system.bounding_box())
+        earth = self.solar_system.elements['Earth']
+        earth.coordinate_system.origin = np.array([10.0, 0.0, 0.0])
+        moon = Cube('Moon', coordinate_system=Cartesian(origin=np.array([0.0, 2.0, 0.0])), a=1.0)
+        earth.add_element(moon)
+        np.testing.assert_allclose(self.solar_system.bounding_box(), [[10, 2, 0], [11, 3, 1]])
+        np.testing.assert_allclose(earth.bounding_box(local=True), [[0, 2, 0], [1, 3, 1]])
+        box = self.solar_system.bounding_box()
+        box[0, 0] = -100
+        np.testing.assert_allclose(self.solar_system.bounding_box()[0], [10, 2, 0])
+        # moving elements or parents outdates the cached boxes
+        earth.coordinate_system.rotate_axis_angle(np.array([0.0, 0.0, 1.0]), np.pi / 2)
+        np.testing.assert_allclose(self.solar_system.bounding_box(), [[7, 0, 0], [8, 1, 1]], atol=1e-12)
+        np.testing.assert_allclose(earth.bounding_box(local=True), [[0, 2, 0], [1, 3, 1]])
+        mars = self.solar_system.elements['Mars']
+        mars.add_element(Cube('Phobos', coordinate_system=Cartesian(origin=np.array([-5.0, 0.0, 0.0])), a=2.0))
+        np.testing.assert_allclose(self.solar_system.bounding_box(), [[-5, 0, 0], [8, 2, 2]], atol=1e-12)
+        earth.remove_element(moon)
+        np.testing.assert_allclose(self.solar_system.bounding_box(), [[-5, 0, 0], [-3, 2, 2]])
+        self.assertIsNone(earth.bounding_box())
@@ -0,0 +1,127 @@
+import unittest
+import numpy as np
+from BDSpace import Space, SpatialIndex
+from BDSpace.Coordinates import Cartesian
+from BDSpace.Curve import Helix
+from BDSpace.Figure.Sphere import SphericalWedge
+from BDSpace.Figure.Cube import Cube
+
+
+class TestSpatialIndex(unittest.TestCase):
+
+    def setUp(self):
+        np.random.seed(3)
+        self.world = Space('World')
+        self.groups = [Space('Group %d' % k) for k in range(5)]
+        self.figures = []
+        for k, group in enumerate(self.groups):
+            self.world.add_element(group)
+            group.coordinate_system.origin = np.random.uniform(-5, 5, 3)
+        for k in range(300):
+            coordinate_system = Cartesian(origin=np.random.uniform(-20, 20, 3))
+            if k % 2:
+                figure = SphericalWedge('Sphere %d' % k, r_outer=np.random.uniform(0.1, 1.0),
+                                        coordinate_system=coordinate_system)
+            else:
+                coordinate_system.rotate_axis_angle(np.random.normal(size=3), np.random.uniform(0, 3))
+                figure = Cube('Cube %d' % k, a=np.random.uniform(0.1, 1.0), coordinate_system=coordinate_system)
+            self.groups[k % 5].add_element(figure)
+            self.figures.append(figure)
+        self.index = SpatialIndex(self.world)
+        self.xyz = np.random.uniform(-25, 25, (200, 3))
+
+    def attached(self):
+        elements = []
+        for figure in self.figures:
+            space = figure
+            while space is not None and space is not self.world:
+                space = space.parent
+            if space is self.world:
+                elements.append(figure)
+        return elements
+
+    def check(self):
+        elements = self.attached()
+        self.assertEqual(len(self.index), len(elements))
+        boxes = np.array([element.bounding_box() for element in elements])
+        lower, upper = self.xyz - 1.5, self.xyz + 1.5
+        for found, l, u in zip(self.index.query_box(lower, upper), lower, upper):
+            overlap = np.all(boxes[:, 0] <= u, axis=1) & np.all(boxes[:, 1] >= l, axis=1)
+            self.assertEqual(set(map(id, found)), set(id(elements[i]) for i in np.nonzero(overlap)[0]))
+        for found, point in zip(self.index.query_point(self.xyz), self.xyz):
+            inside = np.all(boxes[:, 0] <= point, axis=1) & np.all(boxes[:, 1] >= point, axis=1)
+            self.assertEqual(set(map(id, found)), set(id(elements[i]) for i in np.nonzero(inside)[0]))
+        nearest, distance = self.index.nearest(self.xyz)
+        distances = np.array([element._distance(self.xyz) for element in elements])
+        np.testing.assert_allclose(distance, distances.min(axis=0))
+        for element, point_distances in zip(nearest, distances.T):
+            self.assertAlmostEqual(point_distances[elements.index(element)], point_distances.min())
+
+    def test_queries(self):
+        self.assertEqual(len(self.index), 300)
+        self.assertIs(self.index.space, self.world)
+        self.check()
+        figure = self.figures[1]
+        found = self.index.query_point(figure.to_global_coordinate_system(np.zeros((1, 3))))[0]
+        self.assertIn(figure, found)
+        nearest, distance = self.index.nearest(figure.to_global_coordinate_system(np.zeros((1, 3))))
+        self.assertIs(nearest[0], figure)
+        self.assertEqual(distance[0], 0)
+
+    def test_incremental_update(self):
+        for figure in self.figures[:20]:
+            figure.coordinate_system.origin = np.random.uniform(-20, 20, 3)
+        self.figures[1].r_outer = 4.0
+        self.groups[2].coordinate_system.rotate_axis_angle(np.array([0.0, 0.0, 1.0]), 1.0)
+        self.check()
+        for figure in self.figures[100:200]:
+            figure.detach_from_parent()
+        self.check()
+        for figure in self.figures[100:150]:
+            self.groups[0].add_element(figure)
+        self.check()
+        self.world.remove_element(self.groups[3])
+        self.check()
+        self.groups[3].remove_element(self.figures[3])
+        self.world.add_element(self.groups[3])
+        self.world.coordinate_system.origin = np.array([1.0, 2.0, 3.0])
+        self.check()
+
+    def test_query_after_rebuild(self):
+        world = Space('Small world')
+        figures = [SphericalWedge('Sphere %d' % k, r_outer=0.5, coordinate_system=Cartesian(origin=[2.0 * k, 0, 0]))
+                   for k in range(40)]
+        for figure in figures:
+            world.add_element(figure)
+        index = SpatialIndex(world)
+        self.assertEqual(len(index), 40)
+        for figure in figures[:15]:
+            figure.detach_from_parent()
+        xyz = np.array([[2.0 * k, 0, 0] for k in range(40)])
+        found = index.query_point(xyz)
+        self.assertEqual(found, [[]] * 15 + [[figure] for figure in figures[15:]])
+        self.assertEqual(index.query_point(xyz), found)
+        for figure in figures[15:30]:
+            figure.detach_from_parent()
+        found = index.query_box(xyz - 0.1, xyz + 0.1)
+        self.assertEqual(found, [[]] * 30 + [[figure] for figure in figures[30:]])
+
+    def test_mixed_elements(self):
+        helix = Helix(name='Helix', radius=1, pitch=0.3, stop=15)
+        self.world.add_element(helix)
+        self.assertIn(helix, self.index.elements)
+        point = np.asarray(helix.generate_points(np.array([2.0]))) + np.array([0.05, 0.0, 0.0])
+        nearest, distance = self.index.nearest(point)
+        self.assertIs(nearest[0], helix)
+        np.testing.assert_allclose(distance, helix._distance(point))
+        empty = SpatialIndex(Space('Empty'))
+        self.assertEqual(len(empty), 0)
+        self.assertEqual(empty.query_point(point), [[]])
+        nearest, distance = empty.nearest(point)
+        self.assertIsNone(nearest[0])
+        self.assertEqual(distance[0], np.inf)
+        self.assertRaises(ValueError, SpatialIndex, self.world, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
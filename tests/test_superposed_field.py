@@ -79,3 +79,78 @@ class TestField(unittest.TestCase):
         np.testing.assert_allclose(result, check)
         result = SField.scalar_field(xyz)
         np.testing.assert_allclose(result, np.pi + np.asarray(VField1.scalar_field(xyz)))
+
+    def test_evaluate_chunks(self):
+        import os
+        import tempfile
+        pot = ConstantVectorConservativeField('Pot', 'Electrostatic field', np.array([1.0, 2.0, 3.0]))
+        pot.coordinate_system.origin = np.array([1.0, -1.0, 0.5])
+        self.SField.fields = [pot, ConstantScalarConservativeField('Pot', 'Electrostatic field', 2.0)]
+        xyz = (np.random.random((1000, 3)) - 0.5) * 10
+        scalar = np.asarray(self.SField.scalar_field(xyz))
+        vector = np.asarray(self.SField.vector_field(xyz))
+        np.testing.assert_allclose(self.SField.evaluate_chunks(xyz, chunk_size=64), scalar)
+        np.testing.assert_allclose(self.SField.evaluate_chunks(xyz, chunk_size=77, vector=True), vector)
+        with tempfile.TemporaryDirectory() as directory:
+            points = np.memmap(os.path.join(directory, 'points.dat'), dtype=np.double, mode='w+', shape=xyz.shape)
+            points[:] = xyz
+            out = np.memmap(os.path.join(directory, 'out.dat'), dtype=np.double, mode='w+', shape=(xyz.shape[0],))
+            self.assertIs(self.SField.evaluate_chunks(points, chunk_size=100, out=out), out)
+            np.testing.assert_allclose(out, scalar)
+            del points, out
+        out = np.empty((xyz.shape[0], 3))
+        self.SField.evaluate_chunks((xyz[i:i + 300] for i in range(0, 1000, 300)), chunk_size=128,
+                                    out=out, vector=True)
+        np.testing.assert_allclose(out, vector)
+        with self.assertRaises(ValueError):
+            self.SField.evaluate_chunks(iter([xyz]))
+        with self.assertRaises(ValueError):
+            self.SField.evaluate_chunks(xyz, out=np.empty(10))
+        with self.assertRaises(ValueError):
+            self.SField.evaluate_chunks(iter([xyz[:500]]), out=np.empty(1000))
+        out = np.empty((xyz.shape[0], 6))
+        self.SField.evaluate_chunks(xyz, chunk_size=128, out=out[:, ::2], vector=True)
+        np.testing.assert_allclose(out[:, ::2], vector)
+        out = np.empty(xyz.shape[0], dtype=np.float32)
+        self.SField.evaluate_chunks(xyz.astype(np.float32), chunk_size=128, out=out)
+        np.testing.assert_allclose(out, scalar, rtol=1e-5, atol=1e-4)
+        blocks = list(self.SField.iterate_chunks(xyz, chunk_size=300))
+        self.assertEqual([len(block) for block in blocks], [300, 300, 300, 100])
+        np.testing.assert_allclose(np.concatenate(blocks), scalar)
+
+    def test_fused_superposition(self):
+        from BDSpace.Coordinates import Cartesian
+        from BDSpace.Curve.Parametric import Arc
+        from BDSpace.Field import HyperbolicPotentialSphericalConservativeField
+        from BDSpace.Field import HyperbolicPotentialCurveConservativeField
+        ball = HyperbolicPotentialSphericalConservativeField('Ball', 'Electrostatic field', r=0.5, a=2.0)
+        ball.coordinate_system.origin = np.array([1.0, 2.0, -1.0])
+        ball.coordinate_system.rotate_axis_angle(np.array([1.0, 1.0, 0.0]), np.pi / 3)
+        loop = Arc(name='Loop', coordinate_system=Cartesian(origin=np.array([-1.0, 0.0, 1.0])), a=1.0, b=1.0)
+        loop_field = HyperbolicPotentialCurveConservativeField('Loop', 'Electrostatic field', curve=loop, r=0.1)
+        loop_field.a = -1.0
+        pot = ConstantVectorConservativeField('Pot', 'Electrostatic field', np.array([1.0, 2.0, 3.0]))
+        fields = [ball, loop_field, pot, SuperposedField('Nested', [ConstantScalarConservativeField(
+            'Pot', 'Electrostatic field', 2.0)])]
+        superposition = SuperposedField('Superposition', fields)
+        superposition.coordinate_system.rotate_axis_angle(np.array([0.0, 0.0, 1.0]), np.pi / 5)
+        xyz = (np.random.random((3000, 3)) - 0.5) * 10
+
+        def check():
+            global_xyz = superposition.to_global_coordinate_system(xyz)
+            scalar = np.zeros(xyz.shape[0])
+            vector = np.zeros(xyz.shape)
+            for field in fields:
+                local_xyz = field.to_local_coordinate_system(global_xyz)
+                scalar += np.asarray(field.scalar_field(local_xyz))
+                vector += np.asarray(field.vector_field(local_xyz))
+            np.testing.assert_allclose(superposition.scalar_field(xyz), scalar)
+            np.testing.assert_allclose(superposition.vector_field(xyz), vector, atol=1e-12)
+
+        check()
+        ball.coordinate_system.origin = np.array([0.0, -2.0, 1.0])
+        loop_field.a = 3.0
+        check()
+        superposition.fields = fields[:2]
+        fields = fields[:2]
+        check()
@@ -174,3 +174,43 @@ class TestTransforms(unittest.TestCase):
         np.testing.assert_allclose(cartesian_to_spherical(xyz), rtp)
         np.testing.assert_allclose(spherical_to_cylindrical(rtp), rpz)
         np.testing.assert_allclose(spherical_to_cartesian(rtp), xyz)
+
+    def test_out_and_inplace(self):
+        points_num = 100
+        xyz = ((np.random.random(points_num * 3) - 0.5) * 200).reshape((points_num, 3))
+        rtp = np.asarray(cartesian_to_spherical(xyz))
+        out = np.empty_like(xyz)
+        result = cartesian_to_spherical(xyz, out=out)
+        self.assertTrue(np.shares_memory(np.asarray(result), out))
+        np.testing.assert_allclose(out, rtp)
+        buffer = np.copy(xyz)
+        cartesian_to_spherical(buffer, inplace=True)
+        np.testing.assert_allclose(buffer, rtp)
+        spherical_to_cartesian(buffer, inplace=True)
+        np.testing.assert_allclose(buffer, xyz)
+        cartesian_to_cylindrical(buffer, out=out)
+        cylindrical_to_cartesian(out, inplace=True)
+        np.testing.assert_allclose(out, xyz)
+        with self.assertRaises(ValueError):
+            cartesian_to_spherical(xyz, out=np.empty((points_num + 1, 3)))
+        angles = np.random.random(points_num) * 2 * np.pi + 2 * np.pi
+        reduced = np.asarray(reduce_angles(angles))
+        reduce_angles(angles, inplace=True)
+        np.testing.assert_allclose(angles, reduced)
+
+    def test_single_precision(self):
+        points_num = 100
+        xyz = ((np.random.random(points_num * 3) - 0.5) * 200).reshape((points_num, 3))
+        rtp = np.asarray(cartesian_to_spherical(xyz.astype(np.float32)))
+        self.assertEqual(rtp.dtype, np.float32)
+        np.testing.assert_allclose(rtp, cartesian_to_spherical(xyz), rtol=1e-6, atol=1e-5)
+        rpz = np.asarray(cartesian_to_cylindrical(xyz.astype(np.float32)))
+        self.assertEqual(rpz.dtype, np.float32)
+        np.testing.assert_allclose(cylindrical_to_cartesian(rpz), xyz, rtol=1e-5, atol=1e-4)
+        np.testing.assert_allclose(spherical_to_cylindrical(rtp), rpz, rtol=1e-5, atol=1e-4)
+        np.testing.assert_allclose(cylindrical_to_spherical(rpz), rtp, rtol=1e-5, atol=1e-4)
+        out = np.empty((points_num, 3), dtype=np.float32)
+        self.assertTrue(np.shares_memory(np.asarray(spherical_to_cartesian(rtp, out=out)), out))
+        np.testing.assert_allclose(out, xyz, rtol=1e-5, atol=1e-4)
+        with self.assertRaises(ValueError):
+            cartesian_to_spherical(xyz.astype(np.float32), out=np.empty((points_num, 3)))
@@ -0,0 +1,52 @@
+import unittest
+import numpy as np
+from BDSpace.Field import SuperposedField, TreeSuperposedField
+from BDSpace.Field import HyperbolicPotentialSphericalConservativeField, ConstantScalarConservativeField
+
+
+class TestTreeSuperposedField(unittest.TestCase):
+
+    def setUp(self):
+        np.random.seed(1)
+        self.sources = []
+        for i in range(500):
+            source = HyperbolicPotentialSphericalConservativeField('Charge %d' % i, 'Electrostatic field',
+                                                                   r=0.01, a=np.random.choice([-1.0, 2.0]))
+            source.coordinate_system.origin = np.random.random(3) * 10
+            self.sources.append(source)
+        self.xyz = np.random.random((300, 3)) * 14 - 2
+
+    def test_exact(self):
+        exact = SuperposedField('Charges', self.sources)
+        tree = TreeSuperposedField('Charges', self.sources, theta=0.0, leaf_size=8)
+        np.testing.assert_allclose(tree.scalar_field(self.xyz), exact.scalar_field(self.xyz))
+        np.testing.assert_allclose(tree.vector_field(self.xyz), exact.vector_field(self.xyz), atol=1e-10)
+        np.testing.assert_allclose(tree.scalar_field_error(self.xyz), np.zeros(self.xyz.shape[0]))
+        self.assertAlmostEqual(tree.scalar_field_point(self.xyz[0]), exact.scalar_field_point(self.xyz[0]))
+
+    def test_approximation(self):
+        tree = TreeSuperposedField('Charges', self.sources, theta=0.0)
+        exact_scalar = np.asarray(tree.scalar_field(self.xyz))
+        exact_vector = np.asarray(tree.vector_field(self.xyz))
+        tree.theta = 0.5
+        scalar = np.asarray(tree.scalar_field(self.xyz))
+        error = np.asarray(tree.scalar_field_error(self.xyz))
+        self.assertTrue(np.all(np.abs(scalar - exact_scalar) <= error + 1e-12))
+        self.assertTrue(np.any(error > 0))
+        vector = np.asarray(tree.vector_field(self.xyz))
+        np.testing.assert_allclose(vector, exact_vector, rtol=0.1, atol=0.1 * np.max(np.abs(exact_vector)))
+        np.testing.assert_allclose(tree.vector_field_point(self.xyz[3]), vector[3])
+
+    def test_rebuild(self):
+        tree = TreeSuperposedField('Charges', self.sources[:10], theta=0.3)
+        exact = SuperposedField('Charges', self.sources[:10])
+        tree.scalar_field(self.xyz)
+        self.sources[0].coordinate_system.origin = np.array([20.0, 0.0, 0.0])
+        self.sources[1].a = 10.0
+        np.testing.assert_allclose(tree.scalar_field(self.xyz), exact.scalar_field(self.xyz), rtol=1e-2)
+        tree.fields = self.sources[:20]
+        self.assertEqual(tree.tree.size, 20)
+        with self.assertRaises(ValueError):
+            tree.fields = [ConstantScalarConservativeField('Pot', 'Electrostatic field', 1.0)]
+        with self.assertRaises(ValueError):
+            tree.theta = 1.0
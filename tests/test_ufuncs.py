@@ -0,0 +1,42 @@
+import unittest
+import numpy as np
+
+from BDSpace.Coordinates import ufuncs
+from BDSpace.Coordinates import transforms
+
+
+class TestUfuncs(unittest.TestCase):
+
+    def test_signature(self):
+        self.assertEqual(ufuncs.cartesian_to_spherical.signature, '(3)->(3)')
+        with self.assertRaises(ValueError):
+            ufuncs.cartesian_to_spherical(np.zeros((10, 2)))
+
+    def test_grid_broadcasting(self):
+        grid = (np.random.random((7, 5, 3)) - 0.5) * 20
+        rtp = ufuncs.cartesian_to_spherical(grid)
+        self.assertIsInstance(rtp, np.ndarray)
+        self.assertEqual(rtp.shape, grid.shape)
+        check = np.asarray(transforms.cartesian_to_spherical(grid.reshape(-1, 3).copy())).reshape(grid.shape)
+        np.testing.assert_allclose(rtp, check)
+        np.testing.assert_allclose(ufuncs.spherical_to_cartesian(rtp), grid, atol=1e-12)
+
+    def test_strided_input_and_out(self):
+        points = (np.random.random((20, 6)) - 0.5) * 20
+        xyz = points[::2, ::2]
+        out = np.empty((10, 3))
+        ufuncs.cartesian_to_cylindrical(xyz, out=out)
+        np.testing.assert_allclose(out, transforms.cartesian_to_cylindrical(np.ascontiguousarray(xyz)))
+        np.testing.assert_allclose(ufuncs.cylindrical_to_cartesian(out), xyz, atol=1e-12)
+        rtp = ufuncs.cylindrical_to_spherical(out)
+        np.testing.assert_allclose(ufuncs.spherical_to_cylindrical(rtp), out, atol=1e-12)
+        np.testing.assert_allclose(ufuncs.invert_spherical(rtp),
+                                   transforms.invert_spherical(np.ascontiguousarray(rtp)))
+
+    def test_single_precision(self):
+        grid = (np.random.random((7, 5, 3)) - 0.5) * 20
+        rtp = ufuncs.cartesian_to_spherical(grid.astype(np.float32))
+        self.assertEqual(rtp.dtype, np.float32)
+        np.testing.assert_allclose(rtp, ufuncs.cartesian_to_spherical(grid), rtol=1e-5, atol=1e-5)
+        self.assertEqual(ufuncs.spherical_to_cartesian(rtp).dtype, np.float32)
+        self.assertEqual(ufuncs.cartesian_to_spherical(grid.astype(np.int64)).dtype, np.double)